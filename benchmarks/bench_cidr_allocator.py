@@ -0,0 +1,69 @@
+"""Compare the CIDR allocator with the linear search it replaced.
+
+Run from the repository root with `python -m benchmarks.bench_cidr_allocator`.
+"""
+from __future__ import annotations
+
+import random
+import timeit
+from ipaddress import IPv4Network, ip_network
+
+from cloudshell.cp.openstack.exceptions import FreeSubnetIsNotFound
+from cloudshell.cp.openstack.services.cidr_allocator import CidrAllocator
+
+
+def legacy_first_free_subnet(blacklist_cidrs: set[str]) -> IPv4Network:
+    blacklist_subnets = set(map(ip_network, blacklist_cidrs))
+    first_second_octet_dict = {10: range(256), 172: range(16, 32), 192: (168,)}
+    for first_octet, second_octets in first_second_octet_dict.items():
+        for second_octet in second_octets:
+            for third_octet in range(256):
+                subnet = IPv4Network(f"{first_octet}.{second_octet}.{third_octet}.0/24")
+                if not any(map(subnet.overlaps, blacklist_subnets)):
+                    return subnet
+    raise FreeSubnetIsNotFound
+
+
+def get_used_cidrs(count: int, seed: int = 0) -> set[str]:
+    """First `count` /24 networks are used and a few random ones after them."""
+    rnd = random.Random(seed)
+    networks = IPv4Network("10.0.0.0/8").subnets(new_prefix=24)
+    used = {str(next(networks)) for _ in range(count)}
+    used.update(
+        str(IPv4Network((rnd.randrange(10 << 24, 11 << 24), 24), strict=False))
+        for _ in range(count // 10)
+    )
+    return used
+
+
+def allocator_first_free_subnet(used: set[str]) -> IPv4Network:
+    allocator = CidrAllocator()
+    allocator.sync(used)
+    return allocator.find_free()
+
+
+def main():
+    header = f"{'used':>6} {'legacy, ms':>12} {'allocator, ms':>14} {'sync, ms':>9}"
+    print(header)  # noqa: T201
+    for count in (10, 100, 500, 1000):
+        used = get_used_cidrs(count)
+        assert legacy_first_free_subnet(used) == allocator_first_free_subnet(used)
+        number = 3 if count > 100 else 10
+        legacy = timeit.timeit(lambda: legacy_first_free_subnet(used), number=number)
+        full = timeit.timeit(lambda: allocator_first_free_subnet(used), number=number)
+
+        # the usual case: the index is up to date, one network was added
+        allocator = CidrAllocator()
+        allocator.sync(used)
+        changed = used | {"192.168.0.0/24"}
+        incremental = timeit.timeit(
+            lambda: (allocator.sync(changed), allocator.find_free()), number=number
+        )
+        print(  # noqa: T201
+            f"{len(used):>6} {legacy / number * 1000:>12.2f} "
+            f"{full / number * 1000:>14.2f} {incremental / number * 1000:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
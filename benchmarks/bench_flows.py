@@ -0,0 +1,307 @@
+"""Load test of the shell flows against the local OpenStack stand-in.
+
+The flows use real keystoneauth, nova, neutron and glance clients, the stand-in
+adds latency to every response. Run from the repository root with
+`python -m benchmarks.bench_flows`, e.g.
+    python -m benchmarks.bench_flows --latency 20 --jitter 5 --concurrency 1 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent import futures as ft
+from types import SimpleNamespace
+from typing import Any, Callable, Sequence
+
+import attr
+
+from cloudshell.shell.flows.connectivity.models.connectivity_model import (
+    ConnectionModeEnum,
+)
+
+from cloudshell.cp.openstack.flows import (
+    ConnectivityFlow,
+    GetVMDetailsFlow,
+    delete_instance,
+)
+from cloudshell.cp.openstack.flows.save_restore_app import SaveRestoreAppFlow
+from cloudshell.cp.openstack.models.attr_names import AppAttrName
+from cloudshell.cp.openstack.utils.instrumented_lock import LockStats, get_lock_stats
+
+from tests.openstack_standin import ErrorRate, Latency, OpenStackState, StandInServer
+from tests.standin_cloud import (
+    Cloud,
+    ParsedRequestService,
+    get_deployed_app,
+    get_vlan_action,
+)
+
+LOGGER = logging.getLogger("bench_flows")
+FLOWS = ("deploy", "connectivity", "vm_details", "save", "delete")
+
+
+# every flow prepares arguments for its operations and runs one operation
+def _prepare_nothing(cloud: Cloud, count: int) -> list:
+    return [None] * count
+
+
+def _prepare_instances(cloud: Cloud, count: int) -> list:
+    return [cloud.deploy() for _ in range(count)]
+
+
+def _run_deploy(cloud: Cloud, _) -> None:
+    cloud.deploy()
+
+
+def _run_connectivity(cloud: Cloud, vm_id: str) -> None:
+    # a few VLANs for all VMs so operations meet on the same networks
+    vlan_id = 100 + int(uuid.UUID(vm_id)) % 4
+    request = [
+        get_vlan_action(vm_id, vlan_id, ConnectionModeEnum.ACCESS),
+        get_vlan_action(vm_id, vlan_id + 10, ConnectionModeEnum.TRUNK),
+    ]
+    flow = ConnectivityFlow(cloud.conf, ParsedRequestService(), cloud.logger, cloud.api)
+    results = json.loads(flow.apply_connectivity(request))["driverResponse"]
+    failed = [r["errorMessage"] for r in results["actionResults"] if not r["success"]]
+    if failed:
+        raise RuntimeError(failed[0])
+
+
+def _run_vm_details(cloud: Cloud, vm_id: str) -> None:
+    flow = GetVMDetailsFlow(
+        cloud.conf, cloud.cancellation_manager, cloud.api, cloud.logger
+    )
+    request = SimpleNamespace(deployed_apps=[get_deployed_app(vm_id)])
+    result = json.loads(flow.get_vm_details(request))[0]
+    if result["errorMessage"]:
+        raise RuntimeError(result["errorMessage"])
+
+
+def _run_save(cloud: Cloud, vm_id: str) -> None:
+    flow = SaveRestoreAppFlow(
+        cloud.conf, cloud.logger, cloud.cancellation_manager, cloud.api
+    )
+    behavior = SimpleNamespace(
+        attributeName=f"Deploy.{AppAttrName.behavior_during_save}",
+        attributeValue="Inherited",
+    )
+    params = SimpleNamespace(
+        sourceVmUuid=vm_id,
+        sourceAppName="bench app",
+        deploymentPathAttributes=[behavior],
+    )
+    flow.save_apps([SimpleNamespace(actionId=str(uuid.uuid4()), actionParams=params)])
+
+
+def _run_delete(cloud: Cloud, vm_id: str) -> None:
+    delete_instance(cloud.api, get_deployed_app(vm_id))
+
+
+SCENARIOS: dict[str, tuple[Callable[[Cloud, int], list], Callable[[Cloud, Any], None]]]
+SCENARIOS = {
+    "deploy": (_prepare_nothing, _run_deploy),
+    "connectivity": (_prepare_instances, _run_connectivity),
+    "vm_details": (_prepare_instances, _run_vm_details),
+    "save": (_prepare_instances, _run_save),
+    "delete": (_prepare_instances, _run_delete),
+}
+
+
+@attr.s(auto_attribs=True)
+class FlowResult:
+    flow: str
+    concurrency: int
+    operations: int
+    errors: int
+    duration: float
+    latencies: list[float]
+    calls: dict[str, int]
+    locks: dict[str, LockStats] = attr.ib(factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.operations / self.duration
+
+    def percentile(self, percent: int) -> float:
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return 0.0
+        index = max(0, int(round(percent / 100 * len(latencies))) - 1)
+        return latencies[index]
+
+    def calls_per_op(self, service: str | None = None) -> float:
+        calls = sum(
+            count
+            for key, count in self.calls.items()
+            if service is None or key.startswith(f"{service} ")
+        )
+        return calls / self.operations
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "flow": self.flow,
+            "concurrency": self.concurrency,
+            "operations": self.operations,
+            "errors": self.errors,
+            "throughput": self.throughput,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "mean": statistics.mean(self.latencies) if self.latencies else 0.0,
+            "calls_per_op": self.calls_per_op(),
+            "calls": self.calls,
+            "locks": {name: attr.asdict(stats) for name, stats in self.locks.items()},
+        }
+
+
+def run_flow(
+    cloud: Cloud,
+    flow: str,
+    concurrency: int,
+    operations: int,
+    errors: dict[str, ErrorRate] | None = None,
+) -> FlowResult:
+    """Run the operations of the flow, errors are injected only into them."""
+    prepare, run = SCENARIOS[flow]
+    args = prepare(cloud, operations)
+    latencies: list[float] = []
+    failures: Counter = Counter()
+
+    def timed_run(arg) -> None:
+        start = time.perf_counter()
+        try:
+            run(cloud, arg)
+        except Exception as e:
+            failures[f"{type(e).__name__}: {e}"] += 1
+        else:
+            latencies.append(time.perf_counter() - start)
+
+    calls_before = Counter(cloud.server.calls)
+    locks_before = get_lock_stats()
+    cloud.server.errors = errors or {}
+    start = time.perf_counter()
+    try:
+        # concurrent commands share the session like the pooled ones do
+        with ft.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed_run, args))
+    finally:
+        cloud.server.errors = {}
+    duration = time.perf_counter() - start
+    calls = Counter(cloud.server.calls)
+    calls.subtract(calls_before)
+    locks = {
+        name: stats - locks_before.get(name, LockStats())
+        for name, stats in get_lock_stats().items()
+    }
+
+    for error, count in failures.most_common(3):
+        LOGGER.warning(f"{flow}, {concurrency} workers: {count} x {error}")
+    return FlowResult(
+        flow,
+        concurrency,
+        operations,
+        sum(failures.values()),
+        duration,
+        latencies,
+        {key: count for key, count in sorted(calls.items()) if count},
+        {name: stats for name, stats in sorted(locks.items()) if stats.acquisitions},
+    )
+
+
+def run(
+    flows: Sequence[str] = FLOWS,
+    concurrency: Sequence[int] = (1, 4, 16),
+    operations: int = 16,
+    latency: dict[str, Latency] | None = None,
+    errors: dict[str, ErrorRate] | None = None,
+    boot_time: float = 0.0,
+    logger: logging.Logger | None = None,
+) -> list[FlowResult]:
+    logger = logger or logging.getLogger("bench_flows.shell")
+    results = []
+    with StandInServer(OpenStackState(boot_time), latency) as server:
+        cloud = Cloud.start(server, logger)
+        cloud.deploy()  # warm up the API models and the token
+        for flow in flows:
+            for workers in concurrency:
+                results.append(run_flow(cloud, flow, workers, operations, errors))
+    return results
+
+
+def _print_report(results: list[FlowResult]) -> None:
+    columns = (
+        f"{'flow':<14}{'workers':>8}{'ops':>6}{'errors':>7}{'ops/s':>9}"
+        f"{'p50, ms':>10}{'p99, ms':>10}{'calls/op':>10}"
+        f"{'nova':>7}{'neutron':>8}{'glance':>7}"
+    )
+    print(columns)  # noqa: T201
+    for r in results:
+        print(  # noqa: T201
+            f"{r.flow:<14}{r.concurrency:>8}{r.operations:>6}{r.errors:>7}"
+            f"{r.throughput:>9.2f}{r.percentile(50) * 1000:>10.1f}"
+            f"{r.percentile(99) * 1000:>10.1f}{r.calls_per_op():>10.1f}"
+            f"{r.calls_per_op('nova'):>7.1f}{r.calls_per_op('neutron'):>8.1f}"
+            f"{r.calls_per_op('glance'):>7.1f}"
+        )
+        for name, stats in r.locks.items():
+            if stats.contentions:
+                print(f"{'':<14}lock '{name}': {stats}")  # noqa: T201
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flows", nargs="+", choices=FLOWS, default=list(FLOWS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--ops", type=int, default=16, help="operations per run")
+    parser.add_argument("--latency", type=float, default=10, help="ms per request")
+    parser.add_argument("--jitter", type=float, default=2, help="ms, std deviation")
+    parser.add_argument(
+        "--endpoint-latency",
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("ENDPOINT", "MS"),
+        help="e.g. 'neutron POST /v2.0/ports' 200 or nova 50",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--boot-time", type=float, default=0.0, help="seconds")
+    parser.add_argument("--json", help="save results to the file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="shell logs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    if not args.verbose:  # failed operations are summarized in the report
+        logging.getLogger("bench_flows.shell").setLevel(logging.CRITICAL)
+    default_latency = Latency(args.latency / 1000, args.jitter / 1000)
+    latency = {service: default_latency for service in ("nova", "neutron", "glance")}
+    latency.update(
+        {key: Latency(float(ms) / 1000) for key, ms in args.endpoint_latency}
+    )
+    errors = {}
+    if args.error_rate:
+        errors = {s: ErrorRate(args.error_rate) for s in ("nova", "neutron", "glance")}
+
+    results = run(
+        args.flows,
+        args.concurrency,
+        args.ops,
+        latency,
+        errors,
+        args.boot_time,
+    )
+    _print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([r.to_dict() for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""In-process Nova, Neutron and Glance clients over the stand-in state.
+
+They have the methods of the real clients the shell calls, like `NeutronEmu`
+in the tests, but keep the rules of the stand-in, e.g. a VLAN can't be used
+twice and a network with ports can't be deleted. There is no HTTP, so many
+sandboxes can be simulated in one process, the latency is only a sleep.
+"""
+from __future__ import annotations
+
+import copy
+import random
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any
+
+from glanceclient import exc as glance_exc
+from neutronclient.common import exceptions as neutron_exc
+from novaclient import base as nova_base
+from novaclient import exceptions as nova_exc
+from novaclient.v2.servers import NetworkInterface, Server
+
+from cloudshell.cp.openstack.os_api.api import OsApi
+
+from tests.openstack_standin import (
+    NEUTRON_RESOURCES,
+    HttpError,
+    Latency,
+    OpenStackState,
+)
+
+_COLLECTIONS = {kind: collection for collection, kind in NEUTRON_RESOURCES.items()}
+
+
+def _public(obj: dict) -> dict:
+    return {k: v for k, v in obj.items() if not k.startswith("__")}
+
+
+def _to_filters(params: dict[str, Any]) -> dict[str, list[str]]:
+    return {
+        key: list(map(str, value)) if isinstance(value, (list, tuple)) else [str(value)]
+        for key, value in params.items()
+    }
+
+
+class FakeCloud:
+    """The state and the clients' calls, latency is per service or method.
+
+    Latency keys are like `neutron` or `neutron create_port`, calls are counted
+    by the same keys.
+    """
+
+    def __init__(
+        self,
+        state: OpenStackState | None = None,
+        latency: dict[str, Latency] | None = None,
+        seed: int = 0,
+    ):
+        self.state = state or OpenStackState()
+        self.latency = latency or {}
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self, service: str, method: str, func, *args):
+        """Call the state after the latency, return a copy like a response."""
+        key = f"{service} {method}"
+        with self._lock:
+            self.calls[key] += 1
+            latency = self.latency.get(key) or self.latency.get(service)
+            delay = latency.get_delay(self._random) if latency else 0.0
+        if delay:
+            time.sleep(delay)
+        with self.state.lock:
+            return copy.deepcopy(func(*args))
+
+    def connect(self, logger) -> OsApi:
+        """API of a command, like OsApi.from_config with the fake clients."""
+        auth = SimpleNamespace(
+            auth_url="http://fake-cloud/identity",
+            project_name="admin",
+            project_domain_id="default",
+        )
+        api = OsApi(SimpleNamespace(auth=auth), logger)
+        api._nova = FakeNova(self)
+        api._neutron = FakeNeutron(self)
+        api._glance = FakeGlance(self)
+        return api
+
+
+class FakeNeutron:
+    def __init__(self, cloud: FakeCloud):
+        self._cloud = cloud
+        self._state = cloud.state
+
+    def __getattr__(self, name: str):
+        action, _, collection = name.partition("_")
+        kind = NEUTRON_RESOURCES.get(collection.replace("_", "-"))
+        if action == "list" and kind:
+            return lambda retrieve_all=True, **params: self._call(
+                name, self._list, kind, params
+            )
+        kind = kind or collection
+        if kind not in self._state.neutron:
+            raise AttributeError(name)
+        if action == "show":
+            return lambda id_, **params: self._call(name, self._show, kind, id_)
+        if action == "create":
+            return lambda body: self._call(name, self._create, kind, body)
+        if action == "update":
+            return lambda id_, body, revision_number=None: self._call(
+                name, self._update, kind, id_, body, revision_number
+            )
+        if action == "delete":
+            return lambda id_: self._call(name, self._state.delete_neutron, kind, id_)
+        raise AttributeError(name)
+
+    def trunk_get_subports(self, trunk_id: str) -> dict:
+        return self._call("trunk_get_subports", self._get_sub_ports, trunk_id)
+
+    def trunk_add_subports(self, trunk_id: str, body: dict) -> dict:
+        add = self._state.add_sub_ports
+        return self._call("trunk_add_subports", add, trunk_id, body["sub_ports"])
+
+    def trunk_remove_subports(self, trunk_id: str, body: dict) -> dict:
+        remove = self._state.remove_sub_ports
+        return self._call("trunk_remove_subports", remove, trunk_id, body["sub_ports"])
+
+    def _call(self, method: str, func, *args):
+        try:
+            return self._cloud.call("neutron", method, func, *args)
+        except HttpError as e:
+            raise _neutron_error(e) from None
+
+    def _list(self, kind: str, params: dict) -> dict:
+        objects = self._state.list_neutron(kind, _to_filters(params))
+        return {_COLLECTIONS[kind].replace("-", "_"): list(map(_public, objects))}
+
+    def _show(self, kind: str, id_: str) -> dict:
+        return {kind: _public(self._state.show_neutron(kind, id_))}
+
+    def _create(self, kind: str, body: dict) -> dict:
+        collection = _COLLECTIONS[kind].replace("-", "_")
+        if collection in body:
+            with self._state.lock:
+                objects = [
+                    self._state.create_neutron(kind, data) for data in body[collection]
+                ]
+            return {collection: list(map(_public, objects))}
+        return {kind: _public(self._state.create_neutron(kind, body[kind]))}
+
+    def _update(
+        self, kind: str, id_: str, body: dict, revision_number: int | None
+    ) -> dict:
+        obj = self._state.update_neutron(kind, id_, body[kind], revision_number)
+        return {kind: _public(obj)}
+
+    def _get_sub_ports(self, trunk_id: str) -> dict:
+        return {"sub_ports": self._state.show_neutron("trunk", trunk_id)["sub_ports"]}
+
+
+def _neutron_error(e: HttpError) -> neutron_exc.NeutronClientException:
+    error = e.body.get("NeutronError", {})
+    exc_class = getattr(neutron_exc, f"{error.get('type')}Client", None)
+    exc_class = exc_class or neutron_exc.HTTP_EXCEPTION_MAP.get(
+        e.status, neutron_exc.NeutronClientException
+    )
+    return exc_class(message=error.get("message", str(e.body)), status_code=e.status)
+
+
+def _nova_error(e: HttpError) -> nova_exc.ClientException:
+    (error,) = e.body.values() if e.body else ({},)
+    exc_class = nova_exc._code_map.get(e.status, nova_exc.ClientException)
+    return exc_class(e.status, message=error.get("message"))
+
+
+class _FakeNovaManager:
+    def __init__(self, cloud: FakeCloud):
+        self._cloud = cloud
+        self._state = cloud.state
+
+    def _call(self, method: str, func, *args):
+        try:
+            return self._cloud.call("nova", method, func, *args)
+        except HttpError as e:
+            raise _nova_error(e) from None
+
+
+class FakeServerManager(_FakeNovaManager):
+    def get(self, server) -> Server:
+        info = self._call(
+            "servers.get", self._state.show_server, nova_base.getid(server)
+        )
+        return Server(self, info, loaded=True)
+
+    def list(  # noqa: A003
+        self,
+        detailed: bool = True,
+        search_opts: dict | None = None,
+        limit: int | None = None,
+    ):
+        filters = {k: [v] for k, v in (search_opts or {}).items()}
+        if limit is not None:
+            filters["limit"] = [str(limit)]
+        infos = self._call("servers.list", self._state.list_servers, filters)
+        return [Server(self, info, loaded=True) for info in infos]
+
+    def findall(self, **kwargs) -> list[Server]:
+        return [
+            server
+            for server in self.list()
+            if all(getattr(server, k) == v for k, v in kwargs.items())
+        ]
+
+    def create(self, name: str, image: str, flavor: str, nics=(), **kwargs) -> Server:
+        networks = [
+            {"port": nic["port-id"]} if nic.get("port-id") else {"uuid": nic["net-id"]}
+            for nic in nics
+        ]
+        data = {
+            "name": name,
+            "imageRef": image,
+            "flavorRef": flavor,
+            "availability_zone": kwargs.get("availability_zone"),
+            "networks": networks,
+            "security_groups": [
+                {"name": sg} for sg in kwargs.get("security_groups") or ()
+            ],
+        }
+        server = self._call("servers.create", self._state.create_server, data)
+        return Server(self, {"id": server["id"], "links": []})
+
+    def update(self, server, name: str | None = None, **kwargs) -> Server:
+        info = self._call(
+            "servers.update",
+            self._state.update_server,
+            nova_base.getid(server),
+            {"name": name},
+        )
+        return Server(self, info, loaded=True)
+
+    def delete(self, server) -> None:
+        self._call("servers.delete", self._state.delete_server, nova_base.getid(server))
+
+    def start(self, server) -> None:
+        self._action(server, "os-start")
+
+    def stop(self, server) -> None:
+        self._action(server, "os-stop")
+
+    def create_image(self, server, image_name: str, metadata=None) -> str:
+        image = self._action(server, "createImage", {"name": image_name})
+        return image["id"]
+
+    def add_security_group(self, server, security_group: str) -> None:
+        self._action(server, "addSecurityGroup", {"name": security_group})
+
+    def remove_security_group(self, server, security_group: str) -> None:
+        self._action(server, "removeSecurityGroup", {"name": security_group})
+
+    def list_security_group(self, server) -> list[nova_base.Resource]:
+        groups = self._call(
+            "servers.list_security_group",
+            self._state.server_security_groups,
+            nova_base.getid(server),
+        )
+        return [nova_base.Resource(self, _public(sg), loaded=True) for sg in groups]
+
+    def interface_list(self, server) -> list[NetworkInterface]:
+        ifaces = self._call(
+            "servers.interface_list",
+            self._state.list_interfaces,
+            nova_base.getid(server),
+        )
+        return [NetworkInterface(self, iface, loaded=True) for iface in ifaces]
+
+    def interface_attach(self, server, port_id, net_id, fixed_ip) -> NetworkInterface:
+        iface = self._call(
+            "servers.interface_attach",
+            self._state.attach_interface,
+            nova_base.getid(server),
+            port_id,
+            net_id,
+        )
+        return NetworkInterface(self, iface, loaded=True)
+
+    def interface_detach(self, server, port_id: str) -> None:
+        self._call(
+            "servers.interface_detach",
+            self._state.detach_interface,
+            nova_base.getid(server),
+            port_id,
+        )
+
+    def _action(self, server, action: str, params: Any = None):
+        return self._call(
+            f"servers.{action}",
+            self._state.server_action,
+            nova_base.getid(server),
+            action,
+            params,
+        )
+
+
+class FakeFlavorManager(_FakeNovaManager):
+    def get(self, flavor) -> nova_base.Resource:
+        info = self._call(
+            "flavors.get", self._state.get_flavor, nova_base.getid(flavor)
+        )
+        return nova_base.Resource(self, info, loaded=True)
+
+    def list(self, **kwargs) -> list[nova_base.Resource]:  # noqa: A003
+        infos = self._call("flavors.list", lambda: list(self._state.flavors.values()))
+        return [nova_base.Resource(self, info, loaded=True) for info in infos]
+
+    def findall(self, **kwargs) -> list[nova_base.Resource]:
+        return [
+            flavor
+            for flavor in self.list()
+            if all(getattr(flavor, k) == v for k, v in kwargs.items())
+        ]
+
+
+class FakeNova:
+    def __init__(self, cloud: FakeCloud):
+        self.servers = FakeServerManager(cloud)
+        self.flavors = FakeFlavorManager(cloud)
+
+
+class FakeImageController:
+    def __init__(self, cloud: FakeCloud):
+        self._cloud = cloud
+        self._state = cloud.state
+
+    def get(self, id_: str) -> dict:
+        return self._call("images.get", self._state.get_image, id_)
+
+    def list(self) -> list[dict]:  # noqa: A003
+        return self._call("images.list", lambda: list(self._state.images.values()))
+
+    def delete(self, id_: str) -> None:
+        self._call("images.delete", self._state.delete_image, id_)
+
+    def _call(self, method: str, func, *args):
+        try:
+            return self._cloud.call("glance", method, func, *args)
+        except HttpError as e:
+            exc_class = glance_exc._code_map.get(e.status, glance_exc.HTTPException)
+            raise exc_class(details=e.body.get("message")) from None
+
+
+class FakeGlance:
+    def __init__(self, cloud: FakeCloud):
+        self.images = FakeImageController(cloud)
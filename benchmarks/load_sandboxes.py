@@ -0,0 +1,387 @@
+"""Load test of many sandboxes running the shell commands at the same time.
+
+Every sandbox deploys its apps, connects them to its VLANs, powers them off and
+on, gets VM details, disconnects and deletes them, one command after another
+like a reservation does. The commands run through the real flow classes with
+the in-process fake clients, so hundreds of sandboxes fit in one process.
+Run from the repository root with `python -m benchmarks.load_sandboxes`, e.g.
+    python -m benchmarks.load_sandboxes --sandboxes 1 8 32 --latency 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent import futures as ft
+from ipaddress import ip_network
+from itertools import combinations
+from types import SimpleNamespace
+from typing import Any, Callable, Sequence
+
+import attr
+
+from benchmarks.fake_clients import FakeCloud
+from cloudshell.shell.flows.connectivity.models.connectivity_model import (
+    ConnectionModeEnum,
+    ConnectivityTypeEnum,
+)
+
+from cloudshell.cp.openstack.flows import (
+    ConnectivityFlow,
+    GetVMDetailsFlow,
+    PowerFlow,
+    delete_instance,
+)
+from cloudshell.cp.openstack.utils.instrumented_lock import LockStats, get_lock_stats
+
+from tests.openstack_standin import Latency, OpenStackState
+from tests.standin_cloud import (
+    Cloud,
+    ParsedRequestService,
+    fill_state,
+    get_deployed_app,
+    get_vlan_action,
+)
+
+LOGGER = logging.getLogger("load_sandboxes")
+COMMANDS = ("deploy", "connectivity", "power", "vm_details", "delete")
+FIRST_VLAN = 100
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[max(0, int(round(percent / 100 * len(values))) - 1)]
+
+
+@attr.s(auto_attribs=True)
+class LoadResult:
+    sandboxes: int
+    duration: float
+    latencies: dict[str, list[float]]
+    failures: Counter
+    locks: dict[str, LockStats]
+    cidr_collisions: list[tuple[str, str]]
+    vlan_collisions: list[int]
+    leftovers: dict[str, int]
+
+    @property
+    def commands(self) -> int:
+        return sum(map(len, self.latencies.values())) + sum(self.failures.values())
+
+    @property
+    def throughput(self) -> float:
+        return self.commands / self.duration
+
+    @property
+    def errors(self) -> int:
+        return sum(self.failures.values())
+
+    def percentile(self, percent: int, command: str | None = None) -> float:
+        if command:
+            return _percentile(self.latencies.get(command, []), percent)
+        return _percentile(sum(self.latencies.values(), []), percent)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "sandboxes": self.sandboxes,
+            "duration": self.duration,
+            "commands": self.commands,
+            "throughput": self.throughput,
+            "latency": {
+                command: {
+                    "p50": self.percentile(50, command),
+                    "p99": self.percentile(99, command),
+                }
+                for command in self.latencies
+            },
+            "failures": dict(self.failures),
+            "locks": {name: attr.asdict(stats) for name, stats in self.locks.items()},
+            "cidr_collisions": self.cidr_collisions,
+            "vlan_collisions": self.vlan_collisions,
+            "leftovers": self.leftovers,
+        }
+
+
+@attr.s(auto_attribs=True)
+class Sandbox:
+    """Apps of one reservation, every command gets its own API like the shell."""
+
+    name: str
+    fake_cloud: FakeCloud
+    conf: SimpleNamespace
+    image_id: str
+    flavor_name: str
+    vlan_ids: list[int]
+    apps: int
+    logger: logging.Logger
+    vm_ids: list[str] = attr.ib(factory=list)
+    latencies: dict[str, list[float]] = attr.ib(factory=lambda: defaultdict(list))
+    failures: Counter = attr.ib(factory=Counter)
+
+    def get_cloud(self) -> Cloud:
+        api = self.fake_cloud.connect(self.logger)
+        return Cloud(
+            self.fake_cloud,
+            api,
+            self.conf,
+            self.image_id,
+            self.flavor_name,
+            self.logger,
+        )
+
+    def run_command(self, command: str, func: Callable[[Cloud], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            result = func(self.get_cloud())
+        except Exception as e:
+            self.failures[f"{command}: {type(e).__name__}: {e}"] += 1
+            return None
+        self.latencies[command].append(time.perf_counter() - start)
+        return result
+
+    def run(self) -> None:
+        for _ in range(self.apps):
+            vm_id = self.run_command("deploy", Cloud.deploy)
+            if vm_id:
+                self.vm_ids.append(vm_id)
+        if not self.vm_ids:
+            return
+
+        set_actions = self._get_vlan_actions(ConnectivityTypeEnum.SET_VLAN)
+        self.run_command("connectivity", lambda c: _apply_connectivity(c, set_actions))
+        for vm_id in self.vm_ids:
+            self.run_command("power", lambda c: _power_cycle(c, vm_id))
+        self.run_command("vm_details", lambda c: _get_vm_details(c, self.vm_ids))
+        remove_actions = [
+            get_vlan_action(
+                action.custom_action_attrs.vm_uuid,
+                int(action.connection_params.vlan_id),
+                action.connection_params.mode,
+                ConnectivityTypeEnum.REMOVE_VLAN,
+                action.action_id,
+            )
+            for action in set_actions
+        ]
+        self.run_command(
+            "connectivity", lambda c: _apply_connectivity(c, remove_actions)
+        )
+        for vm_id in self.vm_ids:
+            self.run_command(
+                "delete", lambda c: delete_instance(c.api, get_deployed_app(vm_id))
+            )
+
+    def _get_vlan_actions(self, action_type: ConnectivityTypeEnum) -> list:
+        # the first VLAN is an access one, others are on the trunks
+        return [
+            get_vlan_action(
+                vm_id,
+                vlan_id,
+                ConnectionModeEnum.ACCESS if i == 0 else ConnectionModeEnum.TRUNK,
+                action_type,
+            )
+            for vm_id in self.vm_ids
+            for i, vlan_id in enumerate(self.vlan_ids)
+        ]
+
+
+def _apply_connectivity(cloud: Cloud, actions: list) -> None:
+    flow = ConnectivityFlow(cloud.conf, ParsedRequestService(), cloud.logger, cloud.api)
+    results = json.loads(flow.apply_connectivity(actions))["driverResponse"]
+    failed = [r["errorMessage"] for r in results["actionResults"] if not r["success"]]
+    if failed:
+        raise RuntimeError(failed[0])
+
+
+def _power_cycle(cloud: Cloud, vm_id: str) -> None:
+    flow = PowerFlow(cloud.api, get_deployed_app(vm_id), cloud.logger)
+    flow.power_off()
+    flow.power_on()
+
+
+def _get_vm_details(cloud: Cloud, vm_ids: list[str]) -> None:
+    flow = GetVMDetailsFlow(
+        cloud.conf, cloud.cancellation_manager, cloud.api, cloud.logger
+    )
+    request = SimpleNamespace(deployed_apps=list(map(get_deployed_app, vm_ids)))
+    for result in json.loads(flow.get_vm_details(request)):
+        if result["errorMessage"]:
+            raise RuntimeError(result["errorMessage"])
+
+
+def find_cidr_collisions(state: OpenStackState) -> list[tuple[str, str]]:
+    """Overlapping subnets of different networks."""
+    subnets = [
+        (subnet["network_id"], ip_network(subnet["cidr"]))
+        for subnet in state.neutron["subnet"].values()
+    ]
+    return [
+        (str(cidr), str(other_cidr))
+        for (net, cidr), (other_net, other_cidr) in combinations(subnets, 2)
+        if net != other_net and cidr.overlaps(other_cidr)
+    ]
+
+
+def find_vlan_collisions(state: OpenStackState) -> list[int]:
+    """VLANs of many networks or of a network with many subnets."""
+    subnets = Counter(s["network_id"] for s in state.neutron["subnet"].values())
+    networks: Counter = Counter()
+    for net in state.neutron["network"].values():
+        vlan_id = net.get("provider:segmentation_id")
+        if vlan_id is not None:
+            networks[vlan_id] += max(1, subnets[net["id"]])
+    return sorted(vlan_id for vlan_id, count in networks.items() if count > 1)
+
+
+def count_objects(state: OpenStackState) -> dict[str, int]:
+    counts = {kind: len(objects) for kind, objects in state.neutron.items()}
+    counts["server"] = len(state.servers)
+    return counts
+
+
+def run_level(
+    sandboxes: int,
+    apps: int = 2,
+    vlans: int = 2,
+    shared_vlans: int = 0,
+    latency: dict[str, Latency] | None = None,
+    logger: logging.Logger | None = None,
+) -> LoadResult:
+    """Run the sandboxes at once on a new cloud.
+
+    Every sandbox gets its own VLANs, unless shared_vlans is set, then the
+    sandboxes take their VLANs from the pool of that many VLANs.
+    """
+    logger = logger or logging.getLogger("load_sandboxes.shell")
+    state = OpenStackState()
+    conf, image_id, flavor_name = fill_state(state)
+    fake_cloud = FakeCloud(state, latency)
+    before = count_objects(state)
+    pool = shared_vlans or sandboxes * vlans
+    runs = [
+        Sandbox(
+            f"sandbox {i}",
+            fake_cloud,
+            conf,
+            image_id,
+            flavor_name,
+            [FIRST_VLAN + (i * vlans + j) % pool for j in range(vlans)],
+            apps,
+            logger,
+        )
+        for i in range(sandboxes)
+    ]
+
+    locks_before = get_lock_stats()
+    start = time.perf_counter()
+    with ft.ThreadPoolExecutor(sandboxes, thread_name_prefix="sandbox") as executor:
+        list(executor.map(Sandbox.run, runs))
+    duration = time.perf_counter() - start
+    locks = {
+        name: stats - locks_before.get(name, LockStats())
+        for name, stats in sorted(get_lock_stats().items())
+    }
+    latencies: dict[str, list[float]] = defaultdict(list)
+    failures: Counter = Counter()
+    for sandbox in runs:
+        for command, values in sandbox.latencies.items():
+            latencies[command].extend(values)
+        failures.update(sandbox.failures)
+
+    for error, count in failures.most_common(3):
+        LOGGER.warning(f"{sandboxes} sandboxes: {count} x {error}")
+    after = count_objects(state)
+    return LoadResult(
+        sandboxes,
+        duration,
+        dict(latencies),
+        failures,
+        {name: stats for name, stats in locks.items() if stats.acquisitions},
+        find_cidr_collisions(state),
+        find_vlan_collisions(state),
+        {
+            kind: after[kind] - before[kind]
+            for kind in after
+            if after[kind] > before[kind]
+        },
+    )
+
+
+def run(
+    sandboxes: Sequence[int] = (1, 8, 32),
+    apps: int = 2,
+    vlans: int = 2,
+    shared_vlans: int = 0,
+    latency: dict[str, Latency] | None = None,
+    logger: logging.Logger | None = None,
+) -> list[LoadResult]:
+    return [run_level(n, apps, vlans, shared_vlans, latency, logger) for n in sandboxes]
+
+
+def _print_report(results: list[LoadResult]) -> None:
+    header = f"{'sandboxes':>10}{'commands':>10}{'errors':>8}{'cmd/s':>9}"
+    header += "".join(f"{c + ' p99':>18}" for c in COMMANDS)
+    print(header)  # noqa: T201
+    for r in results:
+        print(  # noqa: T201
+            f"{r.sandboxes:>10}{r.commands:>10}{r.errors:>8}{r.throughput:>9.2f}"
+            + "".join(f"{r.percentile(99, c) * 1000:>15.1f} ms" for c in COMMANDS)
+        )
+        for name, stats in r.locks.items():
+            if stats.contentions:
+                print(f"{'':>10}lock '{name}': {stats}")  # noqa: T201
+        if r.cidr_collisions:
+            print(f"{'':>10}CIDR collisions: {r.cidr_collisions}")  # noqa: T201
+        if r.vlan_collisions:
+            print(f"{'':>10}VLAN collisions: {r.vlan_collisions}")  # noqa: T201
+        if r.leftovers:
+            print(f"{'':>10}left in the cloud: {r.leftovers}")  # noqa: T201
+        for error, count in r.failures.most_common(3):
+            print(f"{'':>10}{count} x {error}")  # noqa: T201
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sandboxes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--apps", type=int, default=2, help="apps per sandbox")
+    parser.add_argument("--vlans", type=int, default=2, help="VLANs per sandbox")
+    parser.add_argument(
+        "--shared-vlans", type=int, default=0, help="VLAN pool shared by sandboxes"
+    )
+    parser.add_argument("--latency", type=float, default=10, help="ms per call")
+    parser.add_argument("--jitter", type=float, default=2, help="ms, std deviation")
+    parser.add_argument(
+        "--method-latency",
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("METHOD", "MS"),
+        help="e.g. 'neutron create_port' 200 or nova 50",
+    )
+    parser.add_argument("--json", help="save results to the file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="shell logs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    if not args.verbose:  # failed commands are summarized in the report
+        logging.getLogger("load_sandboxes.shell").setLevel(logging.CRITICAL)
+    default_latency = Latency(args.latency / 1000, args.jitter / 1000)
+    latency = {service: default_latency for service in ("nova", "neutron", "glance")}
+    latency.update({key: Latency(float(ms) / 1000) for key, ms in args.method_latency})
+
+    results = run(args.sandboxes, args.apps, args.vlans, args.shared_vlans, latency)
+    _print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([r.to_dict() for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
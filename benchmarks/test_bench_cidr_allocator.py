@@ -0,0 +1,59 @@
+import timeit
+
+import pytest
+
+from benchmarks.bench_cidr_allocator import (
+    allocator_first_free_subnet,
+    get_used_cidrs,
+    legacy_first_free_subnet,
+)
+
+from cloudshell.cp.openstack.services.cidr_allocator import CidrAllocator
+
+SIZES = (10, 100, 1000)
+# the legacy search takes about a second for 1000 subnets
+LEGACY_SIZES = (10, 100)
+# the allocator is about 10 times faster for 100 subnets, the gate has a margin
+MIN_SPEEDUP = 3
+
+
+@pytest.mark.parametrize("count", LEGACY_SIZES)
+def test_legacy_first_free_subnet(benchmark, count):
+    used = get_used_cidrs(count)
+
+    benchmark(legacy_first_free_subnet, used)
+
+
+@pytest.mark.parametrize("count", SIZES)
+def test_allocator_sync_and_find_free(benchmark, count):
+    used = get_used_cidrs(count)
+
+    def find_free():
+        allocator = CidrAllocator()
+        allocator.sync(used)
+        return allocator.find_free()
+
+    assert benchmark(find_free) == legacy_first_free_subnet(used)
+
+
+@pytest.mark.parametrize("count", SIZES)
+def test_allocator_incremental_sync(benchmark, count):
+    used = get_used_cidrs(count)
+    allocator = CidrAllocator()
+    allocator.sync(used)
+    changed = used | {"192.168.0.0/24"}
+
+    benchmark(lambda: (allocator.sync(changed), allocator.find_free()))
+
+
+def test_allocator_is_faster_than_legacy():
+    # both are timed in the same run, so the gate doesn't depend on the machine
+    used = get_used_cidrs(100)
+
+    def best_time(func) -> float:
+        return min(timeit.repeat(lambda: func(used), number=5, repeat=3))
+
+    legacy = best_time(legacy_first_free_subnet)
+    allocator = best_time(allocator_first_free_subnet)
+
+    assert legacy / allocator >= MIN_SPEEDUP
@@ -0,0 +1,30 @@
+from benchmarks.bench_flows import FLOWS, run
+
+from tests.openstack_standin import ErrorRate, Latency
+
+
+def test_flows_against_standin():
+    results = run(FLOWS, concurrency=(1, 2), operations=2, latency={})
+
+    assert [(r.flow, r.concurrency) for r in results] == [
+        (flow, workers) for flow in FLOWS for workers in (1, 2)
+    ]
+    for result in results:
+        assert result.errors == 0, result.flow
+        assert len(result.latencies) == 2
+        assert result.calls_per_op("nova") > 0
+        assert result.percentile(50) <= result.percentile(99)
+
+
+def test_injected_latency_and_errors():
+    results = run(
+        ["vm_details"],
+        concurrency=(1,),
+        operations=4,
+        latency={"nova GET /servers/{id}": Latency(0.05)},
+        errors={"neutron": ErrorRate(1.0)},
+    )
+
+    assert results[0].errors == 4
+    assert results[0].calls["nova GET /servers/{id}"] == 4
+    assert results[0].duration >= 4 * 0.05
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import attr
+import pytest
+
+from cloudshell.cp.openstack.os_api.models import Network, Port, Subnet
+from cloudshell.cp.openstack.os_api.services.vm_details_provider import create
+from cloudshell.cp.openstack.utils.instance_helpers import get_ip_index
+
+LISTING_SIZE = 10_000
+NICS = 64
+
+
+def _get_networks(count: int) -> list[dict]:
+    return [
+        {
+            "id": f"net-{i}",
+            "name": f"network {i}",
+            "provider:network_type": "vlan",
+            "provider:segmentation_id": i % 4096,
+            "router:external": False,
+        }
+        for i in range(count)
+    ]
+
+
+def _get_subnets(count: int) -> list[dict]:
+    return [
+        {
+            "id": f"subnet-{i}",
+            "name": f"subnet {i}",
+            "network_id": f"net-{i}",
+            "ip_version": 4,
+            "cidr": f"10.{i // 256 % 256}.{i % 256}.0/24",
+            "gateway_ip": f"10.{i // 256 % 256}.{i % 256}.1",
+            "allocation_pools": [
+                {
+                    "start": f"10.{i // 256 % 256}.{i % 256}.2",
+                    "end": f"10.{i // 256 % 256}.{i % 256}.254",
+                }
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def _get_ports(count: int) -> list[dict]:
+    return [
+        {
+            "id": f"port-{i}",
+            "name": f"port {i}",
+            "network_id": f"net-{i % 100}",
+            "mac_address": f"fa:16:3e:00:{i // 256 % 256:02x}:{i % 256:02x}",
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    ("model", "get_listing"),
+    ((Port, _get_ports), (Network, _get_networks), (Subnet, _get_subnets)),
+    ids=("Port", "Network", "Subnet"),
+)
+def test_from_dict(benchmark, model, get_listing):
+    listing = get_listing(LISTING_SIZE)
+
+    objects = benchmark(lambda: list(map(model.from_dict, listing)))
+
+    assert len(objects) == LISTING_SIZE
+
+
+def _get_mac(i: int) -> str:
+    return f"fa:16:3e:00:00:{i:02x}"
+
+
+def _get_addresses(nics: int) -> dict[str, list[dict]]:
+    addresses = {}
+    for i in range(nics):
+        mac = _get_mac(i)
+        addresses[f"net-{i}"] = [
+            {
+                "OS-EXT-IPS-MAC:mac_addr": mac,
+                "OS-EXT-IPS:type": "fixed",
+                "version": 4,
+                "addr": f"192.168.{i}.10",
+            },
+            {
+                "OS-EXT-IPS-MAC:mac_addr": mac,
+                "OS-EXT-IPS:type": "fixed",
+                "version": 6,
+                "addr": f"fd00::{i:x}:10",
+            },
+            {
+                "OS-EXT-IPS-MAC:mac_addr": mac,
+                "OS-EXT-IPS:type": "floating",
+                "version": 4,
+                "addr": f"172.16.{i}.10",
+            },
+        ]
+    return addresses
+
+
+@attr.s(auto_attribs=True)
+class _NovaServer:
+    addresses: dict[str, list[dict]]
+
+
+def test_get_ip_index(benchmark):
+    server = _NovaServer(_get_addresses(NICS))
+
+    index = benchmark(get_ip_index, server)
+
+    assert index[_get_mac(1)].floating == "172.16.1.10"
+
+
+@attr.s(auto_attribs=True)
+class _Named:
+    name: str
+
+
+@attr.s(auto_attribs=True)
+class _Flavor:
+    name: str = "m1.large"
+    vcpus: int = 4
+    ram_mb: int = 8192
+    disk_gb: int = 80
+
+
+@attr.s(auto_attribs=True)
+class _Interface:
+    network_id: str
+    mac_address: str
+    fixed_ip: str
+    floating_ip: str | None
+    network: _Named
+
+
+@attr.s(auto_attribs=True)
+class _Instance:
+    interfaces: list[_Interface]
+    name: str = "instance"
+    image: _Named = _Named("ubuntu")
+    flavor: _Flavor = _Flavor()
+    available_zone: str = "nova"
+
+
+def test_vm_details_provider_create(benchmark):
+    interfaces = [
+        _Interface(f"net-{i}", _get_mac(i), f"192.168.{i}.10", None, _Named("net"))
+        for i in range(NICS)
+    ]
+    instance = _Instance(interfaces)
+
+    details = benchmark(create, instance, "net-10")
+
+    assert details.vmNetworkData[0].networkId == "net-10"
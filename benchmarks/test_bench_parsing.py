@@ -0,0 +1,37 @@
+from cloudshell.cp.openstack.models.connectivity_models import SubnetCidrData
+from cloudshell.cp.openstack.models.deploy_app import (
+    ResourceInboundPortsRO,
+    SecurityGroupRule,
+)
+
+RULES = [
+    "22",
+    "udp:4500",
+    "10.0.0.0/8:8000-8080",
+    "192.168.1.0/24:tcp:443",
+] * 250
+
+
+def test_subnet_cidr_data_from_str(benchmark):
+    data = benchmark(
+        SubnetCidrData.from_str, "10.1.2.0/24;10.1.2.1;10.1.2.10-10.1.2.200"
+    )
+
+    assert str(data.gateway) == "10.1.2.1"
+
+
+def test_security_group_rules_from_str(benchmark):
+    rules = benchmark(lambda: list(map(SecurityGroupRule.from_str, RULES)))
+
+    assert len(rules) == len(RULES)
+
+
+def test_resource_inbound_ports(benchmark):
+    class DeployApp:
+        DEPLOYMENT_PATH = "DP"
+        attributes = {"DP.Inbound Ports": ";".join(RULES)}
+        inbound_ports = ResourceInboundPortsRO("Inbound Ports")
+
+    rules = benchmark(lambda: DeployApp().inbound_ports)
+
+    assert len(rules) == len(RULES)
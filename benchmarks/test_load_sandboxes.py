@@ -0,0 +1,43 @@
+from benchmarks.fake_clients import FakeCloud
+from benchmarks.load_sandboxes import (
+    COMMANDS,
+    find_cidr_collisions,
+    find_vlan_collisions,
+    run_level,
+)
+
+from tests.openstack_standin import Latency, OpenStackState
+
+
+def test_sandboxes_with_shared_vlans():
+    result = run_level(3, apps=1, vlans=2, shared_vlans=2, latency={})
+
+    assert result.errors == 0, result.failures
+    assert set(result.latencies) == set(COMMANDS)
+    # deploy, set and remove VLANs, power, VM details and delete
+    assert result.commands == 3 * 6
+    assert result.locks["VLAN network"].acquisitions
+    assert not result.cidr_collisions
+    assert not result.vlan_collisions
+    assert not result.leftovers
+
+
+def test_fake_cloud_latency_and_calls():
+    cloud = FakeCloud(latency={"neutron list_ports": Latency(0.01)})
+    api = cloud.connect(None)
+
+    assert api._neutron.list_ports(device_id=["vm"]) == {"ports": []}
+    assert cloud.calls == {"neutron list_ports": 1}
+
+
+def test_find_collisions():
+    state = OpenStackState()
+    for vlan_id, cidr in ((100, "10.0.0.0/24"), (101, "10.0.0.0/23")):
+        net = state.create_neutron(
+            "network", {"name": "net", "provider:segmentation_id": vlan_id}
+        )
+        state.create_neutron("subnet", {"network_id": net["id"], "cidr": cidr})
+    state.create_neutron("subnet", {"network_id": net["id"], "cidr": "10.1.0.0/24"})
+
+    assert find_cidr_collisions(state) == [("10.0.0.0/24", "10.0.0.0/23")]
+    assert find_vlan_collisions(state) == [101]
@@ -139,8 +139,14 @@ class FloatingIpNotFound(NetworkException):
 
 
 class SecurityGroupNotFound(NetworkException):
-    def __init__(self, *, id_: str | None = None):
-        super().__init__(f"Security Group with id '{id_}' not found")
+    def __init__(self, *, id_: str | None = None, name: str | None = None):
+        assert id_ or name
+        if id_:
+            msg = f"Security Group with id '{id_}' not found"
+        else:
+            msg = f"Security Group with name '{name}' not found"
+
+        super().__init__(msg)
 
 
 class NotSupportedConsoleType(OSBaseException):
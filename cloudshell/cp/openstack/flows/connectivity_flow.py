@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+from concurrent import futures as ft
+from contextvars import copy_context
+from functools import wraps
 from logging import Logger
+from threading import BoundedSemaphore
+from typing import Callable, Collection
 
 from cloudshell.shell.flows.connectivity.basic_flow import AbstractConnectivityFlow
 from cloudshell.shell.flows.connectivity.models.connectivity_model import (
@@ -9,6 +14,7 @@ from cloudshell.shell.flows.connectivity.models.connectivity_model import (
 )
 from cloudshell.shell.flows.connectivity.models.driver_response import (
     ConnectivityActionResult,
+    DriverResponseRoot,
 )
 from cloudshell.shell.flows.connectivity.parse_request_service import (
     AbstractParseConnectivityService,
@@ -17,32 +23,162 @@ from cloudshell.shell.flows.connectivity.parse_request_service import (
 from cloudshell.cp.openstack.exceptions import NetworkNotFound
 from cloudshell.cp.openstack.models.connectivity_models import OsConnectivityActionModel
 from cloudshell.cp.openstack.os_api.api import OsApi
-from cloudshell.cp.openstack.os_api.models import Network
+from cloudshell.cp.openstack.os_api.models import Instance, Interface, Network
+from cloudshell.cp.openstack.os_api.session_pool import MAX_WORKERS
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
 from cloudshell.cp.openstack.services.network_service import QVlanNetwork
 from cloudshell.cp.openstack.services.trunk_service import QTrunk
+from cloudshell.cp.openstack.utils.instrumented_lock import lock_stats_logged
+from cloudshell.cp.openstack.utils.profiler import profiled
+from cloudshell.cp.openstack.utils.tracing import propagate, traced
+
+
+def _action_worker(func: Callable) -> Callable:
+    """Run the action in the trace context of the request, max_workers at once.
+
+    The base flow runs the actions in its own pool, it isn't sized and doesn't
+    pass the context.
+    """
+
+    @wraps(func)
+    def wrapper(self: ConnectivityFlow, action: ConnectivityActionModel):
+        with self._workers:
+            return self._context.copy().run(func, self, action)
+
+    return wrapper
 
 
 class ConnectivityFlow(AbstractConnectivityFlow):
+    DEFAULT_MAX_WORKERS = MAX_WORKERS
+
     def __init__(
         self,
         resource_conf: OSResourceConfig,
         parse_connectivity_request_service: AbstractParseConnectivityService,
         logger: Logger,
         api: OsApi | None = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
     ):
         super().__init__(parse_connectivity_request_service, logger)
         self._resource_conf = resource_conf
+        self._max_workers = max_workers
+        self._workers = BoundedSemaphore(max_workers)
+        self._context = copy_context()
+        self._actions_order: list[str] = []
         self._api = api or OsApi.from_config(resource_conf, logger)
         self._q_vlan_network = QVlanNetwork(self._api, resource_conf, logger)
         self._q_trunk = QTrunk(self._api, resource_conf, logger)
 
+    @profiled("apply_connectivity")
+    @traced("apply connectivity")
+    def apply_connectivity(self, request: str) -> str:
+        """Apply actions in parallel with the base flow.
+
+        Services lock only the VM, the VLAN network or the port they change, so
+        actions for different VMs and VLANs don't wait for each other. Stats of
+        the locks are logged at the end.
+        """
+        self._context = copy_context()
+        with lock_stats_logged(self._logger):
+            return super().apply_connectivity(request)
+
+    def _validate_received_actions(
+        self, actions: Collection[ConnectivityActionModel]
+    ) -> None:
+        super()._validate_received_actions(actions)
+        # results are returned in the order of the request
+        self._actions_order = [action.action_id for action in actions]
+
+    def _filter_set_actions(self, set_actions: list[ConnectivityActionModel]):
+        """Skip failed actions and connect trunks of many actions in bulk.
+
+        The trunks are connected before the base flow starts the other actions.
+        """
+        super()._filter_set_actions(set_actions)
+        trunk_actions = [a for a in set_actions if self._is_trunk(a)]
+        if len(trunk_actions) > 1:
+            for action in trunk_actions:
+                set_actions.remove(action)
+            self._wait_futures(self._set_vlans_on_trunks(trunk_actions))
+
+    def _get_result(self) -> str:
+        order = {action_id: i for i, action_id in enumerate(self._actions_order)}
+        results = sorted(
+            self._results.values(), key=lambda r: order.get(r.actionId, len(order))
+        )
+        return DriverResponseRoot.prepare_response(results).json()
+
+    @staticmethod
+    def _is_trunk(action: OsConnectivityActionModel) -> bool:
+        return action.connection_params.mode is ConnectionModeEnum.TRUNK
+
+    @_action_worker
+    @traced("set VLAN")
     def _set_vlan(self, action: OsConnectivityActionModel) -> ConnectivityActionResult:
-        action_id = action.action_id
+        instance, vlan_network = self._prepare_vlan_network(action)
+        try:
+            if self._is_trunk(action):
+                iface = self._q_trunk.connect_trunk(
+                    instance, vlan_network, action.action_id
+                )
+            else:
+                try:
+                    iface = instance.attach_network(vlan_network)
+                except Exception:
+                    instance.detach_network(vlan_network)
+                    raise
+        except Exception:
+            vlan_network.remove(raise_in_use=False)
+            raise
+        return self._get_set_vlan_result(action, iface)
+
+    @traced("set VLANs on trunks")
+    def _set_vlans_on_trunks(
+        self, actions: list[OsConnectivityActionModel]
+    ) -> dict[ft.Future, OsConnectivityActionModel]:
+        """Prepare networks in parallel and connect all trunks with bulk requests.
+
+        :return: resolved futures with results for every action
+        """
+        workers = max(1, min(self._max_workers, len(actions)))
+        with ft.ThreadPoolExecutor(max_workers=workers) as executor:
+            prepare_futures = {
+                executor.submit(propagate(self._prepare_vlan_network), action): action
+                for action in actions
+            }
+
+        futures = {}
+        prepared = []
+        for prepare_future, action in prepare_futures.items():
+            future: ft.Future = ft.Future()
+            futures[future] = action
+            if prepare_future.exception():
+                future.set_exception(prepare_future.exception())
+            else:
+                prepared.append((future, action, *prepare_future.result()))
+
+        ifaces = self._q_trunk.connect_trunks(
+            [
+                (instance, net, action.action_id)
+                for _, action, instance, net in prepared
+            ],
+            max_workers=self._max_workers,
+        )
+        for (future, action, _, vlan_network), iface in zip(prepared, ifaces):
+            if isinstance(iface, Exception):
+                vlan_network.remove(raise_in_use=False)
+                future.set_exception(iface)
+            else:
+                future.set_result(self._get_set_vlan_result(action, iface))
+        return futures
+
+    @traced("prepare VLAN network")
+    def _prepare_vlan_network(
+        self, action: OsConnectivityActionModel
+    ) -> tuple[Instance, Network]:
         vlan_id = int(action.connection_params.vlan_service_attrs.vlan_id)
         vm_uuid = action.custom_action_attrs.vm_uuid
         qnq = action.connection_params.vlan_service_attrs.qnq
-        port_mode = action.connection_params.mode
         network_id_or_name = action.connection_params.vlan_service_attrs.virtual_network
         subnet_cidr_data = action.connection_params.vlan_service_attrs.subnet_cidr
 
@@ -56,25 +192,20 @@ class ConnectivityFlow(AbstractConnectivityFlow):
             vlan_network = self._q_vlan_network.get_or_create_network(
                 vlan_id, qnq, subnet_cidr_data
             )
+        return instance, vlan_network
 
-        try:
-            if port_mode is ConnectionModeEnum.TRUNK:
-                iface = self._q_trunk.connect_trunk(instance, vlan_network, action_id)
-            else:
-                try:
-                    iface = instance.attach_network(vlan_network)
-                except Exception:
-                    instance.detach_network(vlan_network)
-                    raise
-        except Exception:
-            vlan_network.remove(raise_in_use=False)
-            raise
-
+    @staticmethod
+    def _get_set_vlan_result(
+        action: OsConnectivityActionModel, iface: Interface
+    ) -> ConnectivityActionResult:
+        vlan_id = int(action.connection_params.vlan_service_attrs.vlan_id)
         msg = f"Setting VLAN {vlan_id} successfully completed"
         return ConnectivityActionResult.success_result_vm(
             action, msg, iface.mac_address
         )
 
+    @_action_worker
+    @traced("remove VLAN")
     def _remove_vlan(self, action: ConnectivityActionModel) -> ConnectivityActionResult:
         action_id = action.action_id
         vlan_id = int(action.connection_params.vlan_service_attrs.vlan_id)
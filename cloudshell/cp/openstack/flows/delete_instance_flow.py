@@ -7,18 +7,27 @@ from cloudshell.cp.openstack.os_api.models import Instance, Interface
 from cloudshell.cp.openstack.utils.instance_helpers import (
     get_instance_security_group,
     get_mgmt_iface,
+    is_shared_security_group,
 )
+from cloudshell.cp.openstack.utils.instrumented_lock import lock_stats_logged
+from cloudshell.cp.openstack.utils.profiler import profiled
+from cloudshell.cp.openstack.utils.tracing import span, traced
 
 
+@profiled("delete_instance")
+@traced("delete instance")
 def delete_instance(api: OsApi, deployed_app: OSNovaImgDeployedApp):
-    inst = api.Instance.get(deployed_app.vmdetails.uid)
-    mgmt_iface = get_mgmt_iface(inst)
-    _remove_floating_ip(mgmt_iface)
-    _remove_security_group(inst)
-    inst.remove()
-    _remove_port_for_private_ip(deployed_app, mgmt_iface)
+    with lock_stats_logged(api.logger):
+        inst = api.Instance.get(deployed_app.vmdetails.uid)
+        mgmt_iface = get_mgmt_iface(inst)
+        _remove_floating_ip(mgmt_iface)
+        _remove_security_group(inst)
+        with span("remove instance"):
+            inst.remove()
+        _remove_pre_created_port(deployed_app, mgmt_iface)
 
 
+@traced("remove floating IP")
 def _remove_floating_ip(mgmt_iface: Interface) -> None:
     ip_address = mgmt_iface.floating_ip
     if ip_address:
@@ -27,15 +36,20 @@ def _remove_floating_ip(mgmt_iface: Interface) -> None:
             ip.remove()
 
 
+@traced("remove security group")
 def _remove_security_group(inst: Instance) -> None:
     sg = get_instance_security_group(inst)
     if sg:
         inst.remove_security_group(sg)
-        sg.remove()
+        if is_shared_security_group(sg):
+            sg.remove_if_unused()  # other instances can use it
+        else:
+            sg.remove()
 
 
-def _remove_port_for_private_ip(
+def _remove_pre_created_port(
     deployed_app: OSNovaImgDeployedApp, mgmt_iface: Interface
 ) -> None:
-    if deployed_app.private_ip:
+    # Nova removes only the ports it created
+    if deployed_app.private_ip or deployed_app.pre_create_mgmt_port:
         mgmt_iface.port.remove()
@@ -1,17 +1,42 @@
+from __future__ import annotations
+
 from logging import Logger
+from typing import Iterable
+
+import attr
 
 from cloudshell.cp.core.cancellation_manager import CancellationContextManager
 from cloudshell.cp.core.flows import AbstractDeployFlow
-from cloudshell.cp.core.request_actions import DeployVMRequestActions
+from cloudshell.cp.core.request_actions import DeployVMRequestActions, DriverResponse
 from cloudshell.cp.core.request_actions.models import Attribute, DeployAppResult
 
 from cloudshell.cp.openstack.models.deploy_app import OSNovaImgDeployApp
 from cloudshell.cp.openstack.os_api import commands
 from cloudshell.cp.openstack.os_api.api import OsApi
+from cloudshell.cp.openstack.os_api.commands.create_instance import generate_name
+from cloudshell.cp.openstack.os_api.commands.graph import Step
 from cloudshell.cp.openstack.os_api.commands.rollback import RollbackCommandsManager
-from cloudshell.cp.openstack.os_api.models import Instance, Interface
+from cloudshell.cp.openstack.os_api.models import Instance, Interface, Port
+from cloudshell.cp.openstack.os_api.models.instance import InstanceStatus
 from cloudshell.cp.openstack.os_api.services import vm_details_provider
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
+from cloudshell.cp.openstack.services.warm_pool import WarmPoolService
+from cloudshell.cp.openstack.utils.instance_helpers import (
+    get_security_group_name,
+    get_shared_security_group_name,
+)
+from cloudshell.cp.openstack.utils.instrumented_lock import lock_stats_logged
+from cloudshell.cp.openstack.utils.profiler import profiled
+from cloudshell.cp.openstack.utils.tracing import span, traced
+
+
+@attr.s(auto_attribs=True)
+class _StartedDeploy:
+    index: int
+    deploy_app: OSNovaImgDeployApp
+    rollback_manager: RollbackCommandsManager
+    command: commands.CreateInstanceCommand
+    instance: Instance
 
 
 class DeployAppFromNovaImgFlow(AbstractDeployFlow):
@@ -27,66 +52,249 @@ class DeployAppFromNovaImgFlow(AbstractDeployFlow):
         self._cancellation_manager = cancellation_manager
         self._api = os_api
         self._rollback_manager = RollbackCommandsManager(logger)
+        self._warm_pool = WarmPoolService(os_api, resource_conf, logger)
 
+    @profiled("deploy_batch")
+    def deploy_batch(
+        self, request_actions_list: Iterable[DeployVMRequestActions]
+    ) -> list[str]:
+        """Deploy many apps at once, return a driver response for every app."""
+        request_actions_list = list(request_actions_list)
+        with lock_stats_logged(self._logger):
+            deploy_app_results = self._deploy_batch(request_actions_list)
+
+        responses = []
+        for request_actions, deploy_app_result in zip(
+            request_actions_list, deploy_app_results
+        ):
+            connect_to_subnet_results = self._prepare_connect_to_subnet_results(
+                request_actions=request_actions
+            )
+            json_data = DriverResponse(
+                [deploy_app_result, *connect_to_subnet_results]
+            ).to_driver_response_json()
+            self._logger.debug(f"Deploy details: {json_data}")
+            responses.append(json_data)
+        return responses
+
+    @profiled("deploy")
     def _deploy(self, request_actions: DeployVMRequestActions) -> DeployAppResult:
         self._logger.info("Start Deploy Operation")
         deploy_app: OSNovaImgDeployApp = request_actions.deploy_app
         try:
-            with self._rollback_manager:
-                instance = self._start_instance(deploy_app)
-                mgmt_iface = next(instance.interfaces)  # we have one iface on deploy
-                if deploy_app.add_floating_ip:
-                    floating_ip = self._create_floating_ip(deploy_app, mgmt_iface)
+            with lock_stats_logged(self._logger), span(
+                "deploy", app_name=deploy_app.app_name
+            ), self._rollback_manager:
+                command = self._get_create_instance_command(
+                    deploy_app, self._rollback_manager
+                )
+                graph = commands.CommandGraph()
+                if command.mgmt_port:
+                    # the floating IP doesn't wait for the instance to be active
+                    mgmt_port = graph.add(command.mgmt_port.execute)
+                    instance = graph.add(command.execute, mgmt_port)
                 else:
-                    floating_ip = ""
-                if deploy_app.inbound_ports:
-                    self._add_security_group(deploy_app, instance)
+                    instance = graph.add(command.execute)
+                    mgmt_port = graph.add(lambda: command.mgmt_iface.port, instance)
+                result = self._prepare_instance(
+                    graph,
+                    deploy_app,
+                    command,
+                    instance,
+                    mgmt_port,
+                    self._rollback_manager,
+                )
+        except Exception as e:
+            result = self._get_failed_result(deploy_app, e)
+        return result
+
+    @traced("deploy batch")
+    def _deploy_batch(
+        self, request_actions_list: list[DeployVMRequestActions]
+    ) -> list[DeployAppResult]:
+        """Start all instances first and then wait for all of them together.
 
-                vm_details_data = vm_details_provider.create(
-                    instance, self._resource_conf.os_mgmt_net_id
+        Every app has its own rollback manager so a failed app doesn't affect
+        the others.
+        """
+        self._logger.info(f"Start Batch Deploy Operation: {len(request_actions_list)}")
+        results: list[DeployAppResult | None] = [None] * len(request_actions_list)
+        started = []
+        for i, request_actions in enumerate(request_actions_list):
+            deploy_app: OSNovaImgDeployApp = request_actions.deploy_app
+            rollback_manager = RollbackCommandsManager(self._logger)
+            command = self._get_create_instance_command(
+                deploy_app, rollback_manager, wait_for_active=False
+            )
+            try:
+                with span("deploy", app_name=deploy_app.app_name), rollback_manager:
+                    if command.mgmt_port:
+                        command.mgmt_port.execute()
+                    instance = command.execute()
+            except Exception as e:
+                results[i] = self._get_failed_result(deploy_app, e)
+            else:
+                started.append(
+                    _StartedDeploy(i, deploy_app, rollback_manager, command, instance)
                 )
-                result = DeployAppResult(
-                    actionId=deploy_app.actionId,
-                    success=True,
-                    vmUuid=instance.id,
-                    vmName=instance.name,
-                    deployedAppAddress=mgmt_iface.fixed_ip,
-                    deployedAppAttributes=[Attribute("Public IP", floating_ip)],
-                    vmDetailsData=vm_details_data,
+
+        try:
+            with span("wait for active", instances=len(started)):
+                errors = self._api.Instance.wait_for_status_many(
+                    [deploy.instance for deploy in started],
+                    InstanceStatus.ACTIVE,
+                    cancellation_manager=self._cancellation_manager,
                 )
         except Exception as e:
-            self._logger.exception("Error Deploying")
-            result = DeployAppResult(
-                actionId=deploy_app.actionId, success=False, errorMessage=str(e)
+            errors = [e] * len(started)
+
+        for deploy, error in zip(started, errors):
+            try:
+                with span(
+                    "prepare instance", app_name=deploy.deploy_app.app_name
+                ), deploy.rollback_manager:
+                    if error:
+                        raise error
+                    graph = commands.CommandGraph()
+                    instance = graph.add(deploy.command.complete)
+                    mgmt_port = graph.add(
+                        lambda: deploy.command.mgmt_iface.port, instance
+                    )
+                    result = self._prepare_instance(
+                        graph,
+                        deploy.deploy_app,
+                        deploy.command,
+                        instance,
+                        mgmt_port,
+                        deploy.rollback_manager,
+                    )
+            except Exception as e:
+                result = self._get_failed_result(deploy.deploy_app, e)
+            results[deploy.index] = result
+        return results  # type: ignore
+
+    def _prepare_instance(
+        self,
+        graph: commands.CommandGraph,
+        deploy_app: OSNovaImgDeployApp,
+        command: commands.CreateInstanceCommand,
+        instance_step: Step,
+        mgmt_port_step: Step,
+        rollback_manager: RollbackCommandsManager,
+    ) -> DeployAppResult:
+        """Run the graph with the steps that follow the instance.
+
+        The floating IP is created as soon as the mgmt port is known.
+        """
+        floating_ip_step = None
+        if deploy_app.add_floating_ip:
+            floating_ip_step = graph.add(
+                lambda: self._create_floating_ip(
+                    deploy_app, mgmt_port_step.result, rollback_manager
+                ),
+                mgmt_port_step,
             )
-        return result
+            # VM details should show the floating IP
+            graph.add(
+                lambda: instance_step.result.refresh(), floating_ip_step, instance_step
+            )
+        graph.run()
+        instance: Instance = instance_step.result
+        mgmt_iface: Interface = command.mgmt_iface
+        floating_ip = floating_ip_step.result if floating_ip_step else ""
+
+        with span("get VM details"):
+            # we have one iface on deploy
+            vm_details_data = vm_details_provider.create(
+                instance, self._resource_conf.os_mgmt_net_id, [mgmt_iface]
+            )
+        return DeployAppResult(
+            actionId=deploy_app.actionId,
+            success=True,
+            vmUuid=instance.id,
+            vmName=instance.name,
+            deployedAppAddress=mgmt_iface.fixed_ip,
+            deployedAppAttributes=[Attribute("Public IP", floating_ip)],
+            vmDetailsData=vm_details_data,
+        )
+
+    def _get_failed_result(
+        self, deploy_app: OSNovaImgDeployApp, e: Exception
+    ) -> DeployAppResult:
+        self._logger.exception("Error Deploying")
+        return DeployAppResult(
+            actionId=deploy_app.actionId, success=False, errorMessage=str(e)
+        )
 
-    def _start_instance(self, deploy_app: OSNovaImgDeployApp) -> Instance:
+    def _get_create_instance_command(
+        self,
+        deploy_app: OSNovaImgDeployApp,
+        rollback_manager: RollbackCommandsManager,
+        wait_for_active: bool = True,
+    ) -> commands.CreateInstanceCommand:
+        name = generate_name(deploy_app.app_name)
+        mgmt_port = security_group = None
+        if deploy_app.inbound_ports:
+            # registered before the port and the instance to be removed after
+            security_group = self._get_security_group_command(
+                deploy_app, name, rollback_manager
+            )
+        if deploy_app.pre_create_mgmt_port:
+            # Nova adds the groups at boot only to the ports it creates
+            mgmt_port = commands.CreateMgmtPort(
+                rollback_manager,
+                self._cancellation_manager,
+                self._api,
+                deploy_app,
+                self._resource_conf,
+                security_group=security_group,
+            )
+        warm_pool = None
+        if self._warm_pool.is_suitable(deploy_app):
+            warm_pool = self._warm_pool
         return commands.CreateInstanceCommand(
-            self._rollback_manager,
+            rollback_manager,
             self._cancellation_manager,
             self._api,
             deploy_app,
             self._resource_conf,
-        ).execute()
+            wait_for_active=wait_for_active,
+            mgmt_port=mgmt_port,
+            security_group=None if mgmt_port else security_group,
+            name=name,
+            warm_pool=warm_pool,
+        )
 
     def _create_floating_ip(
-        self, deploy_app: OSNovaImgDeployApp, iface: Interface
+        self,
+        deploy_app: OSNovaImgDeployApp,
+        port: Port,
+        rollback_manager: RollbackCommandsManager,
     ) -> str:
         return commands.CreateFloatingIP(
-            self._rollback_manager,
+            rollback_manager,
             self._cancellation_manager,
             self._api,
             self._resource_conf,
             deploy_app,
-            iface,
+            port,
         ).execute()
 
-    def _add_security_group(self, deploy_app: OSNovaImgDeployApp, instance: Instance):
+    def _get_security_group_command(
+        self,
+        deploy_app: OSNovaImgDeployApp,
+        instance_name: str,
+        rollback_manager: RollbackCommandsManager,
+    ) -> commands.CreateSecurityGroup:
+        if deploy_app.shared_security_group:
+            name = get_shared_security_group_name(deploy_app.inbound_ports)
+        else:
+            name = get_security_group_name(instance_name)
         return commands.CreateSecurityGroup(
-            self._rollback_manager,
+            rollback_manager,
             self._cancellation_manager,
             self._api,
             deploy_app,
-            instance,
-        ).execute()
+            name,
+            shared=deploy_app.shared_security_group,
+        )
@@ -4,6 +4,7 @@ import attr
 
 from cloudshell.cp.openstack.models import OSNovaImgDeployedApp
 from cloudshell.cp.openstack.os_api.api import OsApi
+from cloudshell.cp.openstack.utils.instrumented_lock import lock_stats_logged
 
 
 @attr.s(auto_attribs=True, slots=True)
@@ -13,7 +14,9 @@ class PowerFlow:
     _logger: Logger
 
     def power_on(self):
-        self._api.Instance.get(self._deployed_app.vmdetails.uid).power_on()
+        with lock_stats_logged(self._logger):
+            self._api.Instance.get(self._deployed_app.vmdetails.uid).power_on()
 
     def power_off(self):
-        self._api.Instance.get(self._deployed_app.vmdetails.uid).power_off()
+        with lock_stats_logged(self._logger):
+            self._api.Instance.get(self._deployed_app.vmdetails.uid).power_off()
@@ -2,18 +2,21 @@ from cloudshell.cp.openstack.models import OSNovaImgDeployedApp
 from cloudshell.cp.openstack.os_api.api import OsApi
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
 from cloudshell.cp.openstack.utils.instance_helpers import get_mgmt_iface
+from cloudshell.cp.openstack.utils.instrumented_lock import lock_stats_logged
+from cloudshell.cp.openstack.utils.profiler import profiled
 
 
+@profiled("refresh_ip")
 def refresh_ip(
     api: OsApi,
     deployed_app: OSNovaImgDeployedApp,
     resource_conf: OSResourceConfig,
 ):
-    instance = api.Instance.get(deployed_app.vmdetails.uid)
-    mgmt_iface = get_mgmt_iface(instance)
-
-    new_private_ip = mgmt_iface.fixed_ip
-    new_public_ip = mgmt_iface.floating_ip
+    with lock_stats_logged(api.logger):
+        instance = api.Instance.get(deployed_app.vmdetails.uid)
+        mgmt_iface = get_mgmt_iface(instance)
+        new_private_ip = mgmt_iface.fixed_ip
+        new_public_ip = mgmt_iface.floating_ip
 
     if new_private_ip != deployed_app.private_ip:
         deployed_app.update_private_ip(deployed_app.name, new_private_ip)
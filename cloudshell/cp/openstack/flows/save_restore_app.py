@@ -24,6 +24,8 @@ from cloudshell.cp.openstack.os_api.api import OsApi
 from cloudshell.cp.openstack.os_api.models import Instance
 from cloudshell.cp.openstack.os_api.models.instance import InstanceStatus
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
+from cloudshell.cp.openstack.utils.profiler import profiled
+from cloudshell.cp.openstack.utils.tracing import span, traced
 
 
 @attr.s(auto_attribs=True, slots=True)
@@ -37,16 +39,19 @@ class SaveRestoreAppFlow:
     def _connect_to_api(self):
         return OsApi.from_config(self._resource_conf, self._logger)
 
+    @profiled("save_apps")
     def save_apps(self, save_actions: Iterable[SaveApp]) -> str:
         results = list(map(self._save_app, save_actions))
         return DriverResponse(results).to_driver_response_json()
 
+    @profiled("delete_saved_apps")
     def delete_saved_apps(
         self, delete_saved_app_actions: Iterable[DeleteSavedApp]
     ) -> str:
         results = list(map(self._delete_saved_app, delete_saved_app_actions))
         return DriverResponse(results).to_driver_response_json()
 
+    @traced("save app")
     def _save_app(self, save_action: SaveApp) -> SaveAppResult:
         self._logger.info(f"Starting save app {save_action.actionParams.sourceAppName}")
         self._logger.debug(f"Save action model: {save_action}")
@@ -62,7 +67,8 @@ class SaveRestoreAppFlow:
 
         with self._behavior_during_save(instance, attrs):
             snapshot_name = f"Clone of {instance.name[:64]}"
-            snapshot_id = instance.create_snapshot(snapshot_name)
+            with span("create snapshot"):
+                snapshot_id = instance.create_snapshot(snapshot_name)
 
         return SaveAppResult(
             save_action.actionId,
@@ -71,6 +77,7 @@ class SaveRestoreAppFlow:
             saveDeploymentModel=OS_FROM_GLANCE_IMAGE_DEPLOYMENT_PATH,
         )
 
+    @traced("delete saved app")
     def _delete_saved_app(self, action: DeleteSavedApp) -> DeleteSavedAppResult:
         for artifact in action.actionParams.artifacts:
             snapshot_id = artifact.artifactRef
@@ -84,10 +91,12 @@ class SaveRestoreAppFlow:
         power_state = None
         if self._should_power_off(deployment_attrs):
             power_state = instance.status
-            instance.power_off()
+            with span("power off"):
+                instance.power_off()
         yield
         if power_state is InstanceStatus.ACTIVE:
-            instance.power_on()
+            with span("power on"):
+                instance.power_on()
 
     def _should_power_off(self, deployment_attrs) -> bool:
         if deployment_attrs[AppAttrName.behavior_during_save] == "Inherited":
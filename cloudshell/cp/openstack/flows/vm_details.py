@@ -1,13 +1,19 @@
+from __future__ import annotations
+
 from logging import Logger
+from typing import Iterable
 
 from cloudshell.cp.core.cancellation_manager import CancellationContextManager
 from cloudshell.cp.core.flows.vm_details import AbstractVMDetailsFlow
+from cloudshell.cp.core.request_actions import GetVMDetailsRequestActions
 from cloudshell.cp.core.request_actions.models import VmDetailsData
 
 from cloudshell.cp.openstack.models import OSNovaImgDeployedApp
 from cloudshell.cp.openstack.os_api.api import OsApi
+from cloudshell.cp.openstack.os_api.models import Instance, Interface, Port
 from cloudshell.cp.openstack.os_api.services import vm_details_provider
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
+from cloudshell.cp.openstack.utils.profiler import profiled
 
 
 class GetVMDetailsFlow(AbstractVMDetailsFlow):
@@ -22,12 +28,55 @@ class GetVMDetailsFlow(AbstractVMDetailsFlow):
         self._resource_config = resource_config
         self._cancellation_manager = cancellation_manager
         self._api = os_api
+        self._instances: dict[str, Instance] = {}
+        self._interfaces: dict[str, list[Interface]] = {}
+
+    @profiled("get_vm_details")
+    def get_vm_details(self, request_actions: GetVMDetailsRequestActions) -> str:
+        # apps share networks, images and flavors, get each of them once
+        with self._api.cached_requests():
+            deployed_apps = request_actions.deployed_apps
+            if len(deployed_apps) > 1:
+                self._prefetch([app.vmdetails.uid for app in deployed_apps])
+            try:
+                return super().get_vm_details(request_actions)
+            finally:
+                self._instances.clear()
+                self._interfaces.clear()
+
+    def _prefetch(self, ids: Iterable[str]) -> None:
+        """Get instances, their ports and networks with one request for each."""
+        self._instances = self._api.Instance.get_many(ids)
+        ports = self._api.Port.find_by_device_ids(self._instances)
+        self._api.Network.get_many(
+            {port.network_id for inst_ports in ports.values() for port in inst_ports}
+        )
+        self._interfaces = {
+            id_: self._get_interfaces(inst, ports[id_])
+            for id_, inst in self._instances.items()
+        }
+
+    def _get_interfaces(self, instance: Instance, ports: list[Port]) -> list[Interface]:
+        """Interfaces in the order of the instance's addresses in Nova.
+
+        Ports without a fixed IP aren't in the addresses, they follow the
+        others in Neutron's order as Nova lists all attached ports.
+        """
+        ports_by_mac = {port.mac_address: port for port in ports}
+        macs = [mac for mac in instance.ip_index if mac in ports_by_mac]
+        macs.extend(mac for mac in ports_by_mac if mac not in instance.ip_index)
+        return [
+            self._api.Interface.from_port(instance, ports_by_mac[mac]) for mac in macs
+        ]
 
     def _get_vm_details(self, deployed_app: OSNovaImgDeployedApp) -> VmDetailsData:
-        instance = self._api.Instance.get(deployed_app.vmdetails.uid)
+        id_ = deployed_app.vmdetails.uid
+        instance = self._instances.get(id_) or self._api.Instance.get(id_)
         try:
             result = vm_details_provider.create(
-                instance, self._resource_config.os_mgmt_net_id
+                instance,
+                self._resource_config.os_mgmt_net_id,
+                self._interfaces.get(id_),
             )
         except Exception as e:
             self._logger.exception(f"Error getting VM details for {deployed_app.name}")
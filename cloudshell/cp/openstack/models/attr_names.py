@@ -10,3 +10,5 @@ class AppAttrName:
     inbound_ports = "Inbound Ports"
     behavior_during_save = "Behavior during save"
     private_ip = "Private IP"
+    pre_create_mgmt_port = "Pre-create Mgmt Port"
+    shared_security_group = "Shared Security Group"
@@ -94,3 +94,9 @@ class OSNovaImgDeployApp(DeployApp):
     inbound_ports = ResourceInboundPortsRO(ATTR_NAME.inbound_ports)
     behavior_during_save = ResourceAttrRODeploymentPath(ATTR_NAME.behavior_during_save)
     private_ip = ResourceAttrRODeploymentPath(ATTR_NAME.private_ip)
+    pre_create_mgmt_port = ResourceBoolAttrRODeploymentPath(
+        ATTR_NAME.pre_create_mgmt_port
+    )
+    shared_security_group = ResourceBoolAttrRODeploymentPath(
+        ATTR_NAME.shared_security_group
+    )
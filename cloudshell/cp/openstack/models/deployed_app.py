@@ -32,3 +32,6 @@ class OSNovaImgDeployedApp(DeployedApp):
     )
     auto_udev = ResourceBoolAttrRODeploymentPath(ATTR_NAME.auto_udev)
     private_ip = ResourceAttrRODeploymentPath(ATTR_NAME.private_ip)
+    pre_create_mgmt_port = ResourceBoolAttrRODeploymentPath(
+        ATTR_NAME.pre_create_mgmt_port
+    )
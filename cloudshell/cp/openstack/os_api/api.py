@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from logging import Logger
+from typing import Generator
 
 import attr
 from glanceclient.client import Client as GlanceClient_base
 from glanceclient.v2.client import Client as GlanceClient
-from keystoneauth1.identity.v3 import Password as KeyStoneAuth
 from keystoneauth1.session import Session as KeyStoneSession
 from neutronclient.v2_0.client import Client as NeutronClient
 from novaclient.client import Client as NovaClient_base
@@ -21,6 +22,12 @@ from cloudshell.cp.openstack.os_api.models import Port as _Port
 from cloudshell.cp.openstack.os_api.models import SecurityGroup as _SecurityGroup
 from cloudshell.cp.openstack.os_api.models import Subnet as _Subnet
 from cloudshell.cp.openstack.os_api.models import Trunk as _Trunk
+from cloudshell.cp.openstack.os_api.request_cache import RequestCache
+from cloudshell.cp.openstack.os_api.services.status_watcher import (
+    InstanceStatusWatcher,
+    get_status_watcher,
+)
+from cloudshell.cp.openstack.os_api.session_pool import SESSION_POOL, create_session
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
 from cloudshell.cp.openstack.utils.cached_property import cached_property
 
@@ -30,6 +37,7 @@ class OsApi:
     API_VERSION = "2"
     _session: KeyStoneSession
     _logger: Logger
+    request_cache: RequestCache | None = attr.ib(default=None, init=False)
 
     def __str__(self) -> str:
         return f"OpenStack API '{self._session.auth.auth_url}'"
@@ -43,21 +51,24 @@ class OsApi:
         project_name: str,
         domain_name: str,
         logger: Logger,
+        use_pool: bool = True,
     ) -> OsApi:
         logger.debug("Getting OpenStack Session")
-        auth = KeyStoneAuth(
-            auth_url=controller_url,
-            username=user,
-            password=password,
-            project_name=project_name,
-            user_domain_id=domain_name,
-            project_domain_id=domain_name,
-        )
-        session = KeyStoneSession(auth=auth, verify=False)
+        if use_pool:
+            session = SESSION_POOL.get_session(
+                controller_url, user, password, project_name, domain_name
+            )
+            logger.debug(f"OpenStack Session pool stats: {SESSION_POOL.stats()}")
+        else:
+            session = create_session(
+                controller_url, user, password, project_name, domain_name
+            )
         return cls(session, logger)
 
     @classmethod
-    def from_config(cls, conf: OSResourceConfig, logger: Logger) -> OsApi:
+    def from_config(
+        cls, conf: OSResourceConfig, logger: Logger, use_pool: bool = True
+    ) -> OsApi:
         return cls.connect(
             controller_url=conf.controller_url,
             user=conf.user,
@@ -65,8 +76,36 @@ class OsApi:
             project_name=conf.os_project_name,
             domain_name=conf.os_domain_name,
             logger=logger,
+            use_pool=use_pool,
         )
 
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def project_id(self) -> str:
+        return self._session.get_project_id()
+
+    @property
+    def cache_scope(self) -> tuple[str, str, str]:
+        auth = self._session.auth
+        return auth.auth_url, auth.project_name, auth.project_domain_id
+
+    @contextmanager
+    def cached_requests(self) -> Generator[RequestCache, None, None]:
+        """Cache lookups of the objects by id and name inside the context."""
+        if self.request_cache is not None:
+            yield self.request_cache  # already enabled by the outer context
+            return
+
+        self.request_cache = RequestCache(self._logger)
+        try:
+            yield self.request_cache
+        finally:
+            self._logger.debug(f"Request cache stats: {self.request_cache.stats()}")
+            self.request_cache = None
+
     @cached_property
     def _nova(self) -> NovaClient:
         return NovaClient_base(self.API_VERSION, session=self._session, insecure=True)
@@ -79,6 +118,10 @@ class OsApi:
     def _glance(self) -> GlanceClient:
         return GlanceClient_base(self.API_VERSION, session=self._session)
 
+    @property
+    def status_watcher(self) -> InstanceStatusWatcher:
+        return get_status_watcher(self.cache_scope, self._nova, self._logger)
+
     @cached_property
     def Port(self) -> type[_Port]:
         class Port(_Port):
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Generator
+
+import attr
+
+_current_ledger: ContextVar[CallLedger | None] = ContextVar(
+    "current_ledger", default=None
+)
+
+
+@attr.s(auto_attribs=True, frozen=True, str=False)
+class ApiCall:
+    service: str
+    method: str
+    url: str
+
+    def __str__(self) -> str:
+        return f"{self.service} {self.method} {self.url}"
+
+
+@attr.s(auto_attribs=True, eq=False)
+class CallLedger:
+    """OpenStack API calls made in the context, in the order they were made.
+
+    Calls of other threads are recorded when they are started with
+    `tracing.propagate`. The status watcher has no thread, a waiting command
+    polls for all waiting instances when its thread leads, so its ledger
+    records the polls for the instances of other commands too.
+    """
+
+    parent: CallLedger | None = None
+    calls: list[ApiCall] = attr.ib(factory=list)
+    _lock: threading.Lock = attr.ib(factory=threading.Lock, repr=False)
+
+    def record(self, call: ApiCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+        if self.parent:
+            self.parent.record(call)
+
+    def count(self, service: str | None = None) -> int:
+        return sum(1 for call in self.calls if service in (None, call.service))
+
+    def by_service(self) -> Counter:
+        return Counter(call.service for call in self.calls)
+
+    def by_endpoint(self) -> Counter:
+        return Counter(map(str, self.calls))
+
+    def summary(self) -> str:
+        services = ", ".join(f"{s} {n}" for s, n in sorted(self.by_service().items()))
+        return f"{len(self.calls)} API calls" + (f": {services}" if services else "")
+
+
+@contextmanager
+def record_calls() -> Generator[CallLedger, None, None]:
+    """Record API calls made inside, a nested ledger records to the outer too."""
+    ledger = CallLedger(_current_ledger.get())
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+
+def record_call(service: str, method: str, url: str) -> None:
+    ledger = _current_ledger.get()
+    if ledger is not None:
+        ledger.record(ApiCall(service, method, url))
@@ -0,0 +1,319 @@
+"""Record OpenStack traffic to a cassette and replay it without the cloud.
+
+A cassette is a JSON Lines file, gzip-compressed when the name ends with
+".gz". The first line is a header, every other line is one request with its
+response and the time the cloud took to answer. Passwords and tokens are
+scrubbed before they are written.
+"""
+from __future__ import annotations
+
+import atexit
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import IO, Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import attr
+import requests
+from keystoneauth1.session import Session as KeyStoneSession
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_RECORD_ENV = "CP_OPENSTACK_CASSETTE_RECORD"
+CASSETTE_REPLAY_ENV = "CP_OPENSTACK_CASSETTE_REPLAY"
+CASSETTE_SPEED_ENV = "CP_OPENSTACK_CASSETTE_SPEED"
+CASSETTE_VERSION = 1
+SCRUBBED = "***"
+SECRET_HEADERS = {"x-auth-token", "x-subject-token", "authorization", "cookie"}
+SECRET_FIELDS = {"password", "token", "secret", "credential", "adminpass"}
+KEPT_RESPONSE_HEADERS = {"content-type", "location", "x-subject-token"}
+
+
+class CassetteError(requests.exceptions.ConnectionError):
+    """The cassette has no response for the request."""
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def normalize_url(url: str) -> str:
+    """URL with the query parameters sorted."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(parts._replace(query=query, fragment=""))
+
+
+def _strip_query(url: str) -> str:
+    return urlunsplit(urlsplit(url)._replace(query="", fragment=""))
+
+
+def scrub(data: Any) -> Any:
+    """Copy of the JSON data with the values of secret fields replaced."""
+    if isinstance(data, dict):
+        return {
+            key: SCRUBBED
+            if key.lower() in SECRET_FIELDS and isinstance(value, (str, int))
+            else scrub(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [scrub(value) for value in data]
+    return data
+
+
+def scrub_headers(headers: dict[str, str], keep: set[str] | None = None) -> dict:
+    return {
+        name: SCRUBBED if name.lower() in SECRET_HEADERS else value
+        for name, value in headers.items()
+        if keep is None or name.lower() in keep
+    }
+
+
+def _encode_body(body: bytes | str | None) -> dict[str, str]:
+    if not body:
+        return {}
+    if isinstance(body, str):
+        body = body.encode()
+    try:
+        data = json.loads(body)
+    except ValueError:
+        pass
+    else:
+        return {"json": scrub(data)}
+    try:
+        return {"text": body.decode()}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode()}
+
+
+def _decode_body(body: dict) -> bytes:
+    if "json" in body:
+        return json.dumps(body["json"]).encode()
+    if "text" in body:
+        return body["text"].encode()
+    if "base64" in body:
+        return base64.b64decode(body["base64"])
+    return b""
+
+
+@attr.s(auto_attribs=True, frozen=True, eq=False)
+class Interaction:
+    method: str
+    url: str
+    status: int
+    elapsed: float
+    started: float = 0.0
+    request_headers: dict = attr.ib(factory=dict)
+    request_body: dict = attr.ib(factory=dict)
+    headers: dict = attr.ib(factory=dict)
+    body: dict = attr.ib(factory=dict)
+
+    @classmethod
+    def from_response(cls, response: requests.Response, started: float) -> Interaction:
+        request = response.request
+        return cls(
+            method=request.method,
+            url=normalize_url(request.url),
+            status=response.status_code,
+            elapsed=response.elapsed.total_seconds(),
+            started=round(started, 6),
+            request_headers=scrub_headers(dict(request.headers)),
+            request_body=_encode_body(request.body),
+            headers=scrub_headers(dict(response.headers), KEPT_RESPONSE_HEADERS),
+            body=_encode_body(response.content),
+        )
+
+    def to_response(self, request: requests.PreparedRequest) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.status
+        response.reason = requests.status_codes._codes.get(self.status, ("",))[0]
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = _decode_body(self.body)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=self.elapsed)
+        response.encoding = "utf-8"
+        return response
+
+
+class CassetteRecorder:
+    """Writes interactions to the cassette, shared by the sessions.
+
+    The file stays open, so a gzip cassette is one compressed stream. It's
+    complete when the recorder is closed, at the exit of the process or when
+    the cassettes are reset. A plain cassette is flushed after every line.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._file = _open(path, "w")
+        self._flush = not path.endswith(".gz")
+        self._write(json.dumps({"version": CASSETTE_VERSION}))
+        atexit.register(self.close)
+
+    def record(self, response: requests.Response, started: float) -> None:
+        interaction = Interaction.from_response(response, started - self._start)
+        self._write(json.dumps(attr.asdict(interaction), separators=(",", ":")))
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        atexit.unregister(self.close)
+
+    def _write(self, line: str) -> None:
+        with self._lock:
+            if self._file.closed:
+                return  # a session outlived the recording
+            self._file.write(line + "\n")
+            if self._flush:
+                self._file.flush()
+
+
+class Cassette:
+    """Recorded interactions to be replayed in the recorded order.
+
+    A request gets the next response recorded for its method and URL, then for
+    the method and the URL without the query, since names with random parts
+    change the filters. The last response is repeated when they run out, as
+    polling can take more requests than it took while recording.
+    """
+
+    def __init__(self, interactions: list[Interaction]):
+        self._lock = threading.Lock()
+        self._by_url: dict[tuple, deque[Interaction]] = defaultdict(deque)
+        self._by_path: dict[tuple, deque[Interaction]] = defaultdict(deque)
+        self._last: dict[tuple, Interaction] = {}
+        for interaction in interactions:
+            method = interaction.method
+            self._by_url[method, interaction.url].append(interaction)
+            self._by_path[method, _strip_query(interaction.url)].append(interaction)
+
+    def __len__(self) -> int:
+        return sum(map(len, self._by_url.values()))
+
+    @classmethod
+    def load(cls, path: str) -> Cassette:
+        with _open(path, "r") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}")
+            return cls([Interaction(**json.loads(line)) for line in f if line])
+
+    def play(self, method: str, url: str) -> Interaction:
+        url = normalize_url(url)
+        url_key, path_key = (method, url), (method, _strip_query(url))
+        with self._lock:
+            if self._by_url[url_key]:
+                interaction = self._by_url[url_key].popleft()
+                self._by_path[path_key].remove(interaction)
+            elif self._by_path[path_key]:
+                interaction = self._by_path[path_key].popleft()
+                self._by_url[interaction.method, interaction.url].remove(interaction)
+            elif url_key in self._last or path_key in self._last:
+                return self._last.get(url_key) or self._last[path_key]
+            else:
+                raise CassetteError(f"No recorded response for {method} {url}")
+            self._last[url_key] = self._last[path_key] = interaction
+            return interaction
+
+
+class RecordingAdapter(BaseAdapter):
+    """Records the responses of the adapter that the session had mounted."""
+
+    def __init__(self, adapter: BaseAdapter, recorder: CassetteRecorder):
+        super().__init__()
+        self.adapter = adapter
+        self.recorder = recorder
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        started = time.monotonic()
+        response = self.adapter.send(request, **kwargs)
+        self.recorder.record(response, started)
+        return response
+
+    def close(self) -> None:
+        self.adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serves responses from the cassette, the speed of 0 doesn't wait."""
+
+    def __init__(self, cassette: Cassette, speed: float = 1.0):
+        super().__init__()
+        self.cassette = cassette
+        self.speed = speed
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        interaction = self.cassette.play(request.method, request.url)
+        if self.speed > 0:
+            time.sleep(interaction.elapsed / self.speed)
+        return interaction.to_response(request)
+
+    def close(self) -> None:
+        pass
+
+
+_recorders: dict[str, CassetteRecorder] = {}
+_cassettes: dict[str, Cassette] = {}
+_lock = threading.Lock()
+
+
+def _get_speed() -> float:
+    try:
+        return float(os.environ.get(CASSETTE_SPEED_ENV, 1))
+    except ValueError:
+        return 1.0
+
+
+def _mount(session: KeyStoneSession, adapter: BaseAdapter) -> None:
+    for prefix in ("http://", "https://"):
+        session.session.mount(prefix, adapter)
+
+
+def _mount_recording(session: KeyStoneSession, recorder: CassetteRecorder) -> None:
+    # the sized pools and keep-alive of the session stay as without recording
+    for prefix in ("http://", "https://"):
+        adapter = session.session.get_adapter(prefix)
+        session.session.mount(prefix, RecordingAdapter(adapter, recorder))
+
+
+def use_cassette(session: KeyStoneSession) -> KeyStoneSession:
+    """Record or replay the traffic of the session, as set in the environment.
+
+    A cassette path in CP_OPENSTACK_CASSETTE_RECORD records every request of
+    the process to it. A path in CP_OPENSTACK_CASSETTE_REPLAY replays it
+    instead of going to the cloud, CP_OPENSTACK_CASSETTE_SPEED makes the
+    replay faster, e.g. 10, or doesn't wait at all with 0.
+    """
+    record_path = os.environ.get(CASSETTE_RECORD_ENV)
+    replay_path = os.environ.get(CASSETTE_REPLAY_ENV)
+    with _lock:
+        if replay_path:
+            if replay_path not in _cassettes:
+                _cassettes[replay_path] = Cassette.load(replay_path)
+            _mount(session, ReplayAdapter(_cassettes[replay_path], _get_speed()))
+        elif record_path:
+            if record_path not in _recorders:
+                _recorders[record_path] = CassetteRecorder(record_path)
+            _mount_recording(session, _recorders[record_path])
+    return session
+
+
+def reset_cassettes() -> None:
+    """Forget the loaded cassettes, close recordings and start new ones."""
+    with _lock:
+        for recorder in _recorders.values():
+            recorder.close()
+        _recorders.clear()
+        _cassettes.clear()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable
+
+import attr
+
+from cloudshell.cp.openstack.utils.ttl_cache import TTLCache
+
+if TYPE_CHECKING:
+    from cloudshell.cp.openstack.os_api.api import OsApi
+
+# flavors, images and shell's static networks almost never change, the cache
+# is shared by all commands of the process and scoped by the cloud and project
+CATALOG_CACHE = TTLCache(maxsize=512, ttl=600)
+
+
+def catalog_lookup(key_name: str) -> Callable:
+    """Cache the result of the model classmethod in the process catalog cache.
+
+    Should be applied under the @classmethod decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(cls, key):
+            cache_key = (cls.api.cache_scope, cls.__name__, key_name, key)
+            obj = CATALOG_CACHE.get(cache_key)
+            if obj is None:
+                cls._logger.debug(f"Catalog cache miss: {cls.__name__} '{key}'")
+                obj = func(cls, key)
+                CATALOG_CACHE.set(cache_key, obj)
+            return _bind(obj, cls)
+
+        return wrapper
+
+    return decorator
+
+
+def _bind(obj: Any, cls: type) -> Any:
+    """Return a copy of the object bound to the API of the class.
+
+    The cached object can be created by another OsApi with the same scope,
+    cached properties are not copied as they can refer to that API.
+    """
+    if type(obj) is cls:
+        return obj
+    new_obj = cls.__new__(cls)
+    for field in attr.fields(type(obj)):
+        object.__setattr__(new_obj, field.name, getattr(obj, field.name))
+    return new_obj
+
+
+def invalidate_catalog(api: OsApi | None = None) -> None:
+    """Remove all cached objects or only the objects of the API scope."""
+    if api is None:
+        CATALOG_CACHE.clear()
+    else:
+        CATALOG_CACHE.invalidate_if(lambda key, _: key[0] == api.cache_scope)
+
+
+def invalidate_catalog_obj(obj: Any) -> None:
+    scope, kind = obj.api.cache_scope, type(obj).__name__
+    CATALOG_CACHE.invalidate_if(
+        lambda key, value: key[:2] == (scope, kind) and value.id == obj.id
+    )
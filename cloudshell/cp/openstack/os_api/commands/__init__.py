@@ -1,5 +1,14 @@
 from .create_floating_ip import CreateFloatingIP
 from .create_instance import CreateInstanceCommand
-from .create_security_group import CreateSecurityGroup
+from .create_mgmt_port import CreateMgmtPort
+from .create_security_group import AddSecurityGroup, CreateSecurityGroup
+from .graph import CommandGraph
 
-__all__ = ["CreateFloatingIP", "CreateInstanceCommand", "CreateSecurityGroup"]
+__all__ = [
+    "AddSecurityGroup",
+    "CommandGraph",
+    "CreateFloatingIP",
+    "CreateInstanceCommand",
+    "CreateMgmtPort",
+    "CreateSecurityGroup",
+]
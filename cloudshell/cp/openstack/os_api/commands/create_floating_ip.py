@@ -8,7 +8,7 @@ from cloudshell.cp.openstack.os_api.commands.rollback import (
     RollbackCommand,
     RollbackCommandsManager,
 )
-from cloudshell.cp.openstack.os_api.models import FloatingIp, Interface
+from cloudshell.cp.openstack.os_api.models import FloatingIp, Port
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
 
 
@@ -20,7 +20,7 @@ class CreateFloatingIP(RollbackCommand):
         os_api: OsApi,
         resource_conf: OSResourceConfig,
         deploy_app: OSNovaImgDeployApp,
-        iface: Interface,
+        port: Port,
         *args,
         **kwargs,
     ):
@@ -28,7 +28,7 @@ class CreateFloatingIP(RollbackCommand):
         self._api = os_api
         self._resource_conf = resource_conf
         self._deploy_app = deploy_app
-        self._iface = iface
+        self._port = port
         self._ip: FloatingIp | None = None
 
     def _execute(self, *args, **kwargs) -> str:
@@ -36,9 +36,9 @@ class CreateFloatingIP(RollbackCommand):
             subnet_id = self._deploy_app.floating_ip_subnet_id
         else:
             subnet_id = self._resource_conf.floating_ip_subnet_id
-        floating_subnet = self._api.Subnet.get(subnet_id)
+        floating_subnet = self._api.Subnet.get_static(subnet_id)
 
-        ip = self._api.FloatingIp.create(floating_subnet, self._iface.port)
+        ip = self._api.FloatingIp.create(floating_subnet, self._port)
         self._ip = ip
         return ip.ip_address
 
@@ -1,19 +1,41 @@
 from __future__ import annotations
 
-from ipaddress import IPv4Address, IPv4Network
+from typing import TYPE_CHECKING
 
 from cloudshell.cp.core.cancellation_manager import CancellationContextManager
-from cloudshell.cp.core.rollback import RollbackCommand, RollbackCommandsManager
 from cloudshell.cp.core.utils.name_generator import NameGenerator
 
-from cloudshell.cp.openstack.exceptions import PrivateIpIsNotInMgmtNetwork
 from cloudshell.cp.openstack.models import OSNovaImgDeployApp
 from cloudshell.cp.openstack.os_api.api import OsApi
-from cloudshell.cp.openstack.os_api.models import Instance, Network, Port
+from cloudshell.cp.openstack.os_api.commands.create_mgmt_port import (
+    CreateMgmtPort,
+    get_private_ip_subnet,
+)
+from cloudshell.cp.openstack.os_api.commands.create_security_group import (
+    CreateSecurityGroup,
+)
+from cloudshell.cp.openstack.os_api.commands.graph import CommandGraph
+from cloudshell.cp.openstack.os_api.commands.rollback import (
+    RollbackCommand,
+    RollbackCommandsManager,
+)
+from cloudshell.cp.openstack.os_api.models import (
+    Flavor,
+    Image,
+    Instance,
+    Interface,
+    Network,
+    Port,
+    SecurityGroup,
+)
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
 from cloudshell.cp.openstack.utils.instance_helpers import get_mgmt_iface_name
+from cloudshell.cp.openstack.utils.tracing import span, traced
 from cloudshell.cp.openstack.utils.udev import get_udev_rules
 
+if TYPE_CHECKING:
+    from cloudshell.cp.openstack.services.warm_pool import PoolMember, WarmPoolService
+
 generate_name = NameGenerator()
 
 
@@ -26,41 +48,137 @@ class CreateInstanceCommand(RollbackCommand):
         deploy_app: OSNovaImgDeployApp,
         resource_conf: OSResourceConfig,
         *args,
+        wait_for_active: bool = True,
+        mgmt_port: CreateMgmtPort | None = None,
+        security_group: CreateSecurityGroup | None = None,
+        name: str | None = None,
+        warm_pool: WarmPoolService | None = None,
         **kwargs,
     ):
         super().__init__(rollback_manager, cancellation_manager, *args, **kwargs)
         self._api = os_api
         self._deploy_app = deploy_app
         self._resource_conf = resource_conf
+        self._wait_for_active = wait_for_active
+        self.mgmt_port = mgmt_port
+        self.security_group = security_group
+        self._warm_pool = warm_pool
+        self._pool_member: PoolMember | None = None
         self._instance = None
+        # known before the boot, the security group is named after the instance
+        self.name = name or generate_name(deploy_app.app_name)
+        self.mgmt_iface: Interface | None = None
 
     def _execute(self, *args, **kwargs) -> Instance:
-        name = generate_name(self._deploy_app.app_name)
-        image = self._api.Image.get(self._deploy_app.image_id)
-        flavor = self._api.Flavor.find_first(self._deploy_app.instance_flavor)
-        mgmt_net = self._api.Network.get(self._resource_conf.os_mgmt_net_id)
-        port = None
-        if self._deploy_app.private_ip:
-            port = self._get_port_for_private_ip(mgmt_net)
-
-        instance = self._api.Instance.create(
-            name,
+        with span("prepare boot"):
+            graph = CommandGraph()
+            if self.security_group:
+                graph.add(self.security_group.execute)
+            if self._warm_pool:
+                # the lookups for the boot run at the same time, the miss doesn't wait
+                graph.add(self._claim_pool_member)
+            image = graph.add(lambda: self._api.Image.get(self._deploy_app.image_id))
+            flavor = graph.add(
+                lambda: self._api.Flavor.find_first(self._deploy_app.instance_flavor)
+            )
+            mgmt_net = private_ip_port = None
+            if not self.mgmt_port:
+                mgmt_net = graph.add(
+                    lambda: self._api.Network.get_static(
+                        self._resource_conf.os_mgmt_net_id
+                    )
+                )
+                if self._deploy_app.private_ip:
+                    private_ip_port = graph.add(
+                        lambda: self._get_port_for_private_ip(mgmt_net.result),
+                        mgmt_net,
+                    )
+            try:
+                graph.run()
+            except Exception:
+                if self._pool_member:
+                    # not used, so other deploys can claim it
+                    self._warm_pool.release(self._pool_member)
+                raise
+
+        if self._pool_member:
+            instance = self._instance = self._use_pool_member(self._pool_member)
+            self._release_security_group()
+            return instance
+
+        if self.mgmt_port:
+            # the port was created in the mgmt network before
+            network, port = None, self.mgmt_port.port
+        else:
+            network = mgmt_net.result
+            port = private_ip_port.result if private_ip_port else None
+        try:
+            instance = self._create_instance(image.result, flavor.result, network, port)
+        except Exception:
+            # another process removed the shared group before the boot
+            if not (self.security_group and self.security_group.refresh()):
+                raise
+            instance = self._create_instance(image.result, flavor.result, network, port)
+        self._instance = instance
+        if self._wait_for_active:
+            self._set_mgmt_iface(instance)
+            self._release_security_group()
+        return instance
+
+    def complete(self) -> Instance:
+        """Finish the instance that was started without waiting to be active."""
+        if not self.mgmt_iface:
+            self._set_mgmt_iface(self._instance)
+        self._release_security_group()
+        return self._instance
+
+    def rollback(self):
+        if isinstance(self._instance, Instance):
+            self._instance.remove(self._get_security_groups())
+
+    def _create_instance(
+        self, image: Image, flavor: Flavor, network: Network | None, port: Port | None
+    ) -> Instance:
+        return self._api.Instance.create(
+            self.name,
             image,
             flavor,
-            network=mgmt_net,
+            network=network,
             port=port,
             availability_zone=self._deploy_app.availability_zone,
             affinity_group_id=self._deploy_app.affinity_group_id,
             user_data=self._prepare_user_data(),
             cancellation_manager=self._cancellation_manager,
+            wait_for_active=self._wait_for_active,
+            security_groups=self._get_security_groups(),
         )
-        self._instance = instance
-        self._set_mgmt_iface_name(instance)
-        return instance
 
-    def rollback(self):
-        if isinstance(self._instance, Instance):
-            self._instance.remove()
+    def _release_security_group(self) -> None:
+        # the ports of the active instance use the group
+        if self.security_group:
+            self.security_group.release()
+
+    def _get_security_groups(self) -> list[SecurityGroup]:
+        if self.security_group and self.security_group.sg:
+            return [self.security_group.sg]
+        return []
+
+    def _claim_pool_member(self) -> None:
+        self._pool_member = self._warm_pool.claim(self._deploy_app)
+
+    def _use_pool_member(self, member: PoolMember) -> Instance:
+        """Turn the claimed member of the warm pool into the app's instance."""
+        instance = member.instance
+        try:
+            instance.rename(self.name)
+            for sg in self._get_security_groups():
+                instance.add_security_group(sg)
+        except Exception:
+            instance.remove(self._get_security_groups())
+            raise
+        # the mgmt port is renamed by the claim
+        self.mgmt_iface = self._api.Interface.from_port(instance, member.mgmt_port)
+        return instance
 
     def _prepare_user_data(self) -> str:
         user_data = ""
@@ -72,22 +190,23 @@ class CreateInstanceCommand(RollbackCommand):
             user_data += get_udev_rules()
         return user_data
 
-    @staticmethod
-    def _set_mgmt_iface_name(inst: Instance) -> None:
+    def _set_mgmt_iface(self, inst: Instance) -> None:
+        if self.mgmt_port:
+            # the port is named on creation, no need to look for it
+            self.mgmt_iface = self._api.Interface.from_port(inst, self.mgmt_port.port)
+        else:
+            self._set_mgmt_iface_name(inst)
+
+    @traced("rename mgmt port")
+    def _set_mgmt_iface_name(self, inst: Instance) -> None:
         ifaces = list(inst.interfaces)
         assert len(ifaces) == 1
-        mgmt_iface = ifaces[0]
-        mgmt_iface.port.name = get_mgmt_iface_name(inst)
+        self.mgmt_iface = ifaces[0]  # the deploy flow uses it without requests
+        self.mgmt_iface.port.name = get_mgmt_iface_name(inst)
 
     def _get_port_for_private_ip(self, mgmt_net: Network) -> Port:
         ip_str = self._deploy_app.private_ip
-        ip = IPv4Address(ip_str)
-        for subnet in mgmt_net.subnets:
-            if ip in IPv4Network(subnet.cidr):
-                break
-        else:
-            raise PrivateIpIsNotInMgmtNetwork(ip_str, mgmt_net)
-
+        subnet = get_private_ip_subnet(mgmt_net, ip_str)
         return self._api.Port.create(
             "", mgmt_net, fixed_ip=ip_str, fixed_ip_subnet=subnet
         )
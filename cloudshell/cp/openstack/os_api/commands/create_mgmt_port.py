@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from ipaddress import IPv4Address, IPv4Network
+
+from cloudshell.cp.core.cancellation_manager import CancellationContextManager
+
+from cloudshell.cp.openstack.exceptions import PrivateIpIsNotInMgmtNetwork
+from cloudshell.cp.openstack.models import OSNovaImgDeployApp
+from cloudshell.cp.openstack.os_api.api import OsApi
+from cloudshell.cp.openstack.os_api.commands.create_security_group import (
+    CreateSecurityGroup,
+)
+from cloudshell.cp.openstack.os_api.commands.graph import CommandGraph, Step
+from cloudshell.cp.openstack.os_api.commands.rollback import (
+    RollbackCommand,
+    RollbackCommandsManager,
+)
+from cloudshell.cp.openstack.os_api.models import Network, Port, SecurityGroup, Subnet
+from cloudshell.cp.openstack.resource_config import OSResourceConfig
+from cloudshell.cp.openstack.utils.instance_helpers import MGMT_IFACE_NAME
+
+
+def get_private_ip_subnet(mgmt_net: Network, ip_str: str) -> Subnet:
+    ip = IPv4Address(ip_str)
+    for subnet in mgmt_net.subnets:
+        if ip in IPv4Network(subnet.cidr):
+            return subnet
+    raise PrivateIpIsNotInMgmtNetwork(ip_str, mgmt_net)
+
+
+class CreateMgmtPort(RollbackCommand):
+    """Creates the named mgmt port, the instance boots with it.
+
+    The port has the private IP of the app if it's set. The floating IP can be
+    attached to the port while the instance builds. Nova doesn't add groups
+    to the ports it didn't create, so the port is created with the default
+    group and the app's one, the inbound rules apply from the boot.
+    """
+
+    def __init__(
+        self,
+        rollback_manager: RollbackCommandsManager,
+        cancellation_manager: CancellationContextManager,
+        os_api: OsApi,
+        deploy_app: OSNovaImgDeployApp,
+        resource_conf: OSResourceConfig,
+        *args,
+        security_group: CreateSecurityGroup | None = None,
+        **kwargs,
+    ):
+        super().__init__(rollback_manager, cancellation_manager, *args, **kwargs)
+        self._api = os_api
+        self._deploy_app = deploy_app
+        self._resource_conf = resource_conf
+        self.security_group = security_group
+        self.port: Port | None = None
+
+    def _execute(self, *args, **kwargs) -> Port:
+        graph = CommandGraph()
+        mgmt_net = graph.add(
+            lambda: self._api.Network.get_static(self._resource_conf.os_mgmt_net_id)
+        )
+        default_sg = None
+        if self.security_group:
+            graph.add(self.security_group.execute)
+            default_sg = graph.add(
+                lambda: self._api.SecurityGroup.get_default(self._api.project_id)
+            )
+        graph.run()
+
+        try:
+            self.port = self._create_port(mgmt_net.result, default_sg)
+        except Exception:
+            # another process removed the shared group before the port
+            if not (self.security_group and self.security_group.refresh()):
+                raise
+            self.port = self._create_port(mgmt_net.result, default_sg)
+        if self.security_group:
+            self.security_group.release()  # the port uses the group
+        return self.port
+
+    def _create_port(self, mgmt_net: Network, default_sg: Step | None) -> Port:
+        ip_str = self._deploy_app.private_ip or None
+        subnet = get_private_ip_subnet(mgmt_net, ip_str) if ip_str else None
+        security_groups: list[SecurityGroup] | None = None
+        if self.security_group:
+            security_groups = [default_sg.result, self.security_group.sg]
+        return self._api.Port.create(
+            MGMT_IFACE_NAME,
+            mgmt_net,
+            fixed_ip=ip_str,
+            fixed_ip_subnet=subnet,
+            security_groups=security_groups,
+        )
+
+    def rollback(self):
+        if self.port:
+            self.port.remove()
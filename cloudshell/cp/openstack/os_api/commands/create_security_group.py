@@ -1,58 +1,129 @@
 from __future__ import annotations
 
+from typing import Any
+
 from cloudshell.cp.core.cancellation_manager import CancellationContextManager
 
+from cloudshell.cp.openstack.exceptions import SecurityGroupNotFound
 from cloudshell.cp.openstack.models import OSNovaImgDeployApp
+from cloudshell.cp.openstack.models.deploy_app import SecurityGroupRule
 from cloudshell.cp.openstack.os_api.api import OsApi
 from cloudshell.cp.openstack.os_api.commands.rollback import (
     RollbackCommand,
     RollbackCommandsManager,
 )
 from cloudshell.cp.openstack.os_api.models import Instance, SecurityGroup
+from cloudshell.cp.openstack.utils.instance_helpers import (
+    normalize_security_group_rules,
+)
 
 
 class CreateSecurityGroup(RollbackCommand):
+    """Creates the security group with the inbound rules of the app.
+
+    It doesn't need the instance, so the instance can boot with the group.
+    A shared group is found by the name or created, apps with the same rules
+    use it, and it's removed with the last instance that uses it. It's pinned
+    until the instance uses it, release it then.
+    """
+
     def __init__(
         self,
         rollback_manager: RollbackCommandsManager,
         cancellation_manager: CancellationContextManager,
         os_api: OsApi,
         deploy_app: OSNovaImgDeployApp,
-        instance: Instance,
+        name: str,
         *args,
+        shared: bool = False,
         **kwargs,
     ):
         super().__init__(rollback_manager, cancellation_manager, *args, **kwargs)
         self._api = os_api
         self._deploy_app = deploy_app
-        self._instance = instance
-        self._sg: SecurityGroup | None = None
+        self._name = name
+        self._shared = shared
+        self._pinned = False
+        self.sg: SecurityGroup | None = None
 
     def _execute(self, *args, **kwargs) -> SecurityGroup:
-        name = f"sg-{self._instance.name}"
-        sg = self._api.SecurityGroup.create(name)
+        if self._shared:
+            rules = normalize_security_group_rules(self._deploy_app.inbound_ports)
+            self.sg = self._api.SecurityGroup.find_or_create(
+                self._name, map(self._get_rule_data, rules)
+            )
+            self._pinned = True
+            return self.sg
+
+        sg = self._api.SecurityGroup.create(self._name)
 
         try:
             self._add_rules(sg)
-            self._instance.add_security_group(sg)
         except Exception:
             sg.remove()
             raise
 
-        self._sg = sg
+        self.sg = sg
         return sg
 
     def _add_rules(self, sg: SecurityGroup) -> None:
-        for rule in self._deploy_app.inbound_ports:
-            sg.add_rule(
-                cidr=rule.cidr,
-                protocol=rule.protocol,
-                port_range_min=rule.port_range_min,
-                port_range_max=rule.port_range_max,
-                direction="ingress",
-            )
+        sg.add_rules(map(self._get_rule_data, self._deploy_app.inbound_ports))
+
+    @staticmethod
+    def _get_rule_data(rule: SecurityGroupRule) -> dict[str, Any]:
+        return {
+            "cidr": rule.cidr,
+            "protocol": rule.protocol,
+            "port_range_min": rule.port_range_min,
+            "port_range_max": rule.port_range_max,
+            "direction": "ingress",
+        }
+
+    def release(self) -> None:
+        """Unpin the shared group, the instance uses it now or failed."""
+        if self._pinned:
+            self._pinned = False
+            self.sg.unpin()
+
+    def refresh(self) -> bool:
+        """Find or create the shared group again if another process removed it.
+
+        :return: True if the group is replaced
+        """
+        if not self._shared or not self.sg:
+            return False
+        try:
+            self._api.SecurityGroup.get(self.sg.id)
+        except SecurityGroupNotFound:
+            self.release()
+            self._execute()
+            return True
+        return False
+
+    def rollback(self):
+        self.release()
+        if self.sg and self._shared:
+            self.sg.remove_if_unused()
+        elif self.sg:
+            self.sg.remove()
+
+
+class AddSecurityGroup(RollbackCommand):
+    def __init__(
+        self,
+        rollback_manager: RollbackCommandsManager,
+        cancellation_manager: CancellationContextManager,
+        instance: Instance,
+        sg: SecurityGroup,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(rollback_manager, cancellation_manager, *args, **kwargs)
+        self._instance = instance
+        self._sg = sg
+
+    def _execute(self, *args, **kwargs) -> None:
+        self._instance.add_security_group(self._sg)
 
     def rollback(self):
-        if self._sg:
-            self._instance.remove_security_group(self._sg)
-            self._sg.remove()
+        self._instance.remove_security_group(self._sg)
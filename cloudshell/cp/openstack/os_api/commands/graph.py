@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from concurrent import futures as ft
+from typing import Any, Callable
+
+import attr
+
+from cloudshell.cp.openstack.utils.tracing import propagate
+
+
+@attr.s(auto_attribs=True, eq=False)
+class Step:
+    func: Callable[[], Any]
+    after: tuple[Step, ...]
+    _future: ft.Future | None = attr.ib(default=None, init=False)
+
+    @property
+    def result(self) -> Any:
+        """Result of the step, steps read the results of the steps they follow."""
+        if self._future is None:
+            raise RuntimeError(f"{self.func} wasn't started")
+        return self._future.result()
+
+    def is_ready(self) -> bool:
+        return all(
+            step._future is not None
+            and step._future.done()
+            and step._future.exception() is None
+            for step in self.after
+        )
+
+
+class CommandGraph:
+    """Runs steps as soon as the steps they follow are done.
+
+    A step is a function that creates and executes rollback commands or gets
+    something the commands need. Independent steps run in parallel. A command
+    created in a step is registered in the rollback manager after the commands
+    of the steps it follows, so the manager rolls back in the dependency order.
+    When a step fails, the steps that aren't started are skipped, the running
+    ones are waited for and the first error is raised.
+    """
+
+    DEFAULT_MAX_WORKERS = 4
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self._max_workers = max_workers
+        self._steps: list[Step] = []
+
+    def add(self, func: Callable[[], Any], *after: Step) -> Step:
+        step = Step(func, after)
+        self._steps.append(step)
+        return step
+
+    def run(self) -> None:
+        pending = list(self._steps)
+        running: dict[ft.Future, Step] = {}
+        error: BaseException | None = None
+        with ft.ThreadPoolExecutor(self._max_workers) as executor:
+            while pending or running:
+                for step in [step for step in pending if step.is_ready()]:
+                    pending.remove(step)
+                    step._future = executor.submit(propagate(step.func))
+                    running[step._future] = step
+                if not running:
+                    break  # the rest follow steps of another graph
+                done, _ = ft.wait(running, return_when=ft.FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    if future.exception() is not None and error is None:
+                        error = future.exception()
+                        pending.clear()
+        if error is not None:
+            raise error
+        if pending:
+            raise ValueError(f"Steps can't be started: {pending}")
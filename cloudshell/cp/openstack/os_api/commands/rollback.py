@@ -5,6 +5,8 @@ from logging import Logger
 
 from cloudshell.cp.core.cancellation_manager import CancellationContextManager
 
+from cloudshell.cp.openstack.utils.tracing import span
+
 
 class RollbackCommandsManager:
     def __init__(self, logger: Logger):
@@ -23,7 +25,8 @@ class RollbackCommandsManager:
                 if command.executed:
                     try:
                         self._logger.info(f"Running rollback for command {command}")
-                        command.rollback()
+                        with span(f"rollback {type(command).__name__}"):
+                            command.rollback()
                     except Exception:
                         self._logger.warning(
                             f"Unable to perform rollback for command {command}",
@@ -53,7 +56,7 @@ class RollbackCommand:
         pass
 
     def execute(self):
-        with self._cancellation_manager:
+        with self._cancellation_manager, span(type(self).__name__):
             command_result = self._execute()
             self.executed = True
             return command_result
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import re
+import threading
+from functools import wraps
+from urllib.parse import urlsplit
+
+from keystoneauth1.session import Session as KeyStoneSession
+from requests.adapters import BaseAdapter
+
+from cloudshell.cp.openstack.os_api.call_ledger import record_call
+from cloudshell.cp.openstack.utils.metrics import METRICS, MetricsRegistry
+from cloudshell.cp.openstack.utils.tracing import span
+
+HTTP_METRIC = "openstack_http_request"
+HTTP_RETRIES_METRIC = "openstack_http_retries"
+SERVICE_NAMES = {
+    "compute": "nova",
+    "network": "neutron",
+    "image": "glance",
+    "identity": "keystone",
+}
+_ID_RE = re.compile(
+    r"[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}|\d+",
+    re.IGNORECASE,
+)
+
+
+def get_url_template(url: str) -> str:
+    """Path of the URL without the query and with IDs replaced by {id}."""
+    path = urlsplit(url).path or "/"
+    return "/".join(
+        "{id}" if _ID_RE.fullmatch(part) else part for part in path.split("/")
+    )
+
+
+def _get_service(session: KeyStoneSession, url: str, endpoint_filter: dict) -> str:
+    service_type = (endpoint_filter or {}).get("service_type")
+    if service_type:
+        return SERVICE_NAMES.get(service_type, service_type)
+    auth_url = getattr(session.auth, "auth_url", None)
+    if auth_url and url.startswith(auth_url):
+        return "keystone"
+    return "other"
+
+
+class _CountingAdapter(BaseAdapter):
+    """Counts attempts of the requests, Keystone sends a retry again."""
+
+    def __init__(self, adapter: BaseAdapter, attempts: threading.local):
+        super().__init__()
+        self.adapter = adapter
+        self._attempts = attempts
+
+    def send(self, request, *args, **kwargs):
+        self._attempts.count = getattr(self._attempts, "count", 0) + 1
+        return self.adapter.send(request, *args, **kwargs)
+
+    def close(self) -> None:
+        self.adapter.close()
+
+
+def instrument_session(
+    session: KeyStoneSession, registry: MetricsRegistry = METRICS
+) -> KeyStoneSession:
+    """Time every request of the session, trace it and record it to the ledger.
+
+    Requests are labelled with the service, the method and the URL template,
+    e.g. `neutron GET /v2.0/ports`. Keystone retries inside one request, the
+    adapters of the requests session count its attempts to get retries.
+    """
+    if getattr(session, "_cp_instrumented", False):
+        return session
+
+    attempts = threading.local()
+    request = session.request
+    for prefix, adapter in list(session.session.adapters.items()):
+        session.session.mount(prefix, _CountingAdapter(adapter, attempts))
+
+    @wraps(request)
+    def timed_request(url, method, *args, **kwargs):
+        labels = {
+            "service": _get_service(session, url, kwargs.get("endpoint_filter")),
+            "method": method.upper(),
+            "url": get_url_template(url),
+        }
+        record_call(**labels)
+        # the request can get a token with a nested request to Keystone
+        outer_count = getattr(attempts, "count", 0)
+        attempts.count = 0
+        try:
+            with registry.timer(HTTP_METRIC, **labels), span(
+                " ".join(labels.values()), **labels
+            ):
+                return request(url, method, *args, **kwargs)
+        finally:
+            if attempts.count > 1:
+                registry.inc(HTTP_RETRIES_METRIC, attempts.count - 1, **labels)
+            attempts.count = outer_count
+
+    session.request = timed_request
+    session._cp_instrumented = True
+    return session
@@ -9,6 +9,8 @@ from novaclient.v2.client import Client as NovaClient
 from novaclient.v2.flavors import Flavor as OpenStackFlavor
 
 from cloudshell.cp.openstack.exceptions import FlavorNotFound
+from cloudshell.cp.openstack.os_api.catalog_cache import catalog_lookup
+from cloudshell.cp.openstack.os_api.request_cache import cached_lookup
 
 if TYPE_CHECKING:
     from cloudshell.cp.openstack.os_api.api import OsApi
@@ -26,6 +28,8 @@ class Flavor:
         return f"Flavor '{self.name}'"
 
     @classmethod
+    @cached_lookup("id")
+    @catalog_lookup("id")
     def get(cls, id_: str) -> Flavor:
         cls._logger.debug(f"Getting a flavor with ID '{id_}'")
         try:
@@ -35,6 +39,8 @@ class Flavor:
         return cls(os_flavor)
 
     @classmethod
+    @cached_lookup("name")
+    @catalog_lookup("name")
     def find_first(cls, name: str) -> Flavor:
         cls._logger.debug(f"Searching for the first flavor with name '{name}'")
         try:
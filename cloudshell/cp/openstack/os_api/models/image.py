@@ -9,6 +9,11 @@ from glanceclient import exc as glance_exc
 from glanceclient.v2.client import Client as GlanceClient
 
 from cloudshell.cp.openstack.exceptions import ImageNotFound
+from cloudshell.cp.openstack.os_api.catalog_cache import (
+    catalog_lookup,
+    invalidate_catalog_obj,
+)
+from cloudshell.cp.openstack.os_api.request_cache import cached_lookup, invalidate_cache
 
 if TYPE_CHECKING:
     from cloudshell.cp.openstack.os_api.api import OsApi
@@ -31,6 +36,8 @@ class Image:
         return cls(image_dict["id"], image_dict["name"])
 
     @classmethod
+    @cached_lookup("id")
+    @catalog_lookup("id")
     def get(cls, id_: str) -> Image:
         cls._logger.debug(f"Getting an image with ID '{id_}'")
         try:
@@ -46,5 +53,7 @@ class Image:
             yield cls.from_dict(image_dict)
 
     def remove(self) -> None:
+        invalidate_cache(self)
+        invalidate_catalog_obj(self)
         with suppress(glance_exc.HTTPNotFound):
             self._glance.images.delete(self.id)
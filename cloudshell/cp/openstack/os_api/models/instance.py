@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import time
+from concurrent import futures as ft
 from contextlib import nullcontext, suppress
 from enum import Enum
 from logging import Logger
-from typing import TYPE_CHECKING, ClassVar, ContextManager, Generator
+from typing import TYPE_CHECKING, ClassVar, ContextManager, Generator, Iterable
 
 import attr
 from neutronclient.v2_0.client import Client as NeutronClient
@@ -12,16 +13,14 @@ from novaclient import exceptions as nova_exc
 from novaclient.v2.client import Client as NovaClient
 from novaclient.v2.servers import Server as OpenStackInstance
 
-from cloudshell.cp.openstack.exceptions import (
-    InstanceErrorState,
-    InstanceNotFound,
-    PortIsNotAttached,
-)
+from cloudshell.cp.openstack.exceptions import InstanceNotFound, PortIsNotAttached
+from cloudshell.cp.openstack.os_api.request_cache import invalidate_cache
+from cloudshell.cp.openstack.os_api.session_pool import MAX_WORKERS
 from cloudshell.cp.openstack.utils.cached_property import cached_property
-from cloudshell.cp.openstack.utils.instance_helpers import (
-    find_fixed_ip,
-    find_floating_ip,
-)
+from cloudshell.cp.openstack.utils.instance_helpers import MacAddresses, get_ip_index
+from cloudshell.cp.openstack.utils.keyed_lock import KeyedLock
+from cloudshell.cp.openstack.utils.metrics import timed
+from cloudshell.cp.openstack.utils.tracing import propagate
 
 if TYPE_CHECKING:
     from cloudshell.cp.openstack.os_api.api import OsApi
@@ -33,6 +32,8 @@ if TYPE_CHECKING:
         SecurityGroup,
     )
 
+DEFAULT_SECURITY_GROUP = "default"
+
 
 class InstanceStatus(Enum):
     ACTIVE = "ACTIVE"
@@ -54,11 +55,16 @@ class InstanceStatus(Enum):
 
 @attr.s(auto_attribs=True, str=False)
 class Instance:
+    # Nova can't attach or detach interfaces of one instance at the same time
+    LOCKS: ClassVar[KeyedLock] = KeyedLock("instance")
     api: ClassVar[OsApi]
     _nova: ClassVar[NovaClient]
     _logger: ClassVar[Logger]
 
     _os_instance: OpenStackInstance
+    _ip_index: dict[str, MacAddresses] | None = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
 
     def __str__(self) -> str:
         return f"Instance '{self.name}'"
@@ -88,6 +94,46 @@ class Instance:
             yield cls(os_instance)
 
     @classmethod
+    @timed
+    def get_many(
+        cls, ids: Iterable[str], max_workers: int = MAX_WORKERS
+    ) -> dict[str, Instance]:
+        """Get instances with GETs in parallel.
+
+        Nova can't filter servers by many IDs and listing all servers of the
+        project costs more than a GET for each one.
+        Instances that are not found are missed in the result.
+        """
+        ids = sorted(set(ids))
+        cls._logger.debug(f"Getting instances with IDs {ids}")
+        workers = max(1, min(max_workers, len(ids)))
+        with ft.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(propagate(cls._get_if_exists), id_) for id_ in ids
+            ]
+        found = (future.result() for future in futures)
+        return {id_: inst for id_, inst in zip(ids, found) if inst is not None}
+
+    @classmethod
+    def _get_if_exists(cls, id_: str) -> Instance | None:
+        with suppress(InstanceNotFound):
+            return cls.get(id_)
+        return None
+
+    @classmethod
+    @timed
+    def find_all_by_prefix(cls, prefix: str) -> list[Instance]:
+        """Find instances which names start with the prefix, Nova matches a regex."""
+        cls._logger.debug(f"Searching for instances with name prefix '{prefix}'")
+        search_opts = {"name": f"^{prefix}"}
+        return [
+            cls(os_instance)
+            for os_instance in cls._nova.servers.list(search_opts=search_opts)
+            if os_instance.name.startswith(prefix)
+        ]
+
+    @classmethod
+    @timed
     def create(
         cls,
         name: str,
@@ -99,7 +145,14 @@ class Instance:
         affinity_group_id: str | None = None,
         user_data: str | None = None,
         cancellation_manager: ContextManager = nullcontext(),
+        wait_for_active: bool = True,
+        security_groups: Iterable[SecurityGroup] = (),
     ) -> Instance:
+        """Create the instance.
+
+        :param security_groups: groups to add to the default one, Nova applies
+            them only to the ports it creates
+        """
         assert network or port
         cls._logger.info(
             f"Creating an Instance '{name}' using the {image}, the {flavor}, "
@@ -110,6 +163,12 @@ class Instance:
             nics = [{"port-id": port.id}]
         else:
             nics = [{"net-id": network.id}]  # type: ignore
+        security_groups = list(security_groups)
+        sg_ids = None
+        if security_groups:
+            # the given groups replace the default one, names of the shared
+            # groups can be duplicated by other processes
+            sg_ids = [DEFAULT_SECURITY_GROUP, *(sg.id for sg in security_groups)]
 
         os_inst = cls._nova.servers.create(
             name,
@@ -119,19 +178,37 @@ class Instance:
             userdata=user_data,
             availability_zone=availability_zone,
             scheduler_hints=scheduler_hints,
+            security_groups=sg_ids,
         )
         inst = cls(os_inst)
+        if not wait_for_active:
+            return inst
 
         try:
             inst._wait_for_status(
                 InstanceStatus.ACTIVE, cancellation_manager=cancellation_manager
             )
         except Exception:
-            inst.remove()
+            inst.remove(security_groups)
             raise
 
         return inst
 
+    @classmethod
+    def wait_for_status_many(
+        cls,
+        instances: Iterable[Instance],
+        status: InstanceStatus,
+        cancellation_manager: ContextManager = nullcontext(),
+    ) -> list[Exception | None]:
+        """Wait for all instances to get the status.
+
+        :return: an error for every instance that went to the ERROR status or None
+        """
+        return cls.api.status_watcher.wait_many(
+            instances, status, cancellation_manager=cancellation_manager, nova=cls._nova
+        )
+
     @property  # noqa: A003
     def id(self) -> str:  # noqa: A003
         return self._os_instance.id
@@ -168,32 +245,39 @@ class Instance:
         for sg in self._os_instance.list_security_group():
             yield self.api.SecurityGroup.from_dict(sg.to_dict())
 
+    @timed
     def attach_port(self, port: Port) -> Interface:
         self._logger.debug(f"Attaching the {port} to the {self}")
-        for iface in self.interfaces:
-            if iface.port_id == port.id:
-                self._logger.debug(f"Already attached the {port} to the {self}")
-                break
-        else:
-            # os_instance.interface_attach raises an exception
-            os_iface = self._nova.servers.interface_attach(
-                self._os_instance, port_id=port.id, net_id=None, fixed_ip=None
-            )
-            iface = self.api.Interface.from_os_interface(self, os_iface)
-            self._wait_port_attached(port)
+        with self.LOCKS(self.id):
+            for iface in self.interfaces:
+                if iface.port_id == port.id:
+                    self._logger.debug(f"Already attached the {port} to the {self}")
+                    break
+            else:
+                # os_instance.interface_attach raises an exception
+                os_iface = self._nova.servers.interface_attach(
+                    self._os_instance, port_id=port.id, net_id=None, fixed_ip=None
+                )
+                iface = self.api.Interface.from_os_interface(self, os_iface)
+                self._wait_port_attached(port)
         return iface
 
+    @timed
     def attach_network(self, network: Network) -> Interface:
         self._logger.debug(f"Attaching a {network} to the {self}")
         # os_instance.interface_attach raises an exception
-        os_iface = self._nova.servers.interface_attach(
-            self._os_instance, port_id=None, net_id=network.id, fixed_ip=None
-        )
+        with self.LOCKS(self.id):
+            os_iface = self._nova.servers.interface_attach(
+                self._os_instance, port_id=None, net_id=network.id, fixed_ip=None
+            )
         return self.api.Interface.from_os_interface(self, os_iface)
 
+    @timed
     def detach_port(self, port: Port) -> None:
         self._logger.debug(f"Detaching the {port} from the {self}")
-        self._nova.servers.interface_detach(self._os_instance, port.id)
+        with self.LOCKS(self.id):
+            self._nova.servers.interface_detach(self._os_instance, port.id)
+        invalidate_cache(port)  # Nova removes ports that it created
 
     def detach_network(self, network: Network) -> None:
         self._logger.debug(f"Detaching the {network} from the {self}")
@@ -212,16 +296,33 @@ class Instance:
         return None
 
     def find_interface_by_port_name(self, name: str) -> Interface | None:
-        for iface in self.interfaces:
-            if iface.port.name == name:
-                return iface
+        """Find the interface with one request for all ports of the instance."""
+        for port in self.api.Port.find_by_device_ids([self.id])[self.id]:
+            if port.name == name:
+                return self.api.Interface.from_port(self, port)
         return None
 
+    @property
+    def ip_index(self) -> dict[str, MacAddresses]:
+        """Fixed and floating IPs by MAC address.
+
+        It's built from the server we already have, call refresh() to see
+        IPs that were changed after that.
+        """
+        if self._ip_index is None:
+            self._ip_index = get_ip_index(self._os_instance)
+        return self._ip_index
+
     def find_floating_ip_by_mac(self, mac: str) -> str | None:
-        return find_floating_ip(self._os_instance, mac)
+        return self.ip_index.get(mac, MacAddresses(None, None)).floating
 
     def find_fixed_ip_by_mac(self, mac: str) -> str | None:
-        return find_fixed_ip(self._os_instance, mac)
+        return self.ip_index.get(mac, MacAddresses(None, None)).fixed
+
+    def refresh(self) -> None:
+        self._logger.debug(f"Refreshing the {self}")
+        self._os_instance.get()
+        self._ip_index = None
 
     def power_on(self) -> None:
         if self.status is not InstanceStatus.ACTIVE:
@@ -250,9 +351,22 @@ class Instance:
         else:
             self._logger.debug(f"The {self} already stopped")
 
-    def remove(self):
+    def remove(self, security_groups: Iterable[SecurityGroup] = ()) -> None:
+        """Remove the instance.
+
+        Neutron can't remove a group that ports use and Nova removes the ports
+        later, so the groups that will be removed are detached before.
+        """
         self._logger.debug(f"Removing {self}")
-        self._os_instance.delete()
+        try:
+            for sg in security_groups:
+                self.remove_security_group(sg)
+        finally:
+            self._os_instance.delete()
+
+    def rename(self, name: str) -> None:
+        self._logger.debug(f"Renaming the {self} to '{name}'")
+        self._update(self._nova.servers.update(self._os_instance, name=name))
 
     def create_snapshot(self, name: str) -> str:
         """Create a snapshot.
@@ -286,18 +400,19 @@ class Instance:
     def get_console_url(self, type_: str) -> str:
         return self._os_instance.get_console_url(type_)["console"]["url"]
 
+    def _update(self, os_instance: OpenStackInstance) -> None:
+        self._os_instance = os_instance
+        self._ip_index = None
+
+    @timed
     def _wait_for_status(
         self,
         status: InstanceStatus,
-        delay: int = 3,
         cancellation_manager: ContextManager = nullcontext(),
     ) -> None:
-        while self.status not in (status, InstanceStatus.ERROR):
-            time.sleep(delay)
-            with cancellation_manager:
-                self._os_instance.get()
-        if self.status is InstanceStatus.ERROR:
-            raise InstanceErrorState(self, self._os_instance.fault["message"])
+        self.api.status_watcher.wait(
+            self, status, cancellation_manager=cancellation_manager, nova=self._nova
+        )
 
 
 @attr.s(auto_attribs=True)
@@ -315,6 +430,12 @@ class Interface:
     def from_os_interface(cls, instance: Instance, interface) -> Interface:
         return cls(instance, interface.port_id, interface.net_id, interface.mac_addr)
 
+    @classmethod
+    def from_port(cls, instance: Instance, port: Port) -> Interface:
+        iface = cls(instance, port.id, port.network_id, port.mac_address)
+        iface.port = port  # type: ignore  # the cached property is already known
+        return iface
+
     @cached_property
     def network(self) -> Network:
         return self.api.Network.get(self.network_id)
@@ -2,14 +2,21 @@ from __future__ import annotations
 
 from enum import Enum
 from logging import Logger
-from typing import TYPE_CHECKING, ClassVar, Generator
+from typing import TYPE_CHECKING, ClassVar, Generator, Iterable
 
 import attr
 from neutronclient.common import exceptions as neutron_exc
 from neutronclient.v2_0.client import Client as NeutronClient
 
 from cloudshell.cp.openstack.exceptions import NetworkInUse, NetworkNotFound
+from cloudshell.cp.openstack.os_api.catalog_cache import catalog_lookup
 from cloudshell.cp.openstack.os_api.models.subnet import Subnet
+from cloudshell.cp.openstack.os_api.request_cache import (
+    add_to_cache,
+    cached_lookup,
+    invalidate_cache,
+)
+from cloudshell.cp.openstack.utils.metrics import timed
 
 if TYPE_CHECKING:
     from cloudshell.cp.openstack.os_api.api import OsApi
@@ -55,6 +62,7 @@ class Network:
         )
 
     @classmethod
+    @cached_lookup("id")
     def get(cls, id_: str) -> Network:
         cls._logger.debug(f"Getting a network with ID '{id_}'")
         try:
@@ -64,6 +72,7 @@ class Network:
         return cls.from_dict(net_dict)
 
     @classmethod
+    @cached_lookup("name")
     def find_first(cls, name: str) -> Network:
         cls._logger.debug(f"Searching for first network with name '{name}'")
         for net_dict in cls._neutron.list_networks(name=name)["networks"]:
@@ -74,6 +83,7 @@ class Network:
         return cls.from_dict(net_dict)
 
     @classmethod
+    @cached_lookup("vlan_id")
     def find_by_vlan_id(cls, vlan_id: int) -> Network:
         # Openstack can have only one network with specific VLAN
         networks = cls._neutron.list_networks(**{"provider:segmentation_id": vlan_id})
@@ -83,6 +93,29 @@ class Network:
             raise NetworkNotFound(vlan_id=vlan_id) from None
         return cls.from_dict(net_dict)
 
+    @classmethod
+    @cached_lookup("id")
+    @catalog_lookup("id")
+    def get_static(cls, id_: str) -> Network:
+        """Get the network that the shell never changes, e.g. from the resource config.
+
+        It's cached for the process.
+        """
+        return cls.get(id_)
+
+    @classmethod
+    @timed
+    def get_many(cls, ids: Iterable[str]) -> dict[str, Network]:
+        """Get networks with one request, missed networks are not in the result."""
+        ids = list(ids)
+        cls._logger.debug(f"Getting networks with IDs {ids}")
+        networks = {}
+        for net_dict in cls._neutron.list_networks(id=ids)["networks"]:
+            network = cls.from_dict(net_dict)
+            add_to_cache(network)
+            networks[network.id] = network
+        return networks
+
     @classmethod  # noqa: A003
     def all(cls) -> Generator[Network, None, None]:  # noqa: A003
         cls._logger.debug("Get all networks")
@@ -90,6 +123,7 @@ class Network:
             yield cls.from_dict(net_dict)
 
     @classmethod
+    @timed
     def create(
         cls,
         name: str,
@@ -110,7 +144,9 @@ class Network:
                 data["provider:physical_network"] = physical_iface_name
         cls._logger.debug(f"Creating a network with params: {data}")
         net_dict = cls._neutron.create_network({"network": data})["network"]
-        return cls.from_dict(net_dict)
+        network = cls.from_dict(net_dict)
+        invalidate_cache(network)
+        return network
 
     @property
     def subnets(self) -> Generator[Subnet, None, None]:
@@ -118,6 +154,7 @@ class Network:
 
     def remove(self, raise_in_use: bool = True) -> None:
         self._logger.debug(f"Removing {self}")
+        invalidate_cache(self)
         try:
             self._neutron.delete_network(self.id)
         except neutron_exc.NetworkNotFoundClient:
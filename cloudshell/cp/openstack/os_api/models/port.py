@@ -3,8 +3,7 @@ from __future__ import annotations
 import time
 from contextlib import suppress
 from logging import Logger
-from threading import Lock
-from typing import TYPE_CHECKING, ClassVar, Generator
+from typing import TYPE_CHECKING, ClassVar, Generator, Iterable
 
 import attr
 from neutronclient.common import exceptions as neutron_exc
@@ -12,21 +11,31 @@ from neutronclient.v2_0.client import Client as NeutronClient
 
 from cloudshell.cp.openstack.exceptions import PortIsNotGone, PortNotFound
 from cloudshell.cp.openstack.os_api.models.network import Network
+from cloudshell.cp.openstack.os_api.request_cache import (
+    add_to_cache,
+    cached_lookup,
+    invalidate_cache,
+)
 from cloudshell.cp.openstack.utils.cached_property import cached_property
+from cloudshell.cp.openstack.utils.keyed_lock import KeyedLock
+from cloudshell.cp.openstack.utils.metrics import timed
 
 if TYPE_CHECKING:
     from cloudshell.cp.openstack.os_api.api import OsApi
-    from cloudshell.cp.openstack.os_api.models import Subnet, Trunk
+    from cloudshell.cp.openstack.os_api.models import SecurityGroup, Subnet, Trunk
+
+PRECONDITION_FAILED = 412
 
 
 def _update_attribute(self: Port, attribute: attr.Attribute, new_value: str) -> str:
+    invalidate_cache(self)
     self._neutron.update_port(self.id, {"port": {attribute.name: new_value}})
     return new_value
 
 
 @attr.s(auto_attribs=True, str=False)
 class Port:
-    LOCK = Lock()
+    NAME_LOCKS: ClassVar[KeyedLock] = KeyedLock("port name")
     api: ClassVar[OsApi]
     _neutron: ClassVar[NeutronClient]
     _logger: ClassVar[Logger]
@@ -35,6 +44,8 @@ class Port:
     name: str = attr.ib(on_setattr=_update_attribute)  # type: ignore
     network_id: str
     mac_address: str
+    device_id: str = attr.ib(default="", eq=False, repr=False)
+    revision_number: int = attr.ib(default=0, eq=False, repr=False)
 
     def __str__(self) -> str:
         return f"Port '{self.name}'"
@@ -46,9 +57,12 @@ class Port:
             port_dict["name"],
             port_dict["network_id"],
             port_dict["mac_address"],
+            port_dict.get("device_id", ""),
+            port_dict.get("revision_number", 0),
         )
 
     @classmethod
+    @cached_lookup("id")
     def get(cls, id_: str) -> Port:
         cls._logger.debug(f"Getting a port with ID '{id_}'")
         try:
@@ -58,6 +72,8 @@ class Port:
         return cls.from_dict(port_dict)
 
     @classmethod
+    @timed
+    @cached_lookup("name")
     def find_first(cls, name: str) -> Port:
         cls._logger.debug(f"Searching for first port with name '{name}'")
         for port_dict in cls._neutron.list_ports(name=name)["ports"]:
@@ -67,6 +83,15 @@ class Port:
             raise PortNotFound(name=name)
         return cls.from_dict(port_dict)
 
+    @classmethod
+    def find_all(cls, name: str) -> list[Port]:
+        cls._logger.debug(f"Searching for ports with name '{name}'")
+        return [
+            cls.from_dict(port_dict)
+            for port_dict in cls._neutron.list_ports(name=name)["ports"]
+            if port_dict["name"] == name
+        ]
+
     @classmethod  # noqa: A003
     def all(cls) -> Generator[Port, None, None]:  # noqa: A003
         cls._logger.debug("Get all ports")
@@ -81,31 +106,105 @@ class Port:
         mac_address: str | None = None,
         fixed_ip: str | None = None,
         fixed_ip_subnet: Subnet | None = None,
+        security_groups: Iterable[SecurityGroup] | None = None,
     ) -> Port:
+        """Create the port, with the default group if the groups aren't set."""
         assert (fixed_ip and fixed_ip_subnet) or (not fixed_ip and not fixed_ip_subnet)
         port_data = {"name": name, "network_id": network.id, "mac_address": mac_address}
         if fixed_ip and fixed_ip_subnet:
             port_data["fixed_ips"] = [  # type: ignore
                 {"subnet_id": fixed_ip_subnet.id, "ip_address": fixed_ip}
             ]
+        if security_groups is not None:
+            port_data["security_groups"] = [sg.id for sg in security_groups]
         cls._logger.debug(f"Creating a port with data {port_data}")
         full_port_dict = cls._neutron.create_port({"port": port_data})["port"]
-        return cls.from_dict(full_port_dict)
+        port = cls.from_dict(full_port_dict)
+        invalidate_cache(port)
+        return port
 
     @classmethod
+    @timed
     def find_or_create(
         cls,
         name: str,
         network: Network,
         mac: str | None = None,
     ) -> Port:
-        with cls.LOCK:
+        with cls.NAME_LOCKS(name):
             try:
                 port = cls.find_first(name)
             except PortNotFound:
                 port = cls.create(name, network, mac)
         return port
 
+    @classmethod
+    def find_by_names(cls, names: Iterable[str]) -> dict[str, Port]:
+        """Find ports with one request, return the first port for every name."""
+        names = list(names)
+        cls._logger.debug(f"Searching for ports with names {names}")
+        ports = {}
+        for port_dict in cls._neutron.list_ports(name=names)["ports"]:
+            if port_dict["name"] in names:
+                ports.setdefault(port_dict["name"], cls.from_dict(port_dict))
+        return ports
+
+    @classmethod
+    @timed
+    def find_by_device_ids(cls, device_ids: Iterable[str]) -> dict[str, list[Port]]:
+        """Find ports of many devices with one request.
+
+        :return: ports by the device ID
+        """
+        device_ids = list(device_ids)
+        cls._logger.debug(f"Searching for ports of devices {device_ids}")
+        ports: dict[str, list[Port]] = {id_: [] for id_ in device_ids}
+        for port_dict in cls._neutron.list_ports(device_id=device_ids)["ports"]:
+            if port_dict["device_id"] in ports:
+                port = cls.from_dict(port_dict)
+                add_to_cache(port)
+                ports[port_dict["device_id"]].append(port)
+        return ports
+
+    @classmethod
+    def create_bulk(
+        cls, ports_data: Iterable[tuple[str, Network, str | None]]
+    ) -> list[Port]:
+        """Create ports with one request.
+
+        :param ports_data: name, network and MAC address for every port
+        """
+        ports_data = [
+            {"name": name, "network_id": network.id, "mac_address": mac_address}
+            for name, network, mac_address in ports_data
+        ]
+        cls._logger.debug(f"Creating ports with data {ports_data}")
+        port_dicts = cls._neutron.create_port({"ports": ports_data})["ports"]
+        ports = list(map(cls.from_dict, port_dicts))
+        for port in ports:
+            invalidate_cache(port)
+        return ports
+
+    @classmethod
+    @timed
+    def find_or_create_many(
+        cls, ports_data: dict[str, tuple[Network, str | None]]
+    ) -> dict[str, Port]:
+        """Find ports by names and create missed ports with one request.
+
+        :param ports_data: network and MAC address by the port name
+        """
+        with cls.NAME_LOCKS.many(ports_data):
+            ports = cls.find_by_names(ports_data)
+            missed = [
+                (name, network, mac)
+                for name, (network, mac) in ports_data.items()
+                if name not in ports
+            ]
+            if missed:
+                ports.update({port.name: port for port in cls.create_bulk(missed)})
+        return ports
+
     @cached_property
     def network(self) -> Network:
         return self.api.Network.get(self.network_id)
@@ -120,13 +219,40 @@ class Port:
             trunk = None
         return trunk
 
+    @timed
+    def rename_if_unchanged(self, name: str) -> bool:
+        """Rename the port unless it was changed after it was got.
+
+        Neutron compares the revision number, so only one of the clients that
+        rename the same port at the same time succeeds.
+        :return: False if the port was changed or removed
+        """
+        assert self.revision_number, "the port should be got from Neutron"
+        self._logger.debug(f"Renaming the {self} to '{name}' if it's unchanged")
+        invalidate_cache(self)
+        try:
+            port_dict = self._neutron.update_port(
+                self.id, {"port": {"name": name}}, revision_number=self.revision_number
+            )["port"]
+        except neutron_exc.NotFound:
+            return False
+        except neutron_exc.NeutronClientException as e:
+            if e.status_code == PRECONDITION_FAILED:
+                return False
+            raise
+        object.__setattr__(self, "name", name)  # already updated in Neutron
+        self.revision_number = port_dict["revision_number"]
+        return True
+
     def remove(self) -> None:
         self._logger.debug(f"Removing the {self}")
+        invalidate_cache(self)
         with suppress(neutron_exc.PortNotFoundClient):
             self._neutron.delete_port(self.id)
 
     def wait_until_is_gone(self, timeout: int = 5, raise_if_not: bool = True):
         for _ in range(timeout):
+            invalidate_cache(self)
             try:
                 self.api.Port.get(self.id)
             except PortNotFound:
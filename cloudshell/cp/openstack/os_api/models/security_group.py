@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+from collections import Counter
 from contextlib import suppress
 from logging import Logger
-from typing import TYPE_CHECKING, ClassVar, Generator
+from typing import TYPE_CHECKING, Any, ClassVar, Generator, Iterable
 
 import attr
 from neutronclient.common import exceptions as neutron_exc
 from neutronclient.v2_0.client import Client as NeutronClient
 
 from cloudshell.cp.openstack.exceptions import SecurityGroupNotFound
+from cloudshell.cp.openstack.os_api.catalog_cache import catalog_lookup
+from cloudshell.cp.openstack.utils.keyed_lock import KeyedLock
+from cloudshell.cp.openstack.utils.metrics import timed
 
 if TYPE_CHECKING:
     from cloudshell.cp.openstack.os_api.api import OsApi
@@ -19,6 +23,9 @@ class SecurityGroup:
     api: ClassVar[OsApi]
     _neutron: ClassVar[NeutronClient]
     _logger: ClassVar[Logger]
+    NAME_LOCKS: ClassVar[KeyedLock] = KeyedLock("security group name")
+    # shared groups found for the boots that don't use them yet
+    _PINS: ClassVar[Counter[str]] = Counter()
 
     id: str  # noqa: A003
     name: str
@@ -39,6 +46,66 @@ class SecurityGroup:
             raise SecurityGroupNotFound(id_=id_)
         return cls.from_dict(data_dict)
 
+    @classmethod
+    def find_first(cls, name: str) -> SecurityGroup:
+        """Find the oldest group with the name, all processes pick the same one."""
+        cls._logger.debug(f"Searching for first Security Group with name '{name}'")
+        data_dicts = [
+            data_dict
+            for data_dict in cls._neutron.list_security_groups(name=name)[
+                "security_groups"
+            ]
+            if data_dict["name"] == name
+        ]
+        if not data_dicts:
+            raise SecurityGroupNotFound(name=name)
+        return cls.from_dict(
+            min(data_dicts, key=lambda d: (d.get("created_at", ""), d["id"]))
+        )
+
+    @classmethod
+    @catalog_lookup("project_id")
+    def get_default(cls, project_id: str) -> SecurityGroup:
+        """Get the default group of the project, it's cached for the process."""
+        cls._logger.debug(f"Getting the default Security Group of '{project_id}'")
+        data_dicts = cls._neutron.list_security_groups(
+            name="default", project_id=project_id
+        )["security_groups"]
+        if not data_dicts:
+            raise SecurityGroupNotFound(name="default")
+        return cls.from_dict(data_dicts[0])
+
+    @classmethod
+    @timed
+    def find_or_create(
+        cls, name: str, rules: Iterable[dict[str, Any]]
+    ) -> SecurityGroup:
+        """Find the group or create it with the rules and pin it.
+
+        The rules are added under the lock, so a found group has all of them.
+        The group isn't removed in this process until it's unpinned, unpin it
+        when the instance uses it.
+        :param rules: keyword arguments of add_rule for every rule
+        """
+        with cls.NAME_LOCKS(name):
+            try:
+                sg = cls.find_first(name)
+            except SecurityGroupNotFound:
+                sg = cls.create(name)
+                try:
+                    sg.add_rules(rules)
+                except Exception:
+                    sg.remove()
+                    raise
+            cls._PINS[sg.id] += 1
+        return sg
+
+    def unpin(self) -> None:
+        with self.NAME_LOCKS(self.name):
+            self._PINS[self.id] -= 1
+            if self._PINS[self.id] <= 0:
+                del self._PINS[self.id]
+
     @classmethod  # noqa: A003
     def all(cls) -> Generator[SecurityGroup, None, None]:  # noqa: A003
         cls._logger.debug("Get all Security Groups")
@@ -61,7 +128,32 @@ class SecurityGroup:
         port_range_max: int,
         direction: str,
     ) -> None:
-        data = {
+        data = self._get_rule_data(
+            cidr, protocol, port_range_min, port_range_max, direction
+        )
+        self._neutron.create_security_group_rule({"security_group_rule": data})
+
+    def add_rules(self, rules: Iterable[dict[str, Any]]) -> None:
+        """Add rules with one request.
+
+        :param rules: keyword arguments of add_rule for every rule
+        """
+        rules_data = [self._get_rule_data(**rule) for rule in rules]
+        if rules_data:
+            self._logger.debug(f"Adding {len(rules_data)} rules to the {self}")
+            self._neutron.create_security_group_rule(
+                {"security_group_rules": rules_data}
+            )
+
+    def _get_rule_data(
+        self,
+        cidr: str,
+        protocol: str,
+        port_range_min: int,
+        port_range_max: int,
+        direction: str,
+    ) -> dict[str, Any]:
+        return {
             "remote_ip_prefix": cidr,
             "port_range_min": port_range_min,
             "port_range_max": port_range_max,
@@ -69,9 +161,27 @@ class SecurityGroup:
             "security_group_id": self.id,
             "direction": direction,
         }
-        self._neutron.create_security_group_rule({"security_group_rule": data})
 
     def remove(self) -> None:
         self._logger.debug(f"Removing the {self}")
         with suppress(neutron_exc.NotFound):
             self._neutron.delete_security_group(self.id)
+
+    def remove_if_unused(self) -> bool:
+        """Remove the group unless ports use it or it's pinned.
+
+        Neutron refuses to remove a group in use, so the ports that use a
+        shared group are its references. The pins are the boots in this
+        process that will use it.
+        :return: True if the group is removed
+        """
+        with self.NAME_LOCKS(self.name):
+            if self._PINS[self.id]:
+                self._logger.debug(f"The {self} is pinned, keeping it")
+                return False
+            try:
+                self.remove()
+            except neutron_exc.Conflict:
+                self._logger.debug(f"The {self} is used, keeping it")
+                return False
+        return True
@@ -8,6 +8,8 @@ from neutronclient.common import exceptions as neutron_exc
 from neutronclient.v2_0.client import Client as NeutronClient
 
 from cloudshell.cp.openstack.exceptions import SubnetNotFound
+from cloudshell.cp.openstack.os_api.catalog_cache import catalog_lookup
+from cloudshell.cp.openstack.os_api.request_cache import cached_lookup, invalidate_cache
 from cloudshell.cp.openstack.utils.cached_property import cached_property
 
 if TYPE_CHECKING:
@@ -48,6 +50,7 @@ class Subnet:
         )
 
     @classmethod
+    @cached_lookup("id")
     def get(cls, id_: str) -> Subnet:
         cls._logger.debug(f"Getting a subnet with ID '{id_}'")
         try:
@@ -61,6 +64,16 @@ class Subnet:
         for subnet_dict in cls._neutron.list_subnets(network_id=network_id)["subnets"]:
             yield cls.from_dict(subnet_dict)
 
+    @classmethod
+    @cached_lookup("id")
+    @catalog_lookup("id")
+    def get_static(cls, id_: str) -> Subnet:
+        """Get the subnet that the shell never changes, e.g. from the resource config.
+
+        It's cached for the process.
+        """
+        return cls.get(id_)
+
     @classmethod  # noqa: A003
     def all(cls) -> Generator[Subnet, None, None]:  # noqa: A003
         cls._logger.debug("Get all subnets")
@@ -90,7 +103,9 @@ class Subnet:
         }
         cls._logger.debug(f"Creating a subnet with params: {data}")
         subnet_dict = cls._neutron.create_subnet({"subnet": data})["subnet"]
-        return cls.from_dict(subnet_dict)
+        subnet = cls.from_dict(subnet_dict)
+        invalidate_cache(subnet)
+        return subnet
 
     @classmethod
     def get_used_cidrs(cls) -> set[str]:
@@ -99,6 +114,23 @@ class Subnet:
         cls._logger.debug(f"Looking for used CIDRs - {cidrs}")
         return cidrs
 
+    @classmethod
+    def get_cidrs_changed_since(
+        cls, changed_since: str | None
+    ) -> tuple[set[str], str | None]:
+        """Get CIDRs of the subnets changed since the time, of all without it.
+
+        :return: the CIDRs and the last update time of the listed subnets, it's
+            None if Neutron doesn't have timestamps
+        """
+        kwargs = {"changed_since": changed_since} if changed_since else {}
+        subnets = cls._neutron.list_subnets(fields=["cidr", "updated_at"], **kwargs)
+        subnets = subnets["subnets"]
+        cidrs = {s["cidr"] for s in subnets}
+        updated_at = [s["updated_at"] for s in subnets if s.get("updated_at")]
+        cls._logger.debug(f"CIDRs changed since {changed_since} - {cidrs}")
+        return cidrs, max(updated_at, default=changed_since)
+
     @cached_property
     def network(self) -> Network:
         return self.api.Network.get(self.network_id)
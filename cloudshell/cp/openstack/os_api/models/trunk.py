@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from contextlib import suppress
 from logging import Logger
-from threading import Lock
 from typing import TYPE_CHECKING, ClassVar, Generator
 
 import attr
@@ -11,6 +10,8 @@ from neutronclient.v2_0.client import Client as NeutronClient
 
 from cloudshell.cp.openstack.exceptions import TrunkNotFound
 from cloudshell.cp.openstack.utils.cached_property import cached_property
+from cloudshell.cp.openstack.utils.keyed_lock import KeyedLock
+from cloudshell.cp.openstack.utils.metrics import timed
 
 if TYPE_CHECKING:
     from cloudshell.cp.openstack.os_api.api import OsApi
@@ -19,7 +20,7 @@ if TYPE_CHECKING:
 
 @attr.s(auto_attribs=True, str=False)
 class Trunk:
-    LOCK = Lock()
+    NAME_LOCKS: ClassVar[KeyedLock] = KeyedLock("trunk name")
     api: ClassVar[OsApi]
     _neutron: ClassVar[NeutronClient]
     _logger: ClassVar[Logger]
@@ -73,13 +74,33 @@ class Trunk:
 
     @classmethod
     def find_or_create(cls, name: str, port: Port) -> Trunk:
-        with cls.LOCK:
+        with cls.NAME_LOCKS(name):
             try:
                 trunk = cls.find_first(name)
             except TrunkNotFound:
                 trunk = cls.create(name, port)
         return trunk
 
+    @classmethod
+    @timed
+    def find_or_create_many(cls, trunks_data: dict[str, Port]) -> dict[str, Trunk]:
+        """Find trunks with one request and create missed ones.
+
+        Neutron doesn't support bulk creation of trunks.
+        :param trunks_data: a parent port by the trunk name
+        """
+        with cls.NAME_LOCKS.many(trunks_data):
+            names = list(trunks_data)
+            cls._logger.debug(f"Searching for trunks with names {names}")
+            trunks = {}
+            for trunk_dict in cls._neutron.list_trunks(name=names)["trunks"]:
+                if trunk_dict["name"] in trunks_data:
+                    trunks.setdefault(trunk_dict["name"], cls.from_dict(trunk_dict))
+            for name, port in trunks_data.items():
+                if name not in trunks:
+                    trunks[name] = cls.create(name, port)
+        return trunks
+
     @cached_property
     def port(self) -> Port:
         return self.api.Port.get(self.port_id)
@@ -120,6 +141,27 @@ class Trunk:
             else:
                 raise
 
+    def add_sub_ports(self, sub_ports: list[tuple[Port, int]]) -> None:
+        """Add sub ports with one request.
+
+        :param sub_ports: a port and a VLAN id of its network
+        """
+        sub_ports_data = [
+            {
+                "port_id": port.id,
+                "segmentation_id": vlan_id,
+                "segmentation_type": "vlan",
+            }
+            for port, vlan_id in sub_ports
+        ]
+        try:
+            self._logger.debug(f"Adding sub ports {sub_ports_data} to the {self}")
+            self._neutron.trunk_add_subports(self.id, {"sub_ports": sub_ports_data})
+        except neutron_exc.Conflict:
+            # some ports are already added, add others one by one
+            for port, _ in sub_ports:
+                self.add_sub_port(port)
+
     def remove_sub_port(self, port: Port) -> None:
         self._logger.debug(f"Removing the Sub {port} from the {self}")
         try:
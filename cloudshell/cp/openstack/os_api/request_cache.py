@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from functools import wraps
+from logging import Logger
+from threading import Lock
+from typing import Any, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+INDEXED_ATTRS = ("id", "name")
+
+
+class RequestCache:
+    """Identity map of the OpenStack objects for the lifetime of one request.
+
+    Objects are stored by the key they were looked up with and by their id and
+    name, so the second lookup of the same object doesn't go to OpenStack.
+    """
+
+    def __init__(self, logger: Logger):
+        self._logger = logger
+        self._lock = Lock()
+        self._objects: dict[tuple[str, str, Hashable], Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(
+        self, kind: str, key_name: str, key: Hashable, fetch: Callable[[], T]
+    ) -> T:
+        cache_key = (kind, key_name, key)
+        with self._lock:
+            try:
+                obj = self._objects[cache_key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._logger.debug(f"Request cache hit: {kind} {key_name} '{key}'")
+                return obj
+
+        self._logger.debug(f"Request cache miss: {kind} {key_name} '{key}'")
+        obj = fetch()
+        with self._lock:
+            self._objects[cache_key] = obj
+            self._add(kind, obj)
+        return obj
+
+    def add(self, kind: str, obj: Any) -> None:
+        with self._lock:
+            self._add(kind, obj)
+
+    def _add(self, kind: str, obj: Any) -> None:
+        for attr_name in INDEXED_ATTRS:
+            value = getattr(obj, attr_name, None)
+            if value:
+                self._objects[(kind, attr_name, value)] = obj
+
+    def invalidate(self, kind: str, obj: Any) -> None:
+        """Remove the object and lookups that can return it now.
+
+        Name lookups are removed as well because a new object can be found by
+        the same name.
+        """
+        obj_id = getattr(obj, "id", None)
+        name_key = (kind, "name", getattr(obj, "name", None))
+        with self._lock:
+            keys = [
+                key
+                for key, cached_obj in self._objects.items()
+                if key[0] == kind
+                and (
+                    cached_obj is obj
+                    or getattr(cached_obj, "id", None) == obj_id
+                    or key == name_key
+                )
+            ]
+            for key in keys:
+                del self._objects[key]
+        if keys:
+            self._logger.debug(f"Request cache invalidated: {kind} '{obj}'")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._objects.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._objects),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def cached_lookup(key_name: str) -> Callable:
+    """Cache the result of the model classmethod in the request cache of the API.
+
+    Should be applied under the @classmethod decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(cls, key):
+            cache = cls.api.request_cache
+            if cache is None:
+                return func(cls, key)
+            return cache.get_or_fetch(
+                cls.__name__, key_name, key, lambda: func(cls, key)
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def add_to_cache(obj: Any) -> None:
+    cache = obj.api.request_cache
+    if cache is not None:
+        cache.add(type(obj).__name__, obj)
+
+
+def invalidate_cache(obj: Any) -> None:
+    cache = obj.api.request_cache
+    if cache is not None:
+        cache.invalidate(type(obj).__name__, obj)
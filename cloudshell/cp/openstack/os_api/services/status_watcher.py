@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import time
+from concurrent import futures as ft
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from logging import Logger
+from threading import Lock
+from typing import TYPE_CHECKING, ContextManager, Iterable
+
+import attr
+from novaclient import exceptions as nova_exc
+from novaclient.v2.client import Client as NovaClient
+
+from cloudshell.cp.openstack.exceptions import InstanceErrorState, InstanceNotFound
+from cloudshell.cp.openstack.os_api.models.instance import InstanceStatus
+
+if TYPE_CHECKING:
+    from cloudshell.cp.openstack.os_api.models import Instance
+
+
+@attr.s(auto_attribs=True, eq=False)
+class _Watch:
+    instance: Instance
+    status: InstanceStatus
+    future: ft.Future = attr.ib(factory=ft.Future)
+    polls: int = 0
+    missed: int = 0
+
+
+class InstanceStatusWatcher:
+    """Waits for statuses of many instances with one servers list per tick.
+
+    There is no background thread, one of the waiting threads becomes a leader
+    and polls statuses for all watched instances, other threads wait for their
+    futures. A poll interval starts with MIN_DELAY and grows up to MAX_DELAY.
+    A watcher is shared by the commands of the process that use the same cloud
+    and project, see get_status_watcher.
+    Nova allows filtering by uuid only for admins, so we ask for servers changed
+    since the first watch and filter them locally. If a watched instance isn't
+    returned for FALLBACK_AFTER polls (clock skew, filter isn't supported) we get
+    it directly.
+    """
+
+    MIN_DELAY = 1.0
+    MAX_DELAY = 10.0
+    BACKOFF = 1.5
+    FALLBACK_AFTER = 5
+    CHANGES_SINCE_MARGIN = 300
+
+    def __init__(self, nova: NovaClient, logger: Logger):
+        self._nova = nova
+        self._logger = logger
+        self._watches: list[_Watch] = []
+        self._lock = Lock()
+        self._poll_lock = Lock()
+        self._since: float | None = None
+        self.polls = 0
+
+    def wait(
+        self,
+        instance: Instance,
+        status: InstanceStatus,
+        cancellation_manager: ContextManager = nullcontext(),
+        nova: NovaClient | None = None,
+    ) -> None:
+        error = self.wait_many([instance], status, cancellation_manager, nova)[0]
+        if error:
+            raise error
+
+    def wait_many(
+        self,
+        instances: Iterable[Instance],
+        status: InstanceStatus,
+        cancellation_manager: ContextManager = nullcontext(),
+        nova: NovaClient | None = None,
+    ) -> list[Exception | None]:
+        """Wait for all instances to get the status.
+
+        :param nova: the client of the command, the thread polls with it when
+            it becomes a leader
+        :return: an error for every instance that went to the ERROR status or None
+        """
+        watches = [self._add_watch(inst, status) for inst in instances]
+        try:
+            self._wait_watches(watches, cancellation_manager, nova or self._nova)
+        finally:
+            self._remove_watches(watches)
+        return [watch.future.exception() for watch in watches]
+
+    def _add_watch(self, instance: Instance, status: InstanceStatus) -> _Watch:
+        watch = _Watch(instance, status)
+        self._check_watch(watch)
+        if not watch.future.done():
+            with self._lock:
+                if not self._watches:
+                    self._since = time.time() - self.CHANGES_SINCE_MARGIN
+                self._watches.append(watch)
+        return watch
+
+    def _remove_watches(self, watches: list[_Watch]) -> None:
+        with self._lock:
+            for watch in watches:
+                if watch in self._watches:
+                    self._watches.remove(watch)
+
+    def _wait_watches(
+        self,
+        watches: list[_Watch],
+        cancellation_manager: ContextManager,
+        nova: NovaClient,
+    ) -> None:
+        pending = [watch.future for watch in watches if not watch.future.done()]
+        while pending:
+            if self._poll_lock.acquire(blocking=False):
+                try:
+                    time.sleep(self._get_delay())
+                    with cancellation_manager:
+                        self._poll(nova)
+                finally:
+                    self._poll_lock.release()
+            else:
+                # another thread polls for us, check it from time to time
+                ft.wait(pending, timeout=self.MIN_DELAY)
+                with cancellation_manager:
+                    pass
+            pending = [future for future in pending if not future.done()]
+
+    def _get_delay(self) -> float:
+        with self._lock:
+            polls = min((watch.polls for watch in self._watches), default=0)
+        return min(self.MIN_DELAY * self.BACKOFF**polls, self.MAX_DELAY)
+
+    def _poll(self, nova: NovaClient) -> None:
+        with self._lock:
+            watches = [watch for watch in self._watches if not watch.future.done()]
+            since = self._since
+        if not watches:
+            return
+
+        poll_started = time.time()
+        servers = nova.servers.list(
+            detailed=True, search_opts={"changes-since": _format_time(since)}
+        )
+        self.polls += 1
+        servers_map = {server.id: server for server in servers}
+        self._logger.debug(
+            f"Polled statuses of {len(servers_map)} instances, "
+            f"{len(watches)} instances are watched"
+        )
+
+        for watch in watches:
+            watch.polls += 1
+            server = servers_map.get(watch.instance.id)
+            if server is not None:
+                watch.missed = 0
+                watch.instance._update(server)
+            else:
+                watch.missed += 1
+                if watch.missed < self.FALLBACK_AFTER:
+                    continue
+                watch.missed = 0
+                try:
+                    watch.instance._os_instance.get()
+                except nova_exc.NotFound:
+                    watch.future.set_exception(InstanceNotFound(id_=watch.instance.id))
+                    continue
+            self._check_watch(watch)
+
+        with self._lock:
+            self._since = poll_started - self.CHANGES_SINCE_MARGIN
+
+    @staticmethod
+    def _check_watch(watch: _Watch) -> None:
+        status = watch.instance.status
+        if status is InstanceStatus.ERROR:
+            msg = watch.instance._os_instance.fault["message"]
+            watch.future.set_exception(InstanceErrorState(watch.instance, msg))
+        elif status is watch.status:
+            watch.future.set_result(None)
+
+
+def _format_time(timestamp: float | None) -> str | None:
+    if timestamp is None:
+        return None
+    dt = datetime.fromtimestamp(timestamp, timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+_WATCHERS: dict[tuple, InstanceStatusWatcher] = {}
+_WATCHERS_LOCK = Lock()
+
+
+def get_status_watcher(
+    scope: tuple, nova: NovaClient, logger: Logger
+) -> InstanceStatusWatcher:
+    """Get the process-level watcher for the cloud and project.
+
+    Commands that wait at the same time share one poll of the servers list.
+    """
+    with _WATCHERS_LOCK:
+        try:
+            watcher = _WATCHERS[scope]
+        except KeyError:
+            watcher = _WATCHERS[scope] = InstanceStatusWatcher(nova, logger)
+    return watcher
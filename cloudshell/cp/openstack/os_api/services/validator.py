@@ -83,7 +83,7 @@ def _get_network_dict(api: OsApi, network_id: str) -> None:
 
 
 def _validate_floating_ip_subnet(api: OsApi, floating_ip_subnet_id: str) -> None:
-    subnet = api.Subnet.get(floating_ip_subnet_id)
+    subnet = api.Subnet.get_static(floating_ip_subnet_id)
     network = subnet.network
     if not network.is_external:
         msg = f"The {network} is not an external network"
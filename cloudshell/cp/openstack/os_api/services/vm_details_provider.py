@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+from typing import Iterable
+
 from cloudshell.cp.core.request_actions.models import (
     VmDetailsData,
     VmDetailsNetworkInterface,
     VmDetailsProperty,
 )
 
-from cloudshell.cp.openstack.os_api.models import Instance
+from cloudshell.cp.openstack.os_api.models import Instance, Interface
+
 
+def create(
+    instance: Instance,
+    management_net_id: str,
+    interfaces: Iterable[Interface] | None = None,
+) -> VmDetailsData:
+    """Create VM details.
 
-def create(instance: Instance, management_net_id: str) -> VmDetailsData:
+    :param interfaces: interfaces of the instance if they are already known
+    """
+    if interfaces is None:
+        interfaces = instance.interfaces
     vm_instance = _get_vm_instance_data(instance)
-    vm_network = _get_vm_network_data(instance, management_net_id)
+    vm_network = _get_vm_network_data(interfaces, management_net_id)
     return VmDetailsData(
         vmInstanceData=vm_instance, vmNetworkData=vm_network, appName=instance.name
     )
@@ -30,10 +42,10 @@ def _get_vm_instance_data(instance: Instance) -> list[VmDetailsProperty]:
 
 
 def _get_vm_network_data(
-    instance: Instance, mgmt_net_id: str
+    interfaces: Iterable[Interface], mgmt_net_id: str
 ) -> list[VmDetailsNetworkInterface]:
     network_interfaces = []
-    for iface in instance.interfaces:
+    for iface in interfaces:
         private_ip = iface.fixed_ip
         public_ip = iface.floating_ip
         is_primary_and_predefined = mgmt_net_id == iface.network_id
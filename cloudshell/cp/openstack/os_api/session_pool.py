@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+from threading import Lock
+from typing import NamedTuple
+
+import attr
+from keystoneauth1.identity.v3 import Password as KeyStoneAuth
+from keystoneauth1.session import Session as KeyStoneSession
+from keystoneauth1.session import TCPKeepAliveAdapter
+from requests.adapters import DEFAULT_POOLSIZE
+
+from cloudshell.cp.openstack.os_api.cassette import use_cassette
+from cloudshell.cp.openstack.os_api.http_metrics import instrument_session
+
+# the most threads a command calls the API from, e.g. for connectivity actions
+MAX_WORKERS = 16
+# the HTTP connection pool of a session fits them and the other commands
+POOL_MAXSIZE = DEFAULT_POOLSIZE + MAX_WORKERS
+
+
+class SessionKey(NamedTuple):
+    controller_url: str
+    user: str
+    project_name: str
+    domain_name: str
+
+
+def create_session(
+    controller_url: str,
+    user: str,
+    password: str,
+    project_name: str,
+    domain_name: str,
+    pool_maxsize: int = POOL_MAXSIZE,
+) -> KeyStoneSession:
+    auth = KeyStoneAuth(
+        auth_url=controller_url,
+        username=user,
+        password=password,
+        project_name=project_name,
+        user_domain_id=domain_name,
+        project_domain_id=domain_name,
+    )
+    session = KeyStoneSession(auth=auth, verify=False)
+    for scheme in ("https://", "http://"):
+        # the worker threads of a command keep their connections in the pool
+        session.session.mount(scheme, TCPKeepAliveAdapter(pool_maxsize=pool_maxsize))
+    return instrument_session(use_cassette(session))
+
+
+def _hash_password(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+@attr.s(auto_attribs=True)
+class _PoolEntry:
+    session: KeyStoneSession
+    password_hash: str
+
+
+class SessionPool:
+    """Process-wide pool of the Keystone sessions.
+
+    Sessions are shared between commands that use the same controller, user,
+    project and domain, so a token and the HTTP connection pool of the session
+    are reused until the token is close to expiry. Keystone re-authenticates
+    under its own lock as soon as the token has less than `refresh_before`
+    seconds to live.
+    """
+
+    DEFAULT_REFRESH_BEFORE = 300
+
+    def __init__(self, refresh_before: int = DEFAULT_REFRESH_BEFORE):
+        self._refresh_before = refresh_before
+        self._entries: dict[SessionKey, _PoolEntry] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_session(
+        self,
+        controller_url: str,
+        user: str,
+        password: str,
+        project_name: str,
+        domain_name: str,
+    ) -> KeyStoneSession:
+        key = SessionKey(controller_url, user, project_name, domain_name)
+        password_hash = _hash_password(password)
+        with self._lock:
+            entry = self._entries.get(key)
+            # a changed password means the old token shouldn't be reused
+            if entry and entry.password_hash == password_hash:
+                self.hits += 1
+                return entry.session
+
+            self.misses += 1
+            session = create_session(
+                controller_url, user, password, project_name, domain_name
+            )
+            session.auth.MIN_TOKEN_LIFE_SECONDS = self._refresh_before
+            self._entries[key] = _PoolEntry(session, password_hash)
+            return session
+
+    def invalidate(
+        self, controller_url: str, user: str, project_name: str, domain_name: str
+    ) -> None:
+        key = SessionKey(controller_url, user, project_name, domain_name)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry:
+            entry.session.auth.invalidate()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+SESSION_POOL = SessionPool()
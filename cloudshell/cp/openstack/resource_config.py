@@ -18,6 +18,17 @@ class ResourceListAttrROShellName(ResourceListAttrRO):
         super().__init__(name, namespace, *args, **kwargs)
 
 
+class ResourceIntAttrROShellName(ResourceAttrRO):
+    def __init__(self, name, namespace=ResourceAttrRO.NAMESPACE.SHELL_NAME, default=0):
+        super().__init__(name, namespace, default)
+
+    def __get__(self, instance, owner):
+        val = super().__get__(instance, owner)
+        if val is self or isinstance(val, int):
+            return val
+        return int(val or self.default)
+
+
 class OSAttributeNames:
     controller_url = "Controller URL"
     os_domain_name = "OpenStack Domain Name"
@@ -32,6 +43,7 @@ class OSAttributeNames:
     floating_ip_subnet_id = "Floating IP Subnet ID"
     exec_server_selector = "Execution Server Selector"
     behavior_during_save = "Behavior during save"
+    warm_pool_size = "Warm Pool Size"
 
 
 class OSResourceConfig(GenericResourceConfig):
@@ -49,3 +61,4 @@ class OSResourceConfig(GenericResourceConfig):
     floating_ip_subnet_id = ResourceAttrROShellName(ATTR_NAMES.floating_ip_subnet_id)
     exec_server_selector = ResourceAttrROShellName(ATTR_NAMES.exec_server_selector)
     behavior_during_save = ResourceAttrROShellName(ATTR_NAMES.behavior_during_save)
+    warm_pool_size = ResourceIntAttrROShellName(ATTR_NAMES.warm_pool_size)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from ipaddress import IPv4Network, ip_network
+from threading import Lock
+from typing import Iterable, Tuple
+
+from cloudshell.cp.openstack.exceptions import FreeSubnetIsNotFound
+
+Interval = Tuple[int, int]  # first and last addresses of the network as integers
+
+# subnets removed since the last full sync are only found by the next one
+FULL_SYNC_INTERVAL = 10 * 60
+PRIVATE_POOLS = (
+    IPv4Network("10.0.0.0/8"),
+    IPv4Network("172.16.0.0/12"),
+    IPv4Network("192.168.0.0/16"),
+)
+
+
+def _to_interval(network: IPv4Network) -> Interval:
+    return int(network.network_address), int(network.broadcast_address)
+
+
+class CidrAllocator:
+    """Finds free IPv4 subnets in the private pools.
+
+    Used networks are kept as sorted non-overlapping integer intervals, so
+    finding a place for a new subnet is a binary search that jumps over whole
+    used ranges instead of checking every candidate against every used CIDR.
+    Allocated /24 networks usually go one after another and are merged into
+    one interval. The index is updated with the difference between the known
+    and the actual CIDRs, removal rebuilds the merged intervals lazily.
+    Allocated CIDRs stay used until they are released, even if they are not
+    created in OpenStack yet, so subnets can be created in parallel.
+    Between the full syncs, the index is updated with the subnets changed
+    since the last listing, so a sync doesn't list all subnets of the cloud.
+    Listing the used CIDRs, syncing and allocating go under the sync lock and
+    a release waits for it, so a listing taken before the subnet of a
+    released CIDR was created can't drop the CIDR.
+    """
+
+    def __init__(self, pools: Iterable[IPv4Network] = PRIVATE_POOLS):
+        self._pools = [_to_interval(pool) for pool in pools]
+        self._cidrs: Counter[str] = Counter()
+        self._raw: list[Interval] = []
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        self._dirty = False
+        self._pending: set[str] = set()
+        self._lock = Lock()
+        self.sync_lock = Lock()
+        self._synced_at: str | None = None
+        self._full_synced_at = 0.0
+
+    def __contains__(self, cidr: str) -> bool:
+        return cidr in self._cidrs
+
+    @property
+    def cidrs(self) -> set[str]:
+        return set(self._cidrs)
+
+    @property
+    def changed_since(self) -> str | None:
+        """Time of the last listed change, None when a full sync is due."""
+        if time.monotonic() - self._full_synced_at > FULL_SYNC_INTERVAL:
+            return None
+        return self._synced_at
+
+    def sync(
+        self, used_cidrs: Iterable[str], synced_at: str | None = None
+    ) -> tuple[int, int]:
+        """Update the index to the actual used CIDRs.
+
+        :param synced_at: time of the last change in the listing, the next
+            listing can start from it
+        :return: numbers of added and removed CIDRs
+        """
+        actual = set(used_cidrs)
+        with self._lock:
+            known = set(self._cidrs)
+            added, removed = actual - known, known - actual - self._pending
+            for cidr in added:
+                self._add(cidr)
+            for cidr in removed:
+                self._remove(cidr)
+            self._synced_at = synced_at
+            self._full_synced_at = time.monotonic()
+        return len(added), len(removed)
+
+    def update(self, changed_cidrs: Iterable[str], synced_at: str | None) -> int:
+        """Add CIDRs of the subnets changed since the last sync.
+
+        :return: number of added CIDRs
+        """
+        with self._lock:
+            added = set(changed_cidrs).difference(self._cidrs)
+            for cidr in added:
+                self._add(cidr)
+            self._synced_at = synced_at
+        return len(added)
+
+    def add(self, cidr: str) -> None:
+        with self._lock:
+            self._add(cidr)
+
+    def remove(self, cidr: str) -> None:
+        with self._lock:
+            self._remove(cidr)
+
+    def find_free(self, prefixlen: int = 24) -> IPv4Network:
+        with self._lock:
+            return self._find_free(prefixlen)
+
+    def allocate(self, prefixlen: int = 24) -> IPv4Network:
+        """Find the first free subnet and mark it as used until it's released."""
+        with self._lock:
+            subnet = self._find_free(prefixlen)
+            self._add(str(subnet))
+            self._pending.add(str(subnet))
+        return subnet
+
+    def release(self, cidr: str) -> None:
+        """The allocated subnet is created or failed, next sync will check it."""
+        with self.sync_lock, self._lock:
+            self._pending.discard(cidr)
+
+    def _add(self, cidr: str) -> None:
+        self._cidrs[cidr] += 1
+        if self._cidrs[cidr] > 1:
+            return
+        network = ip_network(cidr, strict=False)
+        if network.version != 4:
+            return
+        interval = _to_interval(network)
+        insort(self._raw, interval)
+        if not self._dirty:
+            self._merge(interval)
+
+    def _remove(self, cidr: str) -> None:
+        if cidr not in self._cidrs:
+            return
+        self._cidrs[cidr] -= 1
+        if self._cidrs[cidr]:
+            return
+        del self._cidrs[cidr]
+        network = ip_network(cidr, strict=False)
+        if network.version != 4:
+            return
+        self._raw.remove(_to_interval(network))
+        self._dirty = True
+
+    def _merge(self, interval: Interval) -> None:
+        start, end = interval
+        # neighbours that overlap or touch the new interval are merged into it
+        lo = bisect_left(self._ends, start - 1)
+        hi = bisect_right(self._starts, end + 1)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def _rebuild(self) -> None:
+        self._starts, self._ends = [], []
+        for interval in self._raw:
+            self._merge(interval)
+        self._dirty = False
+
+    def _find_free(self, prefixlen: int) -> IPv4Network:
+        if self._dirty:
+            self._rebuild()
+        size = 1 << (32 - prefixlen)
+        for pool_start, pool_end in self._pools:
+            candidate = pool_start
+            while candidate + size - 1 <= pool_end:
+                # the first used interval that ends at or after the candidate
+                i = bisect_left(self._ends, candidate)
+                if i == len(self._starts) or self._starts[i] > candidate + size - 1:
+                    return IPv4Network((candidate, prefixlen))
+                # jump over the used interval to the next aligned address
+                candidate = (self._ends[i] // size + 1) * size
+        raise FreeSubnetIsNotFound
+
+
+_ALLOCATORS: dict[tuple, CidrAllocator] = {}
+_ALLOCATORS_LOCK = Lock()
+
+
+def get_allocator(scope: tuple) -> CidrAllocator:
+    """Get the process-level allocator for the cloud and project."""
+    with _ALLOCATORS_LOCK:
+        try:
+            allocator = _ALLOCATORS[scope]
+        except KeyError:
+            allocator = _ALLOCATORS[scope] = CidrAllocator()
+    return allocator
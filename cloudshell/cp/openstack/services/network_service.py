@@ -1,29 +1,28 @@
 from __future__ import annotations
 
-from ipaddress import IPv4Network, IPv6Network, ip_network
 from logging import Logger
-from threading import Lock
+from typing import ClassVar
 
 import attr
 from neutronclient.common import exceptions as neutron_exc
 
-from cloudshell.cp.openstack.exceptions import (
-    FreeSubnetIsNotFound,
-    NetworkWithVlanIsNotCreatedByCloudShell,
-)
+from cloudshell.cp.openstack.exceptions import NetworkWithVlanIsNotCreatedByCloudShell
 from cloudshell.cp.openstack.models.connectivity_models import SubnetCidrData
 from cloudshell.cp.openstack.os_api.api import OsApi
 from cloudshell.cp.openstack.os_api.models import Network, NetworkType
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
+from cloudshell.cp.openstack.services.cidr_allocator import CidrAllocator, get_allocator
 from cloudshell.cp.openstack.utils.cached_property import cached_property
+from cloudshell.cp.openstack.utils.keyed_lock import KeyedLock
 
 
 @attr.s(auto_attribs=True)
 class QVlanNetwork:
+    # subnets of different networks are created in parallel
+    NETWORK_LOCKS: ClassVar[KeyedLock] = KeyedLock("VLAN network")
     _api: OsApi
     _resource_conf: OSResourceConfig
     _logger: Logger
-    _subnet_lock: Lock = Lock()
 
     def get_network(self, vlan_id: int) -> Network:
         network = self._api.Network.find_by_vlan_id(vlan_id)
@@ -70,7 +69,7 @@ class QVlanNetwork:
     def _create_subnet(
         self, network: Network, subnet_cidr_data: SubnetCidrData | None
     ) -> None:
-        with self._subnet_lock:
+        with self.NETWORK_LOCKS(network.id):
             if not self._is_correct_subnet_exists(network, subnet_cidr_data):
                 gateway = allocation_pools = None
                 if subnet_cidr_data:
@@ -88,31 +87,50 @@ class QVlanNetwork:
                     f"CIDR {cidr}"
                 )
                 name = self._get_subnet_name(network.id)
-                self._api.Subnet.create(
-                    name,
-                    network,
-                    cidr=cidr,
-                    ip_version=4,
-                    gateway_ip=gateway,
-                    allocation_pools=allocation_pools,
-                )
-
-    def _get_unused_cidr(self) -> str:
+                try:
+                    self._api.Subnet.create(
+                        name,
+                        network,
+                        cidr=cidr,
+                        ip_version=4,
+                        gateway_ip=gateway,
+                        allocation_pools=allocation_pools,
+                    )
+                finally:
+                    if not subnet_cidr_data:
+                        self._allocator.release(cidr)  # only allocated are pending
+
+    @property
+    def _allocator(self) -> CidrAllocator:
+        return get_allocator(self._api.cache_scope)
+
+    def _get_unused_cidr(self, prefixlen: int = 24) -> str:
         """Gets unused CIDR that excludes the reserved CIDRs.
 
-        We basically start with a 10.0. network to find a subnet that does not overlap
-        # with either the reserved_cidrs or currently allocated CIDRs
-        # currently supports /24 subnets
+        We look for the first subnet in the 10.0.0.0/8, 172.16.0.0/12 and
+        192.168.0.0/16 networks that does not overlap with either the reserved
+        CIDRs or currently allocated CIDRs
         """
         reserved_cidrs = self._resource_conf.os_reserved_networks
         self._logger.info(f"reserved CIDRs: {reserved_cidrs}")
 
-        blacklist_cidrs = self._api.Subnet.get_used_cidrs()
-        blacklist_cidrs.update(reserved_cidrs)
-        self._logger.info(f"blacklist CIDRs: {blacklist_cidrs}")
-        blacklist_subnets = set(map(ip_network, blacklist_cidrs))
-
-        found_subnet = _get_first_free_subnet(blacklist_subnets)
+        allocator = self._allocator
+        with allocator.sync_lock:
+            changed_since = allocator.changed_since
+            blacklist_cidrs, synced_at = self._api.Subnet.get_cidrs_changed_since(
+                changed_since
+            )
+            blacklist_cidrs.update(reserved_cidrs)
+            if changed_since:
+                added = allocator.update(blacklist_cidrs, synced_at)
+                removed = 0
+            else:
+                added, removed = allocator.sync(blacklist_cidrs, synced_at)
+            self._logger.info(
+                f"blacklist CIDRs changed since {changed_since}: "
+                f"{len(blacklist_cidrs)}, added {added}, removed {removed}"
+            )
+            found_subnet = allocator.allocate(prefixlen)
         cidr = str(found_subnet)
         self._logger.info(f"Resolved CIDR: {cidr}")
         return cidr
@@ -136,16 +154,3 @@ class QVlanNetwork:
             expected_cidr = str(subnet_cidr_data.cidr)
             exists = any(subnet.cidr == expected_cidr for subnet in subnets)
         return exists
-
-
-def _get_first_free_subnet(
-    blacklist_subnets: set[IPv4Network | IPv6Network],
-) -> IPv4Network:
-    first_second_octet_dict = {10: range(256), 172: range(16, 32), 192: (168,)}
-    for first_octet, second_octets in first_second_octet_dict.items():
-        for second_octet in second_octets:
-            for third_octet in range(256):
-                subnet = IPv4Network(f"{first_octet}.{second_octet}.{third_octet}.0/24")
-                if not any(map(subnet.overlaps, blacklist_subnets)):
-                    return subnet
-    raise FreeSubnetIsNotFound
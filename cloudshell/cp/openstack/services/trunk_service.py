@@ -1,21 +1,28 @@
 from __future__ import annotations
 
+from concurrent import futures as ft
 from contextlib import suppress
 from logging import Logger
-from threading import Lock
-from typing import ClassVar
 
 import attr
 
 from cloudshell.cp.openstack.exceptions import PortNotFound, TrunkNotFound
 from cloudshell.cp.openstack.os_api.api import OsApi
-from cloudshell.cp.openstack.os_api.models import Instance, Interface, Network
+from cloudshell.cp.openstack.os_api.models import Instance, Interface, Network, Port
+from cloudshell.cp.openstack.os_api.session_pool import MAX_WORKERS
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
+from cloudshell.cp.openstack.utils.tracing import propagate
+
+
+@attr.s(auto_attribs=True)
+class _TrunkNames:
+    trunk_port: str
+    trunk: str
+    sub_port: str
 
 
 @attr.s(auto_attribs=True)
 class QTrunk:
-    LOCK: ClassVar[Lock] = Lock()
     _api: OsApi
     _resource_conf: OSResourceConfig
     _logger: Logger
@@ -69,7 +76,7 @@ class QTrunk:
         trunk_name = self._get_trunk_name(prefix, suffix)
         sub_port_name = self._get_sub_port_name(prefix, vlan_network, suffix)
 
-        trunk_network = self._api.Network.get(self._trunk_network_id)
+        trunk_network = self._api.Network.get_static(self._trunk_network_id)
         trunk_port = self._api.Port.find_or_create(trunk_port_name, trunk_network)
         trunk = self._api.Trunk.find_or_create(trunk_name, trunk_port)
         sub_port = self._api.Port.find_or_create(
@@ -77,10 +84,97 @@ class QTrunk:
         )
         trunk.add_sub_port(sub_port)
 
-        with self.LOCK:
-            iface = instance.attach_port(trunk_port)
+        iface = instance.attach_port(trunk_port)
         return iface
 
+    def connect_trunks(
+        self, items: list[tuple[Instance, Network, str]], max_workers: int = MAX_WORKERS
+    ) -> list[Interface | Exception]:
+        """Connect many VLAN networks to trunks with bulk requests.
+
+        Missed trunk ports and sub ports are created with one request each and
+        all sub ports of a trunk are added with one request. Trunk ports are
+        attached to the instances in parallel.
+        :param items: an instance, a VLAN network and an action id
+        :return: an interface or an error for every item
+        """
+        self._logger.info(f"Creating trunks for {len(items)} VLAN networks")
+        names = [
+            self._get_names(instance, net, action_id)
+            for instance, net, action_id in items
+        ]
+        results: list[Interface | Exception]
+        try:
+            trunk_ports = self._create_trunks(items, names)
+        except Exception as e:
+            self._logger.exception("Failed to create trunks")
+            results = [e] * len(items)
+        else:
+            workers = max(1, min(max_workers, len(items)))
+            with ft.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        propagate(instance.attach_port),
+                        trunk_ports[item_names.trunk_port],
+                    )
+                    for (instance, _, _), item_names in zip(items, names)
+                ]
+            results = [future.exception() or future.result() for future in futures]
+
+        for (instance, vlan_network, action_id), result in zip(items, results):
+            if isinstance(result, Exception):
+                self._logger.error(
+                    f"Failed to connect a trunk to the {instance}: {result}"
+                )
+                try:
+                    self.remove_trunk(instance, vlan_network, action_id)
+                except Exception:
+                    self._logger.exception("Failed to remove a trunk")
+        return results
+
+    def _create_trunks(
+        self, items: list[tuple[Instance, Network, str]], names: list[_TrunkNames]
+    ) -> dict[str, Port]:
+        trunk_network = self._api.Network.get_static(self._trunk_network_id)
+        trunk_ports = self._api.Port.find_or_create_many(
+            {item_names.trunk_port: (trunk_network, None) for item_names in names}
+        )
+        sub_ports = self._api.Port.find_or_create_many(
+            {
+                item_names.sub_port: (
+                    vlan_network,
+                    trunk_ports[item_names.trunk_port].mac_address,
+                )
+                for (_, vlan_network, _), item_names in zip(items, names)
+            }
+        )
+        trunks = self._api.Trunk.find_or_create_many(
+            {
+                item_names.trunk: trunk_ports[item_names.trunk_port]
+                for item_names in names
+            }
+        )
+        trunk_sub_ports: dict[str, list[tuple[Port, int]]] = {}
+        for (_, vlan_network, _), item_names in zip(items, names):
+            sub_port = sub_ports[item_names.sub_port]
+            trunk_sub_ports.setdefault(item_names.trunk, []).append(
+                (sub_port, vlan_network.vlan_id)
+            )
+        for trunk_name, ports in trunk_sub_ports.items():
+            trunks[trunk_name].add_sub_ports(ports)
+        return trunk_ports
+
+    def _get_names(
+        self, instance: Instance, vlan_network: Network, action_id: str
+    ) -> _TrunkNames:
+        prefix = self._get_name_prefix(instance)
+        suffix = self._get_trunk_suffix(action_id)
+        return _TrunkNames(
+            trunk_port=self._get_trunk_port_name(prefix, suffix),
+            trunk=self._get_trunk_name(prefix, suffix),
+            sub_port=self._get_sub_port_name(prefix, vlan_network, suffix),
+        )
+
     def remove_trunk(
         self, instance: Instance, vlan_network: Network, action_id: str
     ) -> None:
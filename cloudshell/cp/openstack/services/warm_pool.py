@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import time
+from concurrent import futures as ft
+from logging import Logger
+from threading import Lock
+from typing import NamedTuple
+
+import attr
+
+from cloudshell.cp.openstack.exceptions import InstanceNotFound
+from cloudshell.cp.openstack.models import OSNovaImgDeployApp
+from cloudshell.cp.openstack.os_api.api import OsApi
+from cloudshell.cp.openstack.os_api.models import Instance, Port
+from cloudshell.cp.openstack.os_api.models.instance import InstanceStatus
+from cloudshell.cp.openstack.resource_config import OSResourceConfig
+from cloudshell.cp.openstack.utils.instance_helpers import MGMT_IFACE_NAME
+from cloudshell.cp.openstack.utils.metrics import METRICS
+from cloudshell.cp.openstack.utils.udev import get_udev_rules
+
+WARM_POOL_PREFIX = "warm-pool-"
+CLAIMS_METRIC = "openstack_warm_pool_claims"
+
+
+class PoolKey(NamedTuple):
+    image_id: str
+    flavor: str
+    availability_zone: str
+    mgmt_net_id: str
+
+
+def get_pool_tag(key: PoolKey) -> str:
+    """Name of the mgmt ports of the free members, the same in all processes."""
+    digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()[:16]
+    return f"{WARM_POOL_PREFIX}{digest}"
+
+
+def _get_boot_time(instance: Instance) -> float:
+    # members are named with the tag and the boot time
+    _, _, boot_time = instance.name.rpartition("-")
+    return float(boot_time) if boot_time.isdigit() else 0.0
+
+
+@attr.s(auto_attribs=True)
+class PoolMember:
+    instance: Instance
+    mgmt_port: Port
+    tag: str
+
+
+class WarmPool:
+    """Process-wide state of the warm pools.
+
+    Refills run in the background, one refill of a pool at a time. Hits and
+    misses of the claims are counted here and in the process metrics.
+    """
+
+    DEFAULT_MAX_WORKERS = 4
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self._executor = ft.ThreadPoolExecutor(
+            max_workers, thread_name_prefix="warm-pool"
+        )
+        self._lock = Lock()
+        self._refills: dict[tuple, ft.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def count_claim(self, hit: bool) -> None:
+        METRICS.inc(CLAIMS_METRIC, result="hit" if hit else "miss")
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def submit_refill(self, key: tuple, func, *args) -> ft.Future:
+        """Run the refill unless the refill of the pool is running."""
+        with self._lock:
+            future = self._refills.get(key)
+            if future is None or future.done():
+                future = self._refills[key] = self._executor.submit(func, *args)
+            return future
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Wait for the running refills, e.g. before the process exits."""
+        with self._lock:
+            futures = list(self._refills.values())
+        ft.wait(futures, timeout)
+
+    def clear(self) -> None:
+        self.wait()
+        with self._lock:
+            self._refills.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            claims = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / claims if claims else 0.0,
+                "refills": sum(not f.done() for f in self._refills.values()),
+            }
+
+
+WARM_POOL = WarmPool()
+
+
+@attr.s(auto_attribs=True)
+class WarmPoolService:
+    """Pools of pre-booted instances by the image, flavor, zone and mgmt network.
+
+    A free member is an active instance which mgmt port is named with the tag
+    of its pool. A deploy claims a member by renaming the port to the mgmt
+    port name. Neutron compares the revision number of the port, so only one
+    of the driver processes that claim the member at the same time gets it.
+    Members boot with the udev rules only, user data can't be changed later.
+    Instances are named with the tag when they boot, so members of a refill
+    that died before naming the ports are found and removed later.
+    """
+
+    DEFAULT_MAX_AGE = 24 * 60 * 60
+    # longer than the wait of the refill, the refill that boots it is dead then
+    BOOT_TIMEOUT = 60 * 60
+
+    _api: OsApi
+    _resource_conf: OSResourceConfig
+    _logger: Logger
+    _pool: WarmPool = WARM_POOL
+    _max_age: float = DEFAULT_MAX_AGE
+
+    @property
+    def size(self) -> int:
+        return self._resource_conf.warm_pool_size
+
+    def get_key(self, deploy_app: OSNovaImgDeployApp) -> PoolKey:
+        return PoolKey(
+            deploy_app.image_id,
+            deploy_app.instance_flavor,
+            deploy_app.availability_zone or "",
+            self._resource_conf.os_mgmt_net_id,
+        )
+
+    def is_suitable(self, deploy_app: OSNovaImgDeployApp) -> bool:
+        """A member can't get a fixed IP, an affinity group or user data."""
+        return bool(
+            self.size > 0
+            and not deploy_app.private_ip
+            and not deploy_app.affinity_group_id
+            and not deploy_app.pre_create_mgmt_port
+            and not deploy_app.user_data
+            and deploy_app.auto_udev
+        )
+
+    def claim(self, deploy_app: OSNovaImgDeployApp) -> PoolMember | None:
+        """Claim a free member and refill the pool in the background.
+
+        Errors are logged, the app boots its own instance then.
+        """
+        key = self.get_key(deploy_app)
+        try:
+            member = self._claim(get_pool_tag(key))
+        except Exception:
+            self._logger.warning("Unable to claim a warm pool member", exc_info=True)
+            member = None
+        self._pool.count_claim(hit=member is not None)
+        self._logger.debug(f"Warm pool stats: {self._pool.stats()}")
+        self.schedule_refill(key)
+        return member
+
+    def release(self, member: PoolMember) -> None:
+        """Return the claimed member to the pool, remove it if that fails."""
+        self._logger.debug(f"Returning the {member.instance} to the warm pool")
+        try:
+            if member.mgmt_port.rename_if_unchanged(member.tag):
+                return
+        except Exception:
+            self._logger.warning("Unable to return the warm pool member", exc_info=True)
+        member.instance.remove()
+
+    def schedule_refill(self, key: PoolKey) -> ft.Future:
+        return self._pool.submit_refill(
+            (self._api.cache_scope, key), self._refill_in_background, key
+        )
+
+    def refill(self, key: PoolKey) -> int:
+        """Remove stale members and boot the missed ones.
+
+        :return: number of the booted members
+        """
+        tag = get_pool_tag(key)
+        missed = self.size - self._reap(tag)
+        if missed <= 0:
+            return 0
+        self._logger.info(f"Booting {missed} members of the warm pool {tag}")
+        image = self._api.Image.get(key.image_id)
+        flavor = self._api.Flavor.find_first(key.flavor)
+        network = self._api.Network.get_static(key.mgmt_net_id)
+        instances = []
+        try:
+            for _ in range(missed):
+                instances.append(
+                    self._api.Instance.create(
+                        f"{tag}-{int(time.time())}",
+                        image,
+                        flavor,
+                        network=network,
+                        availability_zone=key.availability_zone or None,
+                        user_data=get_udev_rules(),
+                        wait_for_active=False,
+                    )
+                )
+            errors = self._api.Instance.wait_for_status_many(
+                instances, InstanceStatus.ACTIVE
+            )
+            ports = self._api.Port.find_by_device_ids(inst.id for inst in instances)
+        except Exception:
+            for inst in instances:
+                inst.remove()
+            raise
+
+        booted = 0
+        for inst, error in zip(instances, errors):
+            if error or len(ports[inst.id]) != 1:
+                self._logger.warning(f"The warm pool member {inst} failed: {error}")
+                inst.remove()
+            else:
+                ports[inst.id][0].name = tag  # the member is free now
+                booted += 1
+        return booted
+
+    def _refill_in_background(self, key: PoolKey) -> None:
+        try:
+            # the command that scheduled the refill can finish and close its API
+            api = OsApi.from_config(self._resource_conf, self._logger)
+            attr.evolve(self, api=api).refill(key)
+        except Exception:
+            self._logger.exception(f"Unable to refill the warm pool {key}")
+
+    def _claim(self, tag: str) -> PoolMember | None:
+        ports = self._api.Port.find_all(tag)
+        random.shuffle(ports)  # processes that claim at once try other members
+        for port in ports:
+            if not port.rename_if_unchanged(MGMT_IFACE_NAME):
+                continue  # claimed by another process
+            try:
+                instance = self._api.Instance.get(port.device_id)
+            except InstanceNotFound:
+                port.remove()
+                continue
+            if self._is_usable(instance):
+                return PoolMember(instance, port, tag)
+            instance.remove()
+        return None
+
+    def _reap(self, tag: str) -> int:
+        """Remove members that aren't usable or which refill died.
+
+        Free members are claimed before removing, so a deploy can't get them.
+        :return: number of the free and booting members
+        """
+        instances = self._api.Instance.find_all_by_prefix(f"{tag}-")
+        ports = self._api.Port.find_by_device_ids(inst.id for inst in instances)
+        members = 0
+        for instance in instances:
+            port_names = {port.name: port for port in ports[instance.id]}
+            port = port_names.get(tag)
+            if MGMT_IFACE_NAME in port_names:
+                continue  # claimed, the deploy renames it
+            if port is None:
+                if self._is_booting(instance):
+                    members += 1  # booted by a running refill
+                else:
+                    self._logger.info(f"Removing the abandoned member {instance}")
+                    instance.remove()
+            elif self._is_usable(instance):
+                members += 1
+            elif port.rename_if_unchanged(f"{tag}-stale"):
+                self._logger.info(f"Removing the stale warm pool member {instance}")
+                instance.remove()
+        return members
+
+    def _is_booting(self, instance: Instance) -> bool:
+        return time.time() - _get_boot_time(instance) < self.BOOT_TIMEOUT
+
+    def _is_usable(self, instance: Instance) -> bool:
+        return (
+            instance.status is InstanceStatus.ACTIVE
+            and time.time() - _get_boot_time(instance) < self._max_age
+        )
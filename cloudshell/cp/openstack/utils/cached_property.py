@@ -1,11 +1,17 @@
+import threading
 from typing import Callable
 
+_LOCKS_ATTR = "_cached_property_locks"
+
 
 class cached_property:
     """A cached property.
 
     The property that is only computed once per instance and then replaces
     itself with an ordinary attribute. Deleting the attribute resets the property.
+    Threads that get the property at the same time wait for the first one, so
+    the value is computed once. The lock is per instance and property, other
+    instances and properties are not blocked.
     Source: https://github.com/bottlepy/bottle/blob/0.11.5/bottle.py#L175
     """
 
@@ -17,5 +23,12 @@ class cached_property:
         if obj is None:
             # We're being accessed from the class itself, not from an object
             return self
-        value = obj.__dict__[self.func.__name__] = self.func(obj)
-        return value
+        name = self.func.__name__
+        # setdefault is atomic, so all threads get the same lock
+        locks = obj.__dict__.setdefault(_LOCKS_ATTR, {})
+        with locks.setdefault(name, threading.RLock()):
+            try:
+                return obj.__dict__[name]
+            except KeyError:
+                value = obj.__dict__[name] = self.func(obj)
+                return value
@@ -1,39 +1,47 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Generator
+import hashlib
+import json
+from dataclasses import astuple, replace
+from ipaddress import ip_network
+from typing import TYPE_CHECKING, Iterable, NamedTuple
 
 from novaclient.v2.servers import Server as NovaServer
 
 from cloudshell.cp.openstack.exceptions import MgmtIfaceIsMissed
 
 if TYPE_CHECKING:
+    from cloudshell.cp.openstack.models.deploy_app import SecurityGroupRule
     from cloudshell.cp.openstack.os_api.models import Instance, Interface, SecurityGroup
 
+MGMT_IFACE_NAME = "mgmt-port"
+SHARED_SECURITY_GROUP_PREFIX = "sg-shared-"
 
-def find_floating_ip(instance: NovaServer, mac: str) -> str | None:
-    return next(_get_ips_of_instance(instance, mac, "floating"), None)
 
+class MacAddresses(NamedTuple):
+    fixed: str | None
+    floating: str | None
 
-def find_fixed_ip(instance: NovaServer, mac: str) -> str | None:
-    return next(_get_ips_of_instance(instance, mac, "fixed"), None)
 
+def get_ip_index(instance: NovaServer, version: int = 4) -> dict[str, MacAddresses]:
+    """Build MAC -> first fixed and floating IPs index from the server body.
 
-def _get_ips_of_instance(
-    instance: NovaServer, mac: str, type_: str, version: int = 4
-) -> Generator[str, None, None]:
-    instance.get()
-    for net_name, addr_dicts in instance.addresses.items():
+    It doesn't get the server, refresh it before if IPs could be changed.
+    """
+    ips: dict[str, dict[str, str]] = {}
+    for addr_dicts in instance.addresses.values():
         for addr_dict in addr_dicts:
-            if (
-                addr_dict["OS-EXT-IPS-MAC:mac_addr"] == mac
-                and addr_dict["OS-EXT-IPS:type"] == type_
-                and addr_dict["version"] == version
-            ):
-                yield addr_dict["addr"]
+            if addr_dict["version"] == version:
+                mac_ips = ips.setdefault(addr_dict["OS-EXT-IPS-MAC:mac_addr"], {})
+                mac_ips.setdefault(addr_dict["OS-EXT-IPS:type"], addr_dict["addr"])
+    return {
+        mac: MacAddresses(mac_ips.get("fixed"), mac_ips.get("floating"))
+        for mac, mac_ips in ips.items()
+    }
 
 
 def get_mgmt_iface_name(inst: Instance) -> str:
-    return "mgmt-port"
+    return MGMT_IFACE_NAME
 
 
 def get_mgmt_iface(inst: Instance) -> Interface:
@@ -45,10 +53,43 @@ def get_mgmt_iface(inst: Instance) -> Interface:
 
 
 def get_instance_security_group_name(inst: Instance) -> str:
-    return f"sg-{inst.name}"
+    return get_security_group_name(inst.name)
+
+
+def get_security_group_name(instance_name: str) -> str:
+    return f"sg-{instance_name}"
+
+
+def get_shared_security_group_name(rules: Iterable[SecurityGroupRule]) -> str:
+    """Name of the group that apps with the same rules share."""
+    data = json.dumps(list(map(astuple, normalize_security_group_rules(rules))))
+    digest = hashlib.sha256(data.encode()).hexdigest()[:16]
+    return f"{SHARED_SECURITY_GROUP_PREFIX}{digest}"
+
+
+def normalize_security_group_rules(
+    rules: Iterable[SecurityGroupRule],
+) -> list[SecurityGroupRule]:
+    """Sorted rules without duplicates, the same rules give the same list."""
+    normalized = {}
+    for rule in rules:
+        rule = replace(
+            rule,
+            cidr=str(ip_network(rule.cidr, strict=False)),
+            protocol=rule.protocol.lower(),
+        )
+        normalized[astuple(rule)] = rule
+    return [normalized[key] for key in sorted(normalized)]
+
+
+def is_shared_security_group(sg: SecurityGroup) -> bool:
+    return sg.name.startswith(SHARED_SECURITY_GROUP_PREFIX)
 
 
 def get_instance_security_group(inst: Instance) -> SecurityGroup | None:
+    """The group of the instance or the shared one it uses."""
     name = get_instance_security_group_name(inst)
-    sg = inst.find_security_group(name)
-    return sg
+    for sg in inst.security_groups:
+        if sg.name == name or is_shared_security_group(sg):
+            return sg
+    return None
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from logging import Logger
+from time import perf_counter
+from typing import Generator, Hashable
+
+import attr
+
+from cloudshell.cp.openstack.utils.metrics import METRICS, MetricsRegistry
+
+LOCK_WAIT_METRIC = "openstack_lock_wait_seconds"
+LOCK_HOLD_METRIC = "openstack_lock_hold_seconds"
+LOCK_CONTENTIONS_METRIC = "openstack_lock_contentions"
+
+# the holder the last contended thread waited for, by the lock name
+_last_holders: dict[str, str] = {}
+_last_holders_lock = threading.Lock()
+
+
+class InstrumentedLock:
+    """Reentrant lock that records its stats in the metrics registry.
+
+    Wait and hold times are observed for the outermost acquisition. A
+    contention is counted when the lock is held by another thread, the holder
+    is remembered to be shown in the stats.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        key: Hashable | None = None,
+        registry: MetricsRegistry = METRICS,
+    ):
+        self.name = name
+        self.key = key
+        self.holder: str | None = None
+        self._registry = registry
+        self._lock = threading.RLock()
+        self._owner: int | None = None
+        self._depth = 0
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._owner == threading.get_ident():
+            self._lock.acquire()
+            self._depth += 1
+            return True
+
+        start = perf_counter()
+        if not self._lock.acquire(blocking=False):
+            holder = self.holder
+            if holder:
+                with _last_holders_lock:
+                    _last_holders[self.name] = holder
+            self._registry.inc(LOCK_CONTENTIONS_METRIC, lock=self.name)
+            if not blocking or not self._lock.acquire(timeout=timeout):
+                return False
+
+        self._acquired_at = perf_counter()
+        self._owner = threading.get_ident()
+        self._depth = 1
+        self.holder = self._describe_holder()
+        self._registry.observe(
+            LOCK_WAIT_METRIC, self._acquired_at - start, lock=self.name
+        )
+        return True
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth:
+            self._lock.release()
+            return
+
+        hold_time = perf_counter() - self._acquired_at
+        self._owner = self.holder = None
+        self._lock.release()
+        self._registry.observe(LOCK_HOLD_METRIC, hold_time, lock=self.name)
+
+    def __enter__(self) -> InstrumentedLock:
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def _describe_holder(self) -> str:
+        holder = threading.current_thread().name
+        if self.key is not None:
+            holder += f" for {self.key!r}"
+        return holder
+
+
+@attr.s(auto_attribs=True, frozen=True, str=False)
+class LockStats:
+    acquisitions: int = 0
+    contentions: int = 0
+    wait_time: float = 0.0
+    hold_time: float = 0.0
+
+    def __sub__(self, other: LockStats) -> LockStats:
+        return LockStats(
+            self.acquisitions - other.acquisitions,
+            self.contentions - other.contentions,
+            self.wait_time - other.wait_time,
+            self.hold_time - other.hold_time,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"acquired {self.acquisitions} times, contended {self.contentions} times,"
+            f" waited {self.wait_time:.3f} s, held {self.hold_time:.3f} s"
+        )
+
+
+def get_lock_stats(registry: MetricsRegistry = METRICS) -> dict[str, LockStats]:
+    """Stats of every lock from the start of the process."""
+    snapshot = registry.snapshot()
+
+    def by_lock(samples: list[dict]) -> dict[str, dict]:
+        return {sample["labels"]["lock"]: sample for sample in samples}
+
+    waits = by_lock(snapshot["histograms"].get(LOCK_WAIT_METRIC, []))
+    holds = by_lock(snapshot["histograms"].get(LOCK_HOLD_METRIC, []))
+    contentions = by_lock(snapshot["counters"].get(LOCK_CONTENTIONS_METRIC, []))
+    return {
+        name: LockStats(
+            acquisitions=wait["count"],
+            contentions=int(contentions.get(name, {}).get("value", 0)),
+            wait_time=wait["sum"],
+            hold_time=holds.get(name, {}).get("sum", 0.0),
+        )
+        for name, wait in waits.items()
+    }
+
+
+@contextmanager
+def lock_stats_logged(
+    logger: Logger, registry: MetricsRegistry = METRICS
+) -> Generator[None, None, None]:
+    """Log stats of the locks that were used while the block ran.
+
+    Locks are shared by the process, so the stats include other commands that
+    ran at the same time.
+    """
+    before = get_lock_stats(registry)
+    try:
+        yield
+    finally:
+        with _last_holders_lock:
+            last_holders = dict(_last_holders)
+        for name, stats in sorted(get_lock_stats(registry).items()):
+            stats -= before.get(name, LockStats())
+            if stats.acquisitions:
+                msg = f"Lock '{name}' stats: {stats}"
+                if stats.contentions and name in last_holders:
+                    msg += f", last waited for {last_holders[name]}"
+                logger.debug(msg)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from contextlib import ExitStack, contextmanager
+from threading import Lock
+from typing import Generator, Hashable, Iterable
+
+import attr
+
+from cloudshell.cp.openstack.utils.instrumented_lock import InstrumentedLock
+
+
+@attr.s(auto_attribs=True)
+class _Entry:
+    lock: InstrumentedLock
+    users: int = 0
+
+
+class KeyedLock:
+    """Separate reentrant lock for every key.
+
+    Threads that work with different keys don't block each other. A lock is
+    removed when the last thread that uses it releases it. Stats of locks for
+    all keys are recorded under the name.
+    """
+
+    def __init__(self, name: str = "keyed lock"):
+        self.name = name
+        self._lock = Lock()
+        self._entries: dict[Hashable, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def holders(self) -> dict[Hashable, str]:
+        """Threads that hold locks now, by the key."""
+        with self._lock:
+            entries = list(self._entries.items())
+        return {key: entry.lock.holder for key, entry in entries if entry.lock.holder}
+
+    @contextmanager
+    def __call__(self, key: Hashable) -> Generator[None, None, None]:
+        with self._lock:
+            try:
+                entry = self._entries[key]
+            except KeyError:
+                entry = self._entries[key] = _Entry(InstrumentedLock(self.name, key))
+            entry.users += 1
+        try:
+            with entry.lock:
+                yield
+        finally:
+            with self._lock:
+                entry.users -= 1
+                if not entry.users:
+                    del self._entries[key]
+
+    @contextmanager
+    def many(self, keys: Iterable[Hashable]) -> Generator[None, None, None]:
+        """Lock all keys, they are locked in the sorted order to avoid deadlocks."""
+        with ExitStack() as stack:
+            for key in sorted(set(keys)):
+                stack.enter_context(self(key))
+            yield
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+from typing import Callable, Generator, Tuple
+
+import attr
+
+from cloudshell.cp.openstack.utils.tracing import span
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# seconds, the long ones are for waiting for instance statuses
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+def _get_labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    values = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return f"{{{values}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+@attr.s(auto_attribs=True)
+class Histogram:
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    bucket_counts: list[int] = attr.ib()
+    count: int = 0
+    sum: float = 0.0  # noqa: A003
+
+    @bucket_counts.default
+    def _bucket_counts_default(self) -> list[int]:
+        return [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        i = bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            self.bucket_counts[i] += 1
+
+    def cumulative(self) -> dict[str, int]:
+        """Observations less or equal to every bucket, as in OpenMetrics."""
+        result = {}
+        total = 0
+        for le, count in zip(self.buckets, self.bucket_counts):
+            total += count
+            result[repr(le)] = total
+        result["+Inf"] = self.count
+        return result
+
+
+class MetricsRegistry:
+    """Counters and latency histograms labelled by name-value pairs.
+
+    Histograms count observations, so they are also the counters of calls.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._lock = Lock()
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = _get_labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = _get_labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            try:
+                histogram = series[key]
+            except KeyError:
+                histogram = series[key] = Histogram(self._buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Generator[None, None, None]:
+        """Observe the duration of the block in the histogram.
+
+        Errors are counted in the `{name}_errors` counter with the error type.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc(f"{name}_errors", error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+
+    def get_counter(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_get_labels(labels), 0)
+
+    def get_histogram(self, name: str, **labels: str) -> Histogram | None:
+        with self._lock:
+            return self._histograms.get(name, {}).get(_get_labels(labels))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict[str, dict[str, list[dict]]]:
+        with self._lock:
+            counters = {
+                name: [
+                    {"labels": dict(labels), "value": value}
+                    for labels, value in series.items()
+                ]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": histogram.cumulative(),
+                    }
+                    for labels, histogram in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def to_openmetrics(self) -> str:
+        lines = []
+        snapshot = self.snapshot()
+        for name, series in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {name} counter")
+            for sample in series:
+                labels = _format_labels(_get_labels(sample["labels"]))
+                lines.append(f"{name}_total{labels} {sample['value']}")
+        for name, series in sorted(snapshot["histograms"].items()):
+            lines.append(f"# TYPE {name} histogram")
+            lines.append(f"# UNIT {name} seconds")
+            for sample in series:
+                labels = _get_labels(sample["labels"])
+                for le, count in sample["buckets"].items():
+                    bucket_labels = _format_labels((*labels, ("le", le)))
+                    lines.append(f"{name}_bucket{bucket_labels} {count}")
+                lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {sample['sum']}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_openmetrics())
+        os.replace(tmp_path, path)
+
+
+METRICS = MetricsRegistry()
+OPERATION_METRIC = "openstack_operation"
+
+
+def timed(func: Callable) -> Callable:
+    """Time the model method in the process metrics and in a tracing span.
+
+    For class methods it should be applied under the @classmethod decorator.
+    """
+    operation = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with METRICS.timer(OPERATION_METRIC, operation=operation), span(operation):
+            return func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import suppress
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Callable
+
+PROFILE_DIR_ENV = "CP_OPENSTACK_PROFILE_DIR"
+PROFILE_MAX_MB_ENV = "CP_OPENSTACK_PROFILE_MAX_MB"
+DEFAULT_MAX_MB = 100
+TOP_FUNCTIONS = 40
+
+_local = threading.local()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_started = False
+
+
+def _get_max_size() -> int:
+    try:
+        max_mb = float(os.environ.get(PROFILE_MAX_MB_ENV, DEFAULT_MAX_MB))
+    except ValueError:
+        max_mb = DEFAULT_MAX_MB
+    return int(max_mb * 1024 * 1024)
+
+
+def rotate(directory: Path, max_size: int) -> list[Path]:
+    """Remove the oldest files until the directory fits the size.
+
+    :return: removed files
+    """
+    files = sorted(
+        (p for p in directory.iterdir() if p.is_file()),
+        key=lambda p: p.stat().st_mtime,
+    )
+    total = sum(p.stat().st_size for p in files)
+    removed = []
+    for path in files:
+        if total <= max_size:
+            break
+        total -= path.stat().st_size
+        path.unlink()
+        removed.append(path)
+    return removed
+
+
+def _start_tracemalloc() -> int:
+    """Trace allocations while any command is profiled.
+
+    The peak is reset, so it's the peak of this command or of commands that
+    run at the same time.
+    :return: traced memory at the start
+    """
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        if not _tracemalloc_users and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_started = True
+        _tracemalloc_users += 1
+        if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+            tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _stop_tracemalloc() -> int:
+    """Stop tracing after the last profiled command, unless it traced before.
+
+    :return: peak traced memory
+    """
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        _tracemalloc_users -= 1
+        if not _tracemalloc_users and _tracemalloc_started:
+            tracemalloc.stop()
+            _tracemalloc_started = False
+        return peak
+
+
+class CommandProfile:
+    """cProfile and tracemalloc for one command call.
+
+    cProfile profiles only the calling thread, wall and CPU time are for the
+    whole process so they include worker threads. The peak memory is the
+    highest traced memory of the process during the command above the memory
+    at its start.
+    """
+
+    def __init__(self, command: str, directory: Path):
+        self.command = command
+        self.directory = directory
+        self._profile: cProfile.Profile | None = cProfile.Profile()
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+        self._memory_start = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.peak_memory = 0
+
+    def __enter__(self) -> CommandProfile:
+        self._memory_start = _start_tracemalloc()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        try:
+            self._profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one profiler in the process, e.g. a command
+            # in another thread
+            self._profile = None
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._profile:
+            self._profile.disable()
+        self.wall_time = time.perf_counter() - self._wall_start
+        self.cpu_time = time.process_time() - self._cpu_start
+        self.peak_memory = max(_stop_tracemalloc() - self._memory_start, 0)
+        with suppress(OSError):  # the command shouldn't fail because of profiling
+            self.dump()
+
+    def dump(self) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        name = f"{timestamp}-{self.command}-{os.getpid()}-{threading.get_ident()}"
+        path = self.directory / f"{name}.prof"
+        stream = io.StringIO()
+        if self._profile:
+            self._profile.dump_stats(str(path))
+            stats = pstats.Stats(self._profile, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        else:
+            stream.write("cProfile: skipped, another profiler is active\n")
+        summary = (
+            f"command: {self.command}\n"
+            f"wall time: {self.wall_time:.3f} s\n"
+            f"CPU time: {self.cpu_time:.3f} s\n"
+            f"peak memory: {self.peak_memory / 1024 / 1024:.2f} MB\n\n"
+        )
+        path.with_suffix(".txt").write_text(summary + stream.getvalue())
+        rotate(self.directory, _get_max_size())
+        return path
+
+
+def profiled(command: str) -> Callable:
+    """Profile the command when the profile directory is set in the environment.
+
+    Profiles of nested commands are a part of the outer one.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            directory = os.environ.get(PROFILE_DIR_ENV)
+            if not directory or getattr(_local, "active", False):
+                return func(*args, **kwargs)
+
+            _local.active = True
+            try:
+                with CommandProfile(command, Path(directory)):
+                    return func(*args, **kwargs)
+            finally:
+                _local.active = False
+
+        return wrapper
+
+    return decorator
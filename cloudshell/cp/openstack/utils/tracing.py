@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import wraps
+from typing import Any, Callable, ContextManager, Generator, TypeVar
+
+import attr
+
+TRACE_FILE_ENV = "CP_OPENSTACK_TRACE_FILE"
+T = TypeVar("T")
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+@attr.s(auto_attribs=True)
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    attributes: dict[str, Any] = attr.ib(factory=dict)
+    start_time: int = attr.ib(factory=time.time_ns)
+    end_time: int | None = None
+    status: str = "OK"
+    status_message: str = ""
+
+    def set_attribute(self, name: str, value: Any) -> None:
+        self.attributes[name] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        end_time = self.end_time or time.time_ns()
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time_unix_nano": self.start_time,
+            "end_time_unix_nano": end_time,
+            "duration_ms": (end_time - self.start_time) / 1e6,
+            "status": {"code": self.status, "message": self.status_message},
+            "attributes": self.attributes,
+        }
+
+
+class JsonLinesExporter:
+    """Append finished spans to the file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+class Tracer:
+    """Spans in the OpenTelemetry style without a collector.
+
+    Tracing is enabled when the file path is set in the environment variable.
+    A span started inside another span in the same thread or context is its
+    child, use `propagate` to continue the span in other threads.
+    """
+
+    def __init__(self, env_var: str = TRACE_FILE_ENV):
+        self._env_var = env_var
+        self._lock = threading.Lock()
+        self._exporter: JsonLinesExporter | None = None
+
+    def get_exporter(self) -> JsonLinesExporter | None:
+        path = os.environ.get(self._env_var)
+        if not path:
+            return None
+        with self._lock:
+            if self._exporter is None or self._exporter.path != path:
+                self._exporter = JsonLinesExporter(path)
+            return self._exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Generator[Span | None, None, None]:
+        exporter = self.get_exporter()
+        if exporter is None:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            attributes={"thread": threading.current_thread().name, **attributes},
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "ERROR"
+            span.status_message = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time = time.time_ns()
+            exporter.export(span)
+
+
+TRACER = Tracer()
+
+
+def span(name: str, **attributes: Any) -> ContextManager[Span | None]:
+    return TRACER.span(name, **attributes)
+
+
+def traced(name: str) -> Callable:
+    """Run the function inside a span with the name."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def propagate(func: Callable[..., T]) -> Callable[..., T]:
+    """Run the function in another thread as a part of the current span.
+
+    Wrap the function for every call, one context can't run in many threads.
+    """
+    context = copy_context()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,304 @@
+"""API calls of every operation against the local OpenStack stand-in.
+
+The budgets are the calls the operations make now. A change that adds
+round-trips fails here, lower the budget when a change removes them.
+The status polls are counted on purpose, the waiting operation polls in its
+own thread. The operations run one at a time, so the polls are only for
+their instances.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from cloudshell.shell.flows.connectivity.models.connectivity_model import (
+    ConnectionModeEnum,
+    ConnectivityTypeEnum,
+)
+
+from cloudshell.cp.openstack.flows import (
+    ConnectivityFlow,
+    DeployAppFromNovaImgFlow,
+    GetVMDetailsFlow,
+    delete_instance,
+    refresh_ip,
+)
+from cloudshell.cp.openstack.flows.save_restore_app import SaveRestoreAppFlow
+from cloudshell.cp.openstack.models.deploy_app import SecurityGroupRule
+from cloudshell.cp.openstack.os_api.call_ledger import record_calls
+from cloudshell.cp.openstack.services.warm_pool import WARM_POOL
+
+from tests.openstack_standin import OpenStackState, StandInServer
+from tests.standin_cloud import (
+    Cloud,
+    ParsedRequestService,
+    get_deployed_app,
+    get_vlan_action,
+)
+
+BUDGETS = {
+    "deploy": {"nova": 7, "neutron": 8, "glance": 2},
+    "deploy with mgmt port": {"nova": 6, "neutron": 8, "glance": 2},
+    "deploy from warm pool": {"nova": 5, "neutron": 7, "glance": 0},
+    "set access VLAN": {"nova": 2, "neutron": 4},
+    "set trunk VLAN": {"nova": 4, "neutron": 13},
+    "remove access VLAN": {"nova": 3, "neutron": 4},
+    "remove trunk VLAN": {"nova": 1, "neutron": 10},
+    "VM details": {"nova": 2, "neutron": 1},
+    "refresh IP": {"nova": 1, "neutron": 1},
+    "delete": {"nova": 4, "neutron": 4},
+    "delete with mgmt port": {"nova": 4, "neutron": 5},
+    "save": {"nova": 6, "neutron": 0},
+}
+
+
+@pytest.fixture(scope="module")
+def cloud():
+    with StandInServer(OpenStackState()) as server:
+        yield Cloud.start(server, logging.getLogger("api call budgets"))
+
+
+@pytest.fixture()
+def vm_id(cloud) -> str:
+    return cloud.deploy()
+
+
+def _apply_connectivity(cloud: Cloud, *actions) -> None:
+    flow = ConnectivityFlow(cloud.conf, ParsedRequestService(), cloud.logger, cloud.api)
+    response = json.loads(flow.apply_connectivity(list(actions)))
+    for result in response["driverResponse"]["actionResults"]:
+        assert result["success"], result["errorMessage"]
+
+
+def _assert_budget(operation: str, ledger) -> None:
+    counts = ledger.by_service()
+    over = {
+        service: counts[service]
+        for service, budget in BUDGETS[operation].items()
+        if counts[service] > budget
+    }
+    calls = "\n".join(f"{n} x {call}" for call, n in ledger.by_endpoint().items())
+    assert not over, f"{operation} is over the budget {over}, calls:\n{calls}"
+
+
+def test_deploy(cloud):
+    with record_calls() as ledger:
+        cloud.deploy()
+
+    _assert_budget("deploy", ledger)
+
+
+def test_deploy_counts_status_polls(cloud, monkeypatch):
+    monkeypatch.setattr(cloud.server.state, "boot_time", 0.2)
+    watcher = cloud.api.status_watcher
+    monkeypatch.setattr(watcher, "MIN_DELAY", 0.05)
+    polls_before = watcher.polls
+
+    with record_calls() as ledger:
+        cloud.deploy()
+
+    polls = watcher.polls - polls_before
+    assert polls
+    assert ledger.by_endpoint()["nova GET /servers/detail"] == polls
+
+
+def test_deploy_with_many_inbound_ports(cloud):
+    deploy_app = cloud.get_deploy_app()
+    deploy_app.inbound_ports = [
+        SecurityGroupRule.from_str(str(port)) for port in range(8000, 8020)
+    ]
+    flow = DeployAppFromNovaImgFlow(
+        cloud.conf, cloud.cancellation_manager, cloud.api, cloud.logger
+    )
+
+    with record_calls() as ledger:
+        result = flow._deploy(SimpleNamespace(deploy_app=deploy_app))
+
+    assert result.success, result.errorMessage
+    _assert_budget("deploy", ledger)
+    # the rules are added with one request, the group is added at boot
+    assert ledger.by_endpoint()["neutron POST /v2.0/security-group-rules"] == 1
+    assert "nova POST /servers/{id}/action" not in ledger.by_endpoint()
+    sg_ids = cloud.server.state.servers[result.vmUuid]["security_groups"]
+    rules = [
+        rule
+        for rule in cloud.server.state.neutron["security_group_rule"].values()
+        if rule["security_group_id"] in sg_ids
+    ]
+    assert len(rules) == 20
+
+
+def test_deploy_with_mgmt_port(cloud):
+    with record_calls() as ledger:
+        vm_id = cloud.deploy(pre_create_mgmt_port=True)
+
+    _assert_budget("deploy with mgmt port", ledger)
+    assert "neutron PUT /v2.0/ports/{id}" not in ledger.by_endpoint()
+    # the port is created with the group, it isn't added after the boot
+    assert "nova POST /servers/{id}/action" not in ledger.by_endpoint()
+    (port,) = cloud.server.state.server_ports(vm_id)
+    assert port["name"] == "mgmt-port"
+    assert len(port["security_groups"]) == 2  # the default one and the app's
+
+    with record_calls() as ledger:
+        delete_instance(cloud.api, get_deployed_app(vm_id, pre_create_mgmt_port=True))
+
+    _assert_budget("delete with mgmt port", ledger)
+    # Nova keeps the ports it didn't create
+    assert port["id"] not in cloud.server.state.neutron["port"]
+
+
+def test_deploy_from_warm_pool(cloud, monkeypatch):
+    monkeypatch.setattr(cloud.conf, "warm_pool_size", 1)
+    flow = DeployAppFromNovaImgFlow(
+        cloud.conf, cloud.cancellation_manager, cloud.api, cloud.logger
+    )
+    deploy_app = cloud.get_deploy_app()
+    flow._warm_pool.refill(flow._warm_pool.get_key(deploy_app))
+
+    with record_calls() as ledger:
+        result = flow._deploy(SimpleNamespace(deploy_app=deploy_app))
+    WARM_POOL.wait()
+
+    assert result.success, result.errorMessage
+    _assert_budget("deploy from warm pool", ledger)
+    # no boot and no wait, the member is claimed and renamed
+    assert "nova POST /servers" not in ledger.by_endpoint()
+    assert ledger.by_endpoint()["neutron PUT /v2.0/ports/{id}"] == 1
+
+
+def test_shared_security_group(cloud):
+    state = cloud.server.state
+    vm_ids = [cloud.deploy(shared_security_group=True) for _ in range(2)]
+
+    (sg_id,) = (
+        sg["id"]
+        for sg in state.neutron["security_group"].values()
+        if sg["name"].startswith("sg-shared-")
+    )
+    assert all(sg_id in state.servers[id_]["security_groups"] for id_ in vm_ids)
+
+    delete_instance(cloud.api, get_deployed_app(vm_ids[0]))
+    assert sg_id in state.neutron["security_group"]
+
+    delete_instance(cloud.api, get_deployed_app(vm_ids[1]))
+    assert sg_id not in state.neutron["security_group"]
+
+
+def test_duplicated_shared_security_group(cloud):
+    state = cloud.server.state
+    vm_id = cloud.deploy(shared_security_group=True)
+    (sg,) = (
+        sg
+        for sg in state.neutron["security_group"].values()
+        if sg["name"].startswith("sg-shared-")
+    )
+    # another process created the group at the same time
+    state.create_neutron(
+        "security_group", {"name": sg["name"], "created_at": "9999-01-01T00:00:00Z"}
+    )
+
+    other_vm_id = cloud.deploy(shared_security_group=True)
+
+    for id_ in (vm_id, other_vm_id):
+        assert sg["id"] in state.servers[id_]["security_groups"]
+
+
+@pytest.mark.parametrize(
+    ("mode", "operation"),
+    (
+        (ConnectionModeEnum.ACCESS, "set access VLAN"),
+        (ConnectionModeEnum.TRUNK, "set trunk VLAN"),
+    ),
+)
+def test_set_vlan(cloud, vm_id, mode, operation):
+    action = get_vlan_action(vm_id, 100, mode)
+
+    with record_calls() as ledger:
+        _apply_connectivity(cloud, action)
+
+    _assert_budget(operation, ledger)
+    _apply_connectivity(
+        cloud,
+        get_vlan_action(
+            vm_id, 100, mode, ConnectivityTypeEnum.REMOVE_VLAN, action.action_id
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    ("mode", "operation"),
+    (
+        (ConnectionModeEnum.ACCESS, "remove access VLAN"),
+        (ConnectionModeEnum.TRUNK, "remove trunk VLAN"),
+    ),
+)
+def test_remove_vlan(cloud, vm_id, mode, operation):
+    action = get_vlan_action(vm_id, 101, mode)
+    _apply_connectivity(cloud, action)
+    remove_action = get_vlan_action(
+        vm_id, 101, mode, ConnectivityTypeEnum.REMOVE_VLAN, action.action_id
+    )
+
+    with record_calls() as ledger:
+        _apply_connectivity(cloud, remove_action)
+
+    _assert_budget(operation, ledger)
+
+
+def test_vm_details(cloud, vm_id):
+    flow = GetVMDetailsFlow(
+        cloud.conf, cloud.cancellation_manager, cloud.api, cloud.logger
+    )
+    request = SimpleNamespace(deployed_apps=[get_deployed_app(vm_id)])
+
+    with record_calls() as ledger:
+        flow.get_vm_details(request)
+
+    _assert_budget("VM details", ledger)
+
+
+def test_refresh_ip(cloud, vm_id):
+    deployed_app = get_deployed_app(vm_id)
+    deployed_app.public_ip = ""
+    deployed_app.update_private_ip = Mock()
+    deployed_app.update_public_ip = Mock()
+
+    with record_calls() as ledger:
+        refresh_ip(cloud.api, deployed_app, cloud.conf)
+
+    _assert_budget("refresh IP", ledger)
+    deployed_app.update_public_ip.assert_called_once()
+
+
+def test_delete(cloud, vm_id):
+    with record_calls() as ledger:
+        delete_instance(cloud.api, get_deployed_app(vm_id))
+
+    _assert_budget("delete", ledger)
+    assert vm_id not in cloud.server.state.servers
+
+
+def test_save(cloud, vm_id):
+    flow = SaveRestoreAppFlow(
+        cloud.conf, cloud.logger, cloud.cancellation_manager, cloud.api
+    )
+    params = SimpleNamespace(
+        sourceVmUuid=vm_id,
+        sourceAppName="app",
+        deploymentPathAttributes=[
+            SimpleNamespace(
+                attributeName="Deploy.Behavior during save",
+                attributeValue="Power Off",
+            )
+        ],
+    )
+
+    with record_calls() as ledger:
+        flow.save_apps([SimpleNamespace(actionId="action id", actionParams=params)])
+
+    _assert_budget("save", ledger)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+from threading import Event, Lock
 from unittest.mock import Mock
 
 import pytest
@@ -18,6 +20,7 @@ from cloudshell.cp.openstack.models.connectivity_models import OsConnectivityAct
 from cloudshell.cp.openstack.os_api.models import NetworkType
 from cloudshell.cp.openstack.services.network_service import QVlanNetwork
 from cloudshell.cp.openstack.services.trunk_service import QTrunk
+from cloudshell.cp.openstack.utils.tracing import TRACE_FILE_ENV
 
 
 @pytest.fixture()
@@ -323,3 +326,121 @@ def test_remove_vlan_flow_existed_network(
 
     # we do not remove existed network
     assert len(list(os_api_v2.Network.all())) == 2
+
+
+@pytest.fixture()
+def set_vlan_actions(create_connectivity_action):
+    actions = []
+    for i in range(4):
+        action = create_connectivity_action(
+            10 + i,
+            ConnectionModeEnum.ACCESS,
+            False,
+            f"vm uuid {i}",
+            ConnectivityTypeEnum.SET_VLAN,
+        )
+        action.action_id = f"action_id_{i}"
+        actions.append(action)
+    return actions
+
+
+@pytest.mark.parametrize(("max_workers", "expected_concurrency"), ((16, 4), (1, 1)))
+def test_apply_connectivity_in_parallel(
+    resource_conf,
+    logger,
+    os_api_v2,
+    set_vlan_actions,
+    max_workers,
+    expected_concurrency,
+):
+    service = Mock(get_actions=Mock(return_value=set_vlan_actions))
+    flow = ConnectivityFlow(resource_conf, service, logger, os_api_v2, max_workers)
+    lock = Lock()
+    running = []
+    concurrency = []
+
+    def prepare_vlan_network(action):
+        with lock:
+            running.append(action)
+            concurrency.append(len(running))
+        # the first action finishes the last, time.sleep is patched in tests
+        Event().wait(0.3 if action is set_vlan_actions[0] else 0.1)
+        with lock:
+            running.remove(action)
+        instance = Mock(name="Instance")
+        instance.attach_network.return_value = Mock(mac_address="mac")
+        return instance, Mock(name="VLAN Network")
+
+    flow._prepare_vlan_network = prepare_vlan_network
+    result = json.loads(flow.apply_connectivity("request"))
+
+    action_results = result["driverResponse"]["actionResults"]
+    assert [r["actionId"] for r in action_results] == [
+        action.action_id for action in set_vlan_actions
+    ]
+    assert max(concurrency) == expected_concurrency
+
+
+def test_actions_continue_the_request_span(
+    resource_conf, logger, os_api_v2, set_vlan_actions, tmp_path, monkeypatch
+):
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(TRACE_FILE_ENV, str(trace_file))
+    service = Mock(get_actions=Mock(return_value=set_vlan_actions))
+    flow = ConnectivityFlow(resource_conf, service, logger, os_api_v2)
+    flow._prepare_vlan_network = Mock(side_effect=ValueError("no VM"))
+
+    flow.apply_connectivity("request")
+
+    spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    (apply_span,) = [s for s in spans if s["name"] == "apply connectivity"]
+    set_spans = [s for s in spans if s["name"] == "set VLAN"]
+    assert len(set_spans) == len(set_vlan_actions)
+    assert all(s["parent_id"] == apply_span["span_id"] for s in set_spans)
+
+
+def test_apply_connectivity_connects_trunks_in_bulk(
+    connectivity_flow,
+    neutron_emu,
+    nova,
+    instance,
+    create_connectivity_action,
+    resource_conf,
+    os_api_v2,
+    monkeypatch,
+):
+    resource_conf.os_trunk_net_id = "trunk net id"
+    neutron_emu.emu_add_network(resource_conf.os_trunk_net_id, "trunk name")
+    actions = []
+    port_ids = []
+    for i in range(2):
+        action = create_connectivity_action(
+            20 + i,
+            ConnectionModeEnum.TRUNK,
+            False,
+            "vm uuid",
+            ConnectivityTypeEnum.SET_VLAN,
+        )
+        action.action_id = f"conn-{i}_vlan{i}-id"
+        actions.append(action)
+        prefix = QTrunk._get_name_prefix(instance)
+        suffix = QTrunk._get_trunk_suffix(action.action_id)
+        port_ids.append(f"{QTrunk._get_trunk_port_name(prefix, suffix)}-id")
+    instance.interface_list.return_value = [
+        Mock(name="trunk", port_id=port_id, mac_addr="mac") for port_id in port_ids
+    ]
+    connectivity_flow._parse_connectivity_request_service = Mock(
+        get_actions=Mock(return_value=actions)
+    )
+    create_port = Mock(wraps=neutron_emu.create_port)
+    monkeypatch.setattr(neutron_emu, "create_port", create_port)
+
+    result = json.loads(connectivity_flow.apply_connectivity("request"))
+
+    action_results = result["driverResponse"]["actionResults"]
+    assert [r["actionId"] for r in action_results] == [a.action_id for a in actions]
+    assert all(r["success"] for r in action_results)
+    # trunk ports and sub ports are created with one request each
+    assert create_port.call_count == 2
+    assert len(list(os_api_v2.Trunk.all())) == 2
+    assert all(len(list(trunk.sub_ports)) == 1 for trunk in os_api_v2.Trunk.all())
@@ -3,6 +3,7 @@ from unittest.mock import Mock, call
 import pytest
 
 from cloudshell.cp.openstack.flows import delete_instance
+from cloudshell.cp.openstack.utils.instrumented_lock import InstrumentedLock
 
 
 @pytest.fixture
@@ -26,8 +27,9 @@ def mgmt_iface(inst):
 
 @pytest.fixture
 def inst_sg(inst):
-    sg = Mock(name="Security Group")
-    inst.find_security_group.return_value = sg
+    default_sg, sg = Mock(), Mock()
+    default_sg.name, sg.name = "default", f"sg-{inst.name}"
+    inst.security_groups = [default_sg, sg]
     return sg
 
 
@@ -38,7 +40,6 @@ def test_delete(api, deployed_app, inst, mgmt_iface, inst_sg):
     inst.assert_has_calls(
         [
             call.find_interface_by_port_name("mgmt-port"),
-            call.find_security_group(f"sg-{inst.name}"),
             call.remove_security_group(inst_sg),
             call.remove(),
         ]
@@ -50,3 +51,30 @@ def test_delete(api, deployed_app, inst, mgmt_iface, inst_sg):
         ]
     )
     inst_sg.assert_has_calls([call.remove()])
+
+
+def test_delete_with_shared_security_group(api, deployed_app, inst, mgmt_iface):
+    sg = Mock(name="Security Group")
+    sg.name = "sg-shared-0123456789abcdef"
+    inst.security_groups = [sg]
+
+    delete_instance(api, deployed_app)
+
+    inst.remove_security_group.assert_called_once_with(sg)
+    sg.remove_if_unused.assert_called_once_with()
+    sg.remove.assert_not_called()
+
+
+def test_delete_logs_lock_stats(api, deployed_app, inst, mgmt_iface, inst_sg):
+    lock = InstrumentedLock("delete test lock")
+
+    def remove():
+        with lock:
+            pass
+
+    inst.remove.side_effect = remove
+
+    delete_instance(api, deployed_app)
+
+    messages = [c.args[0] for c in api.logger.debug.call_args_list]
+    assert any(msg.startswith("Lock 'delete test lock' stats") for msg in messages)
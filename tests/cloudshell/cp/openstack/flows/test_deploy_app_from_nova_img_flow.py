@@ -1,8 +1,15 @@
+import json
+import threading
 from unittest.mock import Mock, PropertyMock
 
 import pytest
 
+from cloudshell.cp.core.request_actions import DeployVMRequestActions
+from cloudshell.cp.core.request_actions.models import DeployAppResult
+
+from cloudshell.cp.openstack.exceptions import InstanceErrorState
 from cloudshell.cp.openstack.flows import DeployAppFromNovaImgFlow
+from cloudshell.cp.openstack.os_api.models import Instance
 
 
 @pytest.fixture()
@@ -57,3 +64,166 @@ def test_deploy_failed(deploy_app_flow, deploy_vm_request_actions, api):
     assert result.actionId == deploy_vm_request_actions.deploy_app.actionId
     assert result.success is False
     assert result.errorMessage == "cannot create instance"
+
+
+def test_deploy_boots_with_security_group(
+    deploy_app_flow, deploy_vm_request_actions, api
+):
+    sg = api.SecurityGroup.create.return_value
+    inst = Mock()
+    type(inst).interfaces = PropertyMock(side_effect=_set_interfaces([Mock()]))
+    api.Instance.create.return_value = inst
+
+    result = deploy_app_flow._deploy(deploy_vm_request_actions)
+
+    assert result.success is True
+    name = api.Instance.create.call_args.args[0]
+    api.SecurityGroup.create.assert_called_once_with(f"sg-{name}")
+    sg.add_rules.assert_called_once()
+    assert api.Instance.create.call_args.kwargs["security_groups"] == [sg]
+    inst.add_security_group.assert_not_called()
+
+
+def test_deploy_with_mgmt_port_creates_port_with_security_group(
+    deploy_app_flow, deploy_vm_request_actions, api
+):
+    deploy_vm_request_actions.deploy_app.pre_create_mgmt_port = True
+    sg = api.SecurityGroup.create.return_value
+    default_sg = api.SecurityGroup.get_default.return_value
+    inst = Mock()
+    api.Instance.create.return_value = inst
+
+    result = deploy_app_flow._deploy(deploy_vm_request_actions)
+
+    assert result.success is True
+    port_kwargs = api.Port.create.call_args.kwargs
+    assert port_kwargs["security_groups"] == [default_sg, sg]
+    assert api.Instance.create.call_args.kwargs["security_groups"] == []
+    inst.add_security_group.assert_not_called()
+
+
+def test_deploy_with_mgmt_port_adds_floating_ip_while_booting(
+    deploy_app_flow, deploy_vm_request_actions, api
+):
+    deploy_app = deploy_vm_request_actions.deploy_app
+    deploy_app.pre_create_mgmt_port = True
+    deploy_app.add_floating_ip = True
+    fip_created = threading.Event()
+    api.FloatingIp.create.side_effect = lambda *args: fip_created.set() or Mock()
+    inst = Mock()
+
+    def create_instance(name, *args, **kwargs):
+        assert fip_created.wait(5)
+        return inst
+
+    api.Instance.create.side_effect = create_instance
+
+    result = deploy_app_flow._deploy(deploy_vm_request_actions)
+
+    assert result.success is True
+    port = api.Port.create.return_value
+    assert api.Instance.create.call_args.kwargs["port"] is port
+    api.FloatingIp.create.assert_called_once_with(api.Subnet.get_static(), port)
+    api.Interface.from_port.assert_called_once_with(inst, port)
+    inst.refresh.assert_called_once_with()
+
+
+def test_deploy_failed_removes_security_group(
+    deploy_app_flow, deploy_vm_request_actions, api
+):
+    deploy_vm_request_actions.deploy_app.add_floating_ip = True
+    api.FloatingIp.create.side_effect = ValueError("no floating IPs")
+    inst = Mock(spec=Instance)
+    type(inst).interfaces = PropertyMock(side_effect=_set_interfaces([Mock()]))
+    api.Instance.create.return_value = inst
+    sg = api.SecurityGroup.create.return_value
+
+    result = deploy_app_flow._deploy(deploy_vm_request_actions)
+
+    assert result.success is False
+    # detached before the instance is removed, Neutron can't remove a used group
+    inst.remove.assert_called_once_with([sg])
+    sg.remove.assert_called_once_with()
+
+
+def test_deploy_batch(deploy_app_flow, deploy_app_request_factory, cs_api, api):
+    request_actions_list = [
+        DeployVMRequestActions.from_request(
+            deploy_app_request_factory(action_id=f"action {i}"), cs_api
+        )
+        for i in range(3)
+    ]
+    instances = []
+    for _ in range(3):
+        inst = Mock(spec=Instance)
+        type(inst).interfaces = PropertyMock(side_effect=_set_interfaces([Mock()]))
+        instances.append(inst)
+    api.Instance.create.side_effect = instances
+    api.Instance.wait_for_status_many.return_value = [
+        None,
+        InstanceErrorState(instances[1], "fault"),
+        None,
+    ]
+
+    results = deploy_app_flow._deploy_batch(request_actions_list)
+
+    assert api.Instance.create.call_count == 3
+    for call_ in api.Instance.create.call_args_list:
+        assert call_.kwargs["wait_for_active"] is False
+    api.Instance.wait_for_status_many.assert_called_once()
+    assert api.Instance.wait_for_status_many.call_args.args[0] == instances
+    instances[0].remove.assert_not_called()
+    instances[1].remove.assert_called_once_with([api.SecurityGroup.create()])
+    instances[2].remove.assert_not_called()
+
+    assert [r.actionId for r in results] == ["action 0", "action 1", "action 2"]
+    assert [r.success for r in results] == [True, False, True]
+    assert results[0].vmUuid == instances[0].id
+    assert "fault" in results[1].errorMessage
+
+
+def test_deploy_batch_responses(
+    deploy_app_flow, deploy_app_request_factory, cs_api, monkeypatch
+):
+    request_actions_list = [
+        DeployVMRequestActions.from_request(
+            deploy_app_request_factory(action_id=f"action {i}"), cs_api
+        )
+        for i in range(2)
+    ]
+    deploy_results = [
+        DeployAppResult(actionId="action 0", success=True, vmUuid="uid"),
+        DeployAppResult(actionId="action 1", success=False, errorMessage="error"),
+    ]
+    monkeypatch.setattr(
+        deploy_app_flow, "_deploy_batch", Mock(return_value=deploy_results)
+    )
+
+    responses = deploy_app_flow.deploy_batch(request_actions_list)
+
+    results = [json.loads(r)["driverResponse"]["actionResults"][0] for r in responses]
+    assert [r["actionId"] for r in results] == ["action 0", "action 1"]
+    assert [r["success"] for r in results] == [True, False]
+
+
+def test_deploy_batch_failed_to_start(
+    deploy_app_flow, deploy_app_request_factory, cs_api, api
+):
+    request_actions_list = [
+        DeployVMRequestActions.from_request(
+            deploy_app_request_factory(action_id=f"action {i}"), cs_api
+        )
+        for i in range(2)
+    ]
+    inst = Mock()
+    type(inst).interfaces = PropertyMock(side_effect=_set_interfaces([Mock()]))
+    api.Instance.create.side_effect = [ValueError("cannot create instance"), inst]
+    api.Instance.wait_for_status_many.return_value = [None]
+
+    results = deploy_app_flow._deploy_batch(request_actions_list)
+
+    assert api.Instance.wait_for_status_many.call_args.args[0] == [inst]
+    assert results[0].success is False
+    assert results[0].errorMessage == "cannot create instance"
+    assert results[1].success is True
+    assert results[1].vmUuid == inst.id
@@ -15,7 +15,8 @@ def test_power_on(power_flow, nova, deployed_app, instance):
 
     nova.servers.get.assert_called_once_with(deployed_app.vmdetails.uid)
     instance.start.assert_called_once_with()
-    instance.get.assert_called_once_with()
+    nova.servers.list.assert_called_once()
+    instance.get.assert_not_called()
 
 
 def test_power_off(power_flow, nova, deployed_app, instance):
@@ -25,4 +26,5 @@ def test_power_off(power_flow, nova, deployed_app, instance):
 
     nova.servers.get.assert_called_once_with(deployed_app.vmdetails.uid)
     instance.stop.assert_called_once_with()
-    instance.get.assert_called_once_with()
+    nova.servers.list.assert_called_once()
+    instance.get.assert_not_called()
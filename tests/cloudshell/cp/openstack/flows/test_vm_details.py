@@ -1,4 +1,5 @@
-from unittest.mock import patch
+import json
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -22,6 +23,7 @@ def test_get_vm_details(get_vm_details_flow, deployed_app, nova, instance, os_ap
     vm_details_mock.assert_called_once_with(
         os_api_v2.Instance(instance),
         get_vm_details_flow._resource_config.os_mgmt_net_id,
+        None,
     )
     assert result == vm_details_mock()
 
@@ -35,3 +37,82 @@ def test_get_vm_details_failed(get_vm_details_flow, deployed_app, instance):
 
     assert result.errorMessage == "error getting vm details"
     assert result.appName == instance.name
+
+
+def test_get_vm_details_uses_request_cache(
+    get_vm_details_flow, deployed_app, os_api_v2
+):
+    caches = []
+    request_actions = Mock(deployed_apps=[deployed_app, deployed_app])
+
+    with patch(
+        "cloudshell.cp.openstack.flows.vm_details.vm_details_provider.create"
+    ) as vm_details_mock:
+        vm_details_mock.side_effect = lambda *_: caches.append(os_api_v2.request_cache)
+        get_vm_details_flow.get_vm_details(request_actions)
+
+    assert len(caches) == 2
+    assert caches[0] is caches[1] is not None
+    assert os_api_v2.request_cache is None
+
+
+def test_get_vm_details_bulk(
+    get_vm_details_flow, nova, nova_instance_factory, neutron_emu, deployed_app
+):
+    os_instances = []
+    for i in range(3):
+        os_instance = nova_instance_factory("active")
+        os_instance.id = f"vm-{i}"
+        os_instance.name = f"vm {i}"
+        os_instance.addresses = {
+            "net": [
+                {
+                    "OS-EXT-IPS-MAC:mac_addr": f"mac-{i}",
+                    "OS-EXT-IPS:type": "fixed",
+                    "version": 4,
+                    "addr": f"192.168.1.{i}",
+                }
+            ]
+        }
+        os_instances.append(os_instance)
+        neutron_emu.emu_add_port(f"port-{i}", "", "net-id", f"mac-{i}", f"vm-{i}")
+    # a port without IP isn't in the addresses, but it's the VM's interface
+    neutron_emu.emu_add_port("no-ip-port", "", "net-id", "no-ip-mac", "vm-0")
+    nova.servers.get.side_effect = {inst.id: inst for inst in os_instances}.get
+    neutron_emu.emu_add_network("net-id", "net name")
+    neutron_emu.list_ports = Mock(wraps=neutron_emu.list_ports)
+    neutron_emu.list_networks = Mock(wraps=neutron_emu.list_networks)
+    neutron_emu.show_network = Mock(wraps=neutron_emu.show_network)
+    neutron_emu.show_port = Mock(wraps=neutron_emu.show_port)
+
+    apps = []
+    for i in range(3):
+        app = Mock(vmdetails=Mock(uid=f"vm-{i}"))
+        app.name = f"vm {i}"
+        apps.append(app)
+    with patch(
+        "cloudshell.cp.openstack.flows.vm_details.vm_details_provider._get_vm_instance_data",  # noqa: E501
+        return_value=[],
+    ):
+        result = json.loads(
+            get_vm_details_flow.get_vm_details(Mock(deployed_apps=apps))
+        )
+
+    assert [r["appName"] for r in result] == ["vm 0", "vm 1", "vm 2"]
+    for i, vm_details in enumerate(result):
+        iface, *other_ifaces = vm_details["vmNetworkData"]
+        assert iface["interfaceId"] == f"mac-{i}"
+        assert iface["privateIpAddress"] == f"192.168.1.{i}"
+    ifaces = result[0]["vmNetworkData"]
+    assert [iface["interfaceId"] for iface in ifaces] == ["mac-0", "no-ip-mac"]
+    assert ifaces[1]["privateIpAddress"] is None
+    assert all(len(r["vmNetworkData"]) == 1 for r in result[1:])
+    nova.servers.list.assert_not_called()
+    assert nova.servers.get.call_count == 3
+    neutron_emu.list_ports.assert_called_once_with(device_id=["vm-0", "vm-1", "vm-2"])
+    neutron_emu.list_networks.assert_called_once_with(id=["net-id"])
+    neutron_emu.show_network.assert_not_called()
+    neutron_emu.show_port.assert_not_called()
+    for os_instance in os_instances:
+        os_instance.interface_list.assert_not_called()
+        os_instance.get.assert_not_called()
@@ -1,3 +1,4 @@
+import threading
 from unittest.mock import Mock
 
 import pytest
@@ -44,10 +45,26 @@ def test_create(os_api_v2, nova, glance):
         userdata=None,
         availability_zone=None,
         scheduler_hints=None,
+        security_groups=None,
     )
     instance._os_instance.delete.assert_not_called()
 
 
+def test_create_with_security_group(os_api_v2, nova, nova_instance_factory):
+    os_instance = nova_instance_factory("error")
+    nova.servers.create.return_value = os_instance
+    sg = Mock(name="Security Group")
+
+    with pytest.raises(InstanceErrorState):
+        os_api_v2.Instance.create("name", Mock(), Mock(), Mock(), security_groups=[sg])
+
+    sg_ids = nova.servers.create.call_args.kwargs["security_groups"]
+    assert sg_ids == ["default", sg.id]
+    # detached before the removal, Neutron can't remove a group in use
+    os_instance.remove_security_group.assert_called_once_with(sg.id)
+    os_instance.delete.assert_called_once_with()
+
+
 def test_instance_started_with_error(os_api_v2, nova, nova_instance_factory):
     name = "instance name"
     image = Mock(name="image")
@@ -62,6 +79,74 @@ def test_instance_started_with_error(os_api_v2, nova, nova_instance_factory):
     os_instance.delete.assert_called_once_with()
 
 
+def test_create_without_waiting(os_api_v2, nova, nova_instance_factory):
+    os_instance = nova_instance_factory("building")
+    nova.servers.create.return_value = os_instance
+
+    instance = os_api_v2.Instance.create(
+        "name", Mock(), Mock(), Mock(), wait_for_active=False
+    )
+
+    assert instance.status is InstanceStatus.BUILDING
+    os_instance.get.assert_not_called()
+
+
+def test_wait_for_status_many(os_api_v2, nova, nova_instance_factory):
+    active = os_api_v2.Instance(nova_instance_factory("active"))
+    building = os_api_v2.Instance(
+        nova_instance_factory(("building", "building", "active"))
+    )
+    error = os_api_v2.Instance(nova_instance_factory(("building", "error")))
+    nova.servers.list.return_value = [
+        active._os_instance,
+        building._os_instance,
+        error._os_instance,
+    ]
+
+    errors = os_api_v2.Instance.wait_for_status_many(
+        [active, building, error], InstanceStatus.ACTIVE
+    )
+
+    assert errors[:2] == [None, None]
+    assert isinstance(errors[2], InstanceErrorState)
+    assert nova.servers.list.call_count == 2
+    for inst in (active, building, error):
+        inst._os_instance.get.assert_not_called()
+
+
+def test_get_many(os_api_v2, nova, nova_instance_factory):
+    first, second = nova_instance_factory("active"), nova_instance_factory("active")
+    servers = {"first": first, "second": second}
+
+    def get(id_):
+        if id_ not in servers:
+            raise nova_exc.NotFound(404)
+        return servers[id_]
+
+    nova.servers.get.side_effect = get
+
+    instances = os_api_v2.Instance.get_many(["first", "second", "removed"])
+
+    assert {id_: inst._os_instance for id_, inst in instances.items()} == servers
+    # not the newest servers of the project, only the wanted ones
+    nova.servers.list.assert_not_called()
+    assert nova.servers.get.call_count == 3
+
+
+def test_get_many_in_parallel(os_api_v2, nova, nova_instance_factory):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def get(id_):
+        barrier.wait()  # fails if the GETs are sequential
+        return nova_instance_factory("active")
+
+    nova.servers.get.side_effect = get
+
+    instances = os_api_v2.Instance.get_many(["1", "2", "3"])
+
+    assert sorted(instances) == ["1", "2", "3"]
+
+
 def test_attach_network(simple_network, nova, api_instance: Instance):
     api_instance.attach_network(simple_network)
 
@@ -167,3 +252,41 @@ def test_power_off_wait(nova_instance_factory, os_api_v2):
 
     os_instance.stop.assert_called_once()
     os_instance.start.assert_not_called()
+
+
+def _address(mac, ip, type_, version=4):
+    return {
+        "OS-EXT-IPS-MAC:mac_addr": mac,
+        "OS-EXT-IPS:type": type_,
+        "version": version,
+        "addr": ip,
+    }
+
+
+def test_ip_lookups_use_server_snapshot(api_instance, instance):
+    instance.addresses = {
+        "net1": [
+            _address("mac1", "192.168.1.2", "fixed"),
+            _address("mac1", "fe80::1", "fixed", version=6),
+            _address("mac1", "10.1.1.2", "floating"),
+        ],
+        "net2": [_address("mac2", "192.168.2.2", "fixed")],
+    }
+
+    assert api_instance.find_fixed_ip_by_mac("mac1") == "192.168.1.2"
+    assert api_instance.find_floating_ip_by_mac("mac1") == "10.1.1.2"
+    assert api_instance.find_fixed_ip_by_mac("mac2") == "192.168.2.2"
+    assert api_instance.find_floating_ip_by_mac("mac2") is None
+    assert api_instance.find_fixed_ip_by_mac("missed mac") is None
+    instance.get.assert_not_called()
+
+
+def test_refresh_rebuilds_ip_index(api_instance, instance):
+    instance.addresses = {"net": [_address("mac", "192.168.1.2", "fixed")]}
+    assert api_instance.find_floating_ip_by_mac("mac") is None
+
+    instance.addresses["net"].append(_address("mac", "10.1.1.2", "floating"))
+    api_instance.refresh()
+
+    instance.get.assert_called_once_with()
+    assert api_instance.find_floating_ip_by_mac("mac") == "10.1.1.2"
@@ -76,6 +76,15 @@ def test_create(os_api_v2, neutron_emu, local_network):
     assert len(list(os_api_v2.Port.all())) == 1
 
 
+def test_create_with_security_groups(os_api_v2, neutron_emu, local_network):
+    sg = os_api_v2.SecurityGroup.create("sg")
+
+    os_api_v2.Port.create("name", local_network, security_groups=[sg])
+
+    (port_data,) = neutron_emu.emu_ports
+    assert port_data["security_groups"] == [sg.id]
+
+
 def test_find_or_create(os_api_v2, neutron_emu, local_network):
     name = "name"
 
@@ -134,3 +143,40 @@ def test_update_port_name(os_api_v2, neutron_emu, local_network):
     assert port.name == new_port_name
 
     assert os_api_v2.Port.get(port.id).name == new_port_name
+
+
+def test_rename_if_unchanged(os_api_v2, neutron_emu, local_network):
+    port = os_api_v2.Port.create("free", local_network)
+    same_port = os_api_v2.Port.get(port.id)
+
+    assert port.rename_if_unchanged("claimed") is True
+    assert same_port.rename_if_unchanged("claimed too") is False
+
+    assert port.name == "claimed"
+    assert os_api_v2.Port.get(port.id).name == "claimed"
+
+
+def test_create_bulk(os_api_v2, neutron_emu, local_network, monkeypatch):
+    create_port = Mock(wraps=neutron_emu.create_port)
+    monkeypatch.setattr(neutron_emu, "create_port", create_port)
+
+    ports = os_api_v2.Port.create_bulk(
+        [("port1", local_network, None), ("port2", local_network, "mac")]
+    )
+
+    create_port.assert_called_once()
+    assert [port.name for port in ports] == ["port1", "port2"]
+    assert ports[1].mac_address == "mac"
+    assert len(list(os_api_v2.Port.all())) == 2
+
+
+def test_find_or_create_many(os_api_v2, neutron_emu, local_network):
+    existed_port = os_api_v2.Port.create("port1", local_network)
+
+    ports = os_api_v2.Port.find_or_create_many(
+        {"port1": (local_network, None), "port2": (local_network, "mac")}
+    )
+
+    assert ports["port1"] == existed_port
+    assert ports["port2"].mac_address == "mac"
+    assert len(list(os_api_v2.Port.all())) == 2
@@ -1,4 +1,7 @@
+from unittest.mock import Mock
+
 import pytest
+from neutronclient.common import exceptions as neutron_exc
 
 from cloudshell.cp.openstack.exceptions import SecurityGroupNotFound
 
@@ -24,6 +27,22 @@ def test_get_not_found(os_api_v2, neutron_emu):
         os_api_v2.SecurityGroup.get("missed id")
 
 
+def test_get_default(os_api_v2, neutron_emu, monkeypatch):
+    list_sgs = Mock(return_value={"security_groups": [{"id": "id", "name": "default"}]})
+    monkeypatch.setattr(neutron_emu, "list_security_groups", list_sgs)
+
+    sg = os_api_v2.SecurityGroup.get_default("project")
+    assert os_api_v2.SecurityGroup.get_default("project") == sg
+
+    assert sg.id == "id"
+    list_sgs.assert_called_once_with(name="default", project_id="project")
+
+
+def test_get_default_not_found(os_api_v2, neutron_emu):
+    with pytest.raises(SecurityGroupNotFound):
+        os_api_v2.SecurityGroup.get_default("project")
+
+
 def test_all(os_api_v2, neutron_emu):
     id1, name1 = "id1", "name1"
     id2, name2 = "id2", "name2"
@@ -80,3 +99,85 @@ def test_add_rule(sg, neutron_emu):
     }
     assert neutron_emu.emu_security_group_rules[0] == expected_data
     assert len(neutron_emu.emu_security_group_rules) == 1
+
+
+def test_add_rules(sg, neutron_emu):
+    rules = [
+        {
+            "cidr": "0.0.0.0/0",
+            "protocol": "tcp",
+            "port_range_min": port,
+            "port_range_max": port,
+            "direction": "ingress",
+        }
+        for port in (22, 80)
+    ]
+
+    sg.add_rules(rules)
+    sg.add_rules([])  # no request
+
+    assert [r["port_range_min"] for r in neutron_emu.emu_security_group_rules] == [
+        22,
+        80,
+    ]
+    assert neutron_emu.emu_security_group_rules[0]["security_group_id"] == sg.id
+
+
+def test_find_or_create(os_api_v2, neutron_emu):
+    rules = [
+        {
+            "cidr": "0.0.0.0/0",
+            "protocol": "tcp",
+            "port_range_min": 22,
+            "port_range_max": 22,
+            "direction": "ingress",
+        }
+    ]
+
+    sg = os_api_v2.SecurityGroup.find_or_create("shared", rules)
+    found = os_api_v2.SecurityGroup.find_or_create("shared", rules)
+
+    assert found == sg
+    assert len(list(os_api_v2.SecurityGroup.all())) == 1
+    # the rules are added only to the created group
+    assert len(neutron_emu.emu_security_group_rules) == 1
+    sg.unpin()
+    found.unpin()
+
+
+def test_find_first_not_found(os_api_v2, neutron_emu):
+    with pytest.raises(SecurityGroupNotFound, match="name"):
+        os_api_v2.SecurityGroup.find_first("name")
+
+
+def test_remove_if_unused(os_api_v2, sg, neutron_emu):
+    delete = neutron_emu.delete_security_group
+    neutron_emu.delete_security_group = Mock(side_effect=neutron_exc.Conflict)
+
+    assert sg.remove_if_unused() is False
+    assert len(list(os_api_v2.SecurityGroup.all())) == 1
+
+    neutron_emu.delete_security_group = delete
+    assert sg.remove_if_unused() is True
+    assert len(list(os_api_v2.SecurityGroup.all())) == 0
+
+
+def test_find_first_picks_oldest(os_api_v2, neutron_emu):
+    # processes that created the shared group at the same time
+    for id_, created_at in (("id2", "2026-01-02T00:00:00Z"), ("id1", "2026-01-01")):
+        neutron_emu.emu_add_security_group(id_, "shared")
+        neutron_emu.emu_security_groups[-1]["created_at"] = created_at
+
+    assert os_api_v2.SecurityGroup.find_first("shared").id == "id1"
+
+
+def test_pinned_group_isnt_removed(os_api_v2, neutron_emu):
+    sg = os_api_v2.SecurityGroup.find_or_create("shared", [])
+    os_api_v2.SecurityGroup.find_or_create("shared", [])
+
+    sg.unpin()
+    assert sg.remove_if_unused() is False
+
+    sg.unpin()
+    assert sg.remove_if_unused() is True
+    assert len(list(os_api_v2.SecurityGroup.all())) == 0
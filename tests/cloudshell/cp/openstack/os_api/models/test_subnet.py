@@ -1,3 +1,5 @@
+from unittest.mock import Mock
+
 import pytest
 
 from cloudshell.cp.openstack.exceptions import SubnetNotFound
@@ -94,3 +96,22 @@ def test_getting_used_cidrs(os_api_v2, neutron_emu, local_network):
     cidrs = os_api_v2.Subnet.get_used_cidrs()
 
     assert cidrs == {cidr1, cidr2}
+
+
+def test_getting_changed_cidrs(os_api_v2, neutron_emu):
+    neutron_emu.list_subnets = Mock(
+        return_value={
+            "subnets": [
+                {"cidr": "10.0.1.0/24", "updated_at": "2026-01-01T00:00:00Z"},
+                {"cidr": "10.0.2.0/24", "updated_at": "2026-01-01T00:01:00Z"},
+            ]
+        }
+    )
+
+    cidrs, synced_at = os_api_v2.Subnet.get_cidrs_changed_since("2026-01-01T00:00:00Z")
+
+    assert cidrs == {"10.0.1.0/24", "10.0.2.0/24"}
+    assert synced_at == "2026-01-01T00:01:00Z"
+    neutron_emu.list_subnets.assert_called_once_with(
+        fields=["cidr", "updated_at"], changed_since="2026-01-01T00:00:00Z"
+    )
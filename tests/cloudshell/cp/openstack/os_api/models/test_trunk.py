@@ -140,3 +140,30 @@ def test_adding_sub_port_that_already_added(
 
     with pytest.raises(neutron_exc.Conflict):
         another_trunk.add_sub_port(sub_port1)
+
+
+def test_find_or_create_many(os_api_v2, neutron_emu, port, local_network):
+    another_port = os_api_v2.Port.create("another port", local_network)
+    existed_trunk = os_api_v2.Trunk.create("trunk1", port)
+
+    trunks = os_api_v2.Trunk.find_or_create_many(
+        {"trunk1": port, "trunk2": another_port}
+    )
+
+    assert trunks["trunk1"] == existed_trunk
+    assert trunks["trunk2"].port_id == another_port.id
+    assert len(list(os_api_v2.Trunk.all())) == 2
+
+
+def test_add_sub_ports(os_api_v2, neutron_emu, port):
+    vlan13 = os_api_v2.Network.create("net13", vlan_id=13)
+    vlan14 = os_api_v2.Network.create("net14", vlan_id=14)
+    sub_port1 = os_api_v2.Port.create("name1", vlan13, port.mac_address)
+    sub_port2 = os_api_v2.Port.create("name2", vlan14, port.mac_address)
+    trunk = os_api_v2.Trunk.create("trunk name", port)
+    trunk.add_sub_port(sub_port1)
+
+    # the first port is already added, the second is added one by one
+    trunk.add_sub_ports([(sub_port1, 13), (sub_port2, 14)])
+
+    assert list(trunk.sub_ports) == [sub_port1, sub_port2]
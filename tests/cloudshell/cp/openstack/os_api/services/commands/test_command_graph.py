@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from cloudshell.cp.openstack.os_api.commands import CommandGraph
+from cloudshell.cp.openstack.os_api.commands.rollback import RollbackCommand
+
+
+class Recorded(RollbackCommand):
+    def __init__(self, rollback_manager, cancellation_manager, name, log, fail=False):
+        super().__init__(rollback_manager, cancellation_manager)
+        self.name = name
+        self._log = log
+        self._fail = fail
+
+    def _execute(self):
+        if self._fail:
+            raise ValueError(self.name)
+        self._log.append(self.name)
+        return self.name
+
+    def rollback(self):
+        self._log.append(f"rollback {self.name}")
+
+
+def test_independent_steps_run_together():
+    barrier = threading.Barrier(2, timeout=5)
+    graph = CommandGraph()
+    first = graph.add(barrier.wait)
+    second = graph.add(barrier.wait)
+    third = graph.add(lambda: first.result + second.result, first, second)
+
+    graph.run()
+
+    assert third.result == 1
+
+
+def test_failed_step_skips_followers():
+    released = threading.Event()
+    graph = CommandGraph()
+
+    def fail():
+        raise ValueError("failed")
+
+    failed = graph.add(fail)
+    running = graph.add(lambda: released.wait(5) and "done")
+    follower = graph.add(lambda: "follower", failed)
+    threading.Timer(0.05, released.set).start()
+
+    with pytest.raises(ValueError, match="failed"):
+        graph.run()
+
+    assert running.result == "done"
+    with pytest.raises(RuntimeError):
+        follower.result
+
+
+def test_rollback_in_dependency_order(rollback_manager, cancellation_context_manager):
+    log = []
+
+    def step(name, fail=False):
+        return lambda: Recorded(
+            rollback_manager, cancellation_context_manager, name, log, fail
+        ).execute()
+
+    with pytest.raises(ValueError):
+        with rollback_manager:
+            graph = CommandGraph()
+            instance = graph.add(step("instance"))
+            sg = graph.add(step("sg"))
+            add_sg = graph.add(step("add sg"), instance, sg)
+            graph.add(step("refresh", fail=True), add_sg)
+            graph.run()
+
+    rollbacks = [name for name in log if name.startswith("rollback")]
+    assert rollbacks.index("rollback add sg") < rollbacks.index("rollback sg")
+    assert rollbacks.index("rollback add sg") < rollbacks.index("rollback instance")
+    assert len(rollbacks) == len(log) - len(rollbacks)
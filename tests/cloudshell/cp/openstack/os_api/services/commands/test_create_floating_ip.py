@@ -12,8 +12,8 @@ def api():
 
 
 @pytest.fixture()
-def iface():
-    return Mock(name="iface")
+def port():
+    return Mock(name="Port")
 
 
 @pytest.fixture()
@@ -23,7 +23,7 @@ def command(
     api,
     deploy_app,
     resource_conf,
-    iface,
+    port,
 ):
     return CreateFloatingIP(
         rollback_manager,
@@ -31,28 +31,28 @@ def command(
         api,
         resource_conf,
         deploy_app,
-        iface,
+        port,
     )
 
 
-def test_create_floating_ip(command, api, iface, deploy_app):
+def test_create_floating_ip(command, api, port, deploy_app):
     command.execute()
 
-    api.Subnet.get.assert_called_once_with(deploy_app.floating_ip_subnet_id)
-    api.FloatingIp.create.assert_called_once_with(api.Subnet.get(), iface.port)
+    api.Subnet.get_static.assert_called_once_with(deploy_app.floating_ip_subnet_id)
+    api.FloatingIp.create.assert_called_once_with(api.Subnet.get_static(), port)
 
 
 def test_create_called_with_floating_subnet_from_config(
-    command, api, iface, deploy_app, resource_conf
+    command, api, port, deploy_app, resource_conf
 ):
     deploy_app.floating_ip_subnet_id = None
 
     command.execute()
 
-    api.Subnet.get.assert_called_once_with(resource_conf.floating_ip_subnet_id)
+    api.Subnet.get_static.assert_called_once_with(resource_conf.floating_ip_subnet_id)
     api.FloatingIp.create.assert_called_once_with(
-        api.Subnet.get(resource_conf.floating_ip_subnet_id),
-        iface.port,
+        api.Subnet.get_static(resource_conf.floating_ip_subnet_id),
+        port,
     )
 
 
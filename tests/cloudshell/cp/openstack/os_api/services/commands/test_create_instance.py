@@ -2,7 +2,10 @@ from unittest.mock import Mock, call
 
 import pytest
 
-from cloudshell.cp.openstack.exceptions import PrivateIpIsNotInMgmtNetwork
+from cloudshell.cp.openstack.exceptions import (
+    FlavorNotFound,
+    PrivateIpIsNotInMgmtNetwork,
+)
 from cloudshell.cp.openstack.models import OSNovaImgDeployApp
 from cloudshell.cp.openstack.os_api.commands import CreateInstanceCommand
 from cloudshell.cp.openstack.os_api.models import Instance
@@ -32,7 +35,7 @@ def flavor(api):
 def mgmt_network(api):
     subnet = Mock(name="Subnet", cidr="10.0.1.0/24")
     net = Mock(name="Network", subnets=[subnet])
-    api.Network.get.return_value = net
+    api.Network.get_static.return_value = net
     return net
 
 
@@ -90,7 +93,7 @@ def test_create_instance(
         (
             call.Image.get(deploy_app.image_id),
             call.Flavor.find_first(deploy_app.instance_flavor),
-            call.Network.get(resource_conf.os_mgmt_net_id),
+            call.Network.get_static(resource_conf.os_mgmt_net_id),
             call.Instance.create(
                 name,
                 image,
@@ -101,6 +104,8 @@ def test_create_instance(
                 affinity_group_id=affinity_group_id,
                 user_data=expected_user_data,
                 cancellation_manager=cancellation_context_manager,
+                wait_for_active=True,
+                security_groups=[],
             ),
         )
     )
@@ -132,7 +137,7 @@ def test_create_instance_with_private_ip(
         (
             call.Image.get(deploy_app.image_id),
             call.Flavor.find_first(deploy_app.instance_flavor),
-            call.Network.get(resource_conf.os_mgmt_net_id),
+            call.Network.get_static(resource_conf.os_mgmt_net_id),
             call.Port.create(
                 "",
                 mgmt_network,
@@ -149,6 +154,8 @@ def test_create_instance_with_private_ip(
                 affinity_group_id=deploy_app.affinity_group_id,
                 user_data="",
                 cancellation_manager=cancellation_context_manager,
+                wait_for_active=True,
+                security_groups=[],
             ),
         )
     )
@@ -170,4 +177,171 @@ def test_rollback_create_instance(
 
     command.rollback()
 
-    instance.remove.assert_called_once_with()
+    instance.remove.assert_called_once_with([])
+
+
+def test_create_instance_without_waiting(
+    rollback_manager,
+    cancellation_context_manager,
+    api,
+    deploy_app,
+    resource_conf,
+    image,
+    flavor,
+    mgmt_network,
+    iface,
+):
+    command = CreateInstanceCommand(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        resource_conf,
+        wait_for_active=False,
+    )
+
+    instance = command.execute()
+
+    assert api.Instance.create.call_args.kwargs["wait_for_active"] is False
+    assert not isinstance(iface.port.name, str)
+
+    command.complete()
+
+    assert instance is api.Instance.create.return_value
+    assert iface.port.name == "mgmt-port"
+
+
+def test_create_instance_from_warm_pool(
+    rollback_manager,
+    cancellation_context_manager,
+    api,
+    deploy_app,
+    resource_conf,
+):
+    warm_pool = Mock(name="Warm Pool")
+    member = warm_pool.claim.return_value
+    sg_command = Mock(name="Create Security Group")
+    command = CreateInstanceCommand(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        resource_conf,
+        security_group=sg_command,
+        name="app-name",
+        warm_pool=warm_pool,
+    )
+
+    instance = command.execute()
+
+    warm_pool.claim.assert_called_once_with(deploy_app)
+    api.Instance.create.assert_not_called()
+    assert instance is member.instance
+    instance.rename.assert_called_once_with("app-name")
+    instance.add_security_group.assert_called_once_with(sg_command.sg)
+    api.Interface.from_port.assert_called_once_with(instance, member.mgmt_port)
+    assert command.mgmt_iface is api.Interface.from_port()
+    assert command.complete() is instance
+
+
+def test_create_instance_on_warm_pool_miss(
+    rollback_manager,
+    cancellation_context_manager,
+    api,
+    deploy_app,
+    resource_conf,
+    iface,
+):
+    warm_pool = Mock(name="Warm Pool")
+    warm_pool.claim.return_value = None
+    command = CreateInstanceCommand(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        resource_conf,
+        warm_pool=warm_pool,
+    )
+
+    instance = command.execute()
+
+    assert instance is api.Instance.create()
+    assert command.mgmt_iface is iface
+
+
+def test_create_instance_releases_member_on_failed_lookup(
+    rollback_manager,
+    cancellation_context_manager,
+    api,
+    deploy_app,
+    resource_conf,
+):
+    warm_pool = Mock(name="Warm Pool")
+    member = warm_pool.claim.return_value
+    api.Flavor.find_first.side_effect = FlavorNotFound(name="flavor")
+    command = CreateInstanceCommand(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        resource_conf,
+        warm_pool=warm_pool,
+    )
+
+    with pytest.raises(FlavorNotFound):
+        command.execute()
+
+    warm_pool.release.assert_called_once_with(member)
+    member.instance.rename.assert_not_called()
+
+
+def test_create_instance_retries_with_replaced_security_group(
+    rollback_manager,
+    cancellation_context_manager,
+    api,
+    deploy_app,
+    resource_conf,
+    iface,
+):
+    sg_command = Mock(name="Create Security Group")
+    instance = Mock(name="Instance", interfaces=[iface])
+    api.Instance.create.side_effect = [ValueError("Security group not found"), instance]
+    command = CreateInstanceCommand(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        resource_conf,
+        security_group=sg_command,
+    )
+
+    assert command.execute() is instance
+
+    sg_command.refresh.assert_called_once_with()
+    assert api.Instance.create.call_count == 2
+    sg_command.release.assert_called_once_with()
+
+
+def test_create_instance_fails_with_existing_security_group(
+    rollback_manager,
+    cancellation_context_manager,
+    api,
+    deploy_app,
+    resource_conf,
+):
+    sg_command = Mock(name="Create Security Group")
+    sg_command.refresh.return_value = False
+    api.Instance.create.side_effect = ValueError("boot failed")
+    command = CreateInstanceCommand(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        resource_conf,
+        security_group=sg_command,
+    )
+
+    with pytest.raises(ValueError, match="boot failed"):
+        command.execute()
+
+    api.Instance.create.assert_called_once()
@@ -0,0 +1,127 @@
+from unittest.mock import Mock
+
+import pytest
+
+from cloudshell.cp.openstack.exceptions import PrivateIpIsNotInMgmtNetwork
+from cloudshell.cp.openstack.os_api.commands import (
+    CreateInstanceCommand,
+    CreateMgmtPort,
+    CreateSecurityGroup,
+)
+
+
+@pytest.fixture()
+def api():
+    api = Mock(name="OS API")
+    subnet = Mock(name="Subnet", cidr="10.0.1.0/24")
+    api.Network.get_static.return_value = Mock(name="Network", subnets=[subnet])
+    return api
+
+
+@pytest.fixture()
+def command(
+    rollback_manager, cancellation_context_manager, api, deploy_app, resource_conf
+):
+    return CreateMgmtPort(
+        rollback_manager, cancellation_context_manager, api, deploy_app, resource_conf
+    )
+
+
+def test_create_mgmt_port(command, api, resource_conf):
+    port = command.execute()
+
+    api.Network.get_static.assert_called_once_with(resource_conf.os_mgmt_net_id)
+    api.Port.create.assert_called_once_with(
+        "mgmt-port",
+        api.Network.get_static(),
+        fixed_ip=None,
+        fixed_ip_subnet=None,
+        security_groups=None,
+    )
+    assert port is command.port is api.Port.create()
+
+
+def test_create_mgmt_port_with_private_ip(command, api, deploy_app):
+    deploy_app.private_ip = "10.0.1.13"
+    mgmt_net = api.Network.get_static()
+
+    command.execute()
+
+    api.Port.create.assert_called_once_with(
+        "mgmt-port",
+        mgmt_net,
+        fixed_ip="10.0.1.13",
+        fixed_ip_subnet=mgmt_net.subnets[0],
+        security_groups=None,
+    )
+
+
+def test_create_mgmt_port_with_security_group(
+    rollback_manager, cancellation_context_manager, api, deploy_app, resource_conf
+):
+    sg_command = CreateSecurityGroup(
+        rollback_manager, cancellation_context_manager, api, deploy_app, "sg"
+    )
+    command = CreateMgmtPort(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        resource_conf,
+        security_group=sg_command,
+    )
+
+    command.execute()
+
+    assert sg_command.executed
+    api.SecurityGroup.get_default.assert_called_once_with(api.project_id)
+    port_kwargs = api.Port.create.call_args.kwargs
+    assert port_kwargs["security_groups"] == [
+        api.SecurityGroup.get_default(),
+        api.SecurityGroup.create(),
+    ]
+
+
+def test_private_ip_is_not_inside_mgmt_network(command, api, deploy_app):
+    deploy_app.private_ip = "192.168.1.1"
+
+    with pytest.raises(PrivateIpIsNotInMgmtNetwork):
+        command.execute()
+
+    api.Port.create.assert_not_called()
+
+
+def test_instance_boots_with_the_port(
+    rollback_manager,
+    cancellation_context_manager,
+    command,
+    api,
+    deploy_app,
+    resource_conf,
+):
+    instance_command = CreateInstanceCommand(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        resource_conf,
+        mgmt_port=command,
+    )
+    port = command.execute()
+
+    instance = instance_command.execute()
+
+    create_kwargs = api.Instance.create.call_args.kwargs
+    assert create_kwargs["port"] is port
+    assert create_kwargs["network"] is None
+    api.Network.get_static.assert_called_once()  # only for the port
+    assert instance_command.mgmt_iface is api.Interface.from_port(instance, port)
+    api.Interface.from_port.assert_called_with(instance, port)
+
+
+def test_rollback(command):
+    port = command.execute()
+
+    command.rollback()
+
+    port.remove.assert_called_once_with()
@@ -2,7 +2,15 @@ from unittest.mock import Mock
 
 import pytest
 
-from cloudshell.cp.openstack.os_api.commands import CreateSecurityGroup
+from cloudshell.cp.openstack.exceptions import SecurityGroupNotFound
+from cloudshell.cp.openstack.models.deploy_app import SecurityGroupRule
+from cloudshell.cp.openstack.os_api.commands import (
+    AddSecurityGroup,
+    CreateSecurityGroup,
+)
+from cloudshell.cp.openstack.utils.instance_helpers import (
+    get_shared_security_group_name,
+)
 
 
 @pytest.fixture()
@@ -16,44 +24,54 @@ def inst():
 
 
 @pytest.fixture()
-def command(rollback_manager, cancellation_context_manager, api, deploy_app, inst):
+def command(rollback_manager, cancellation_context_manager, api, deploy_app):
     return CreateSecurityGroup(
         rollback_manager,
         cancellation_context_manager,
         api,
         deploy_app,
+        "sg-name",
+    )
+
+
+@pytest.fixture()
+def add_command(rollback_manager, cancellation_context_manager, inst):
+    return AddSecurityGroup(
+        rollback_manager,
+        cancellation_context_manager,
         inst,
+        Mock(name="Security Group"),
     )
 
 
-def test_create_security_group(command, api, inst):
-    command.execute()
+def test_create_security_group(command, api):
+    sg = command.execute()
 
-    expected_name = f"sg-{inst.name}"
-    api.SecurityGroup.create.assert_called_once_with(expected_name)
-    sg = api.SecurityGroup.create()
-    sg.add_rule.assert_called_once_with(
-        cidr="0.0.0.0/0",
-        protocol="tcp",
-        port_range_min=22,
-        port_range_max=22,
-        direction="ingress",
-    )
-    inst.add_security_group.assert_called_once_with(sg)
+    api.SecurityGroup.create.assert_called_once_with("sg-name")
+    assert sg is api.SecurityGroup.create()
+    sg.add_rules.assert_called_once()
+    assert list(sg.add_rules.call_args.args[0]) == [
+        {
+            "cidr": "0.0.0.0/0",
+            "protocol": "tcp",
+            "port_range_min": 22,
+            "port_range_max": 22,
+            "direction": "ingress",
+        }
+    ]
 
 
-def test_rollback(command, api, inst):
+def test_rollback(command, api):
     sg = Mock(name="Security Group")
-    command._sg = sg
+    command.sg = sg
 
     command.rollback()
 
-    inst.remove_security_group.assert_called_once_with(sg)
     sg.remove.assert_called_once_with()
 
 
-def test_failed_to_add_rules(command, api, inst):
-    api.SecurityGroup.create.return_value.add_rule.side_effect = Exception(
+def test_failed_to_add_rules(command, api):
+    api.SecurityGroup.create.return_value.add_rules.side_effect = Exception(
         "cannot add rules"
     )
 
@@ -62,18 +80,89 @@ def test_failed_to_add_rules(command, api, inst):
 
     api.SecurityGroup.create.assert_called_once()
     sg = api.SecurityGroup.create()
-    sg.remove_assert_called_once_with()
-    inst.add_security_group.assert_not_called()
+    sg.remove.assert_called_once_with()
+    assert not command.executed
+
+
+def test_shared_security_group(
+    rollback_manager, cancellation_context_manager, api, deploy_app
+):
+    deploy_app.inbound_ports = [
+        SecurityGroupRule.from_str("UDP:80"),
+        SecurityGroupRule(22, 22, cidr="10.0.0.1/24"),
+        SecurityGroupRule.from_str("udp:80"),
+    ]
+    name = get_shared_security_group_name(deploy_app.inbound_ports)
+    command = CreateSecurityGroup(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        name,
+        shared=True,
+    )
 
+    sg = command.execute()
+    command.rollback()
 
-def test_failed_to_add_to_instance(command, api, inst):
-    inst.add_security_group.side_effect = Exception("failed to add")
+    assert name.startswith("sg-shared-")
+    assert name == get_shared_security_group_name(
+        [
+            SecurityGroupRule.from_str("10.0.0.0/24:22"),
+            SecurityGroupRule(80, 80, protocol="udp"),
+        ]
+    )
+    api.SecurityGroup.create.assert_not_called()
+    sg_name, rules = api.SecurityGroup.find_or_create.call_args.args
+    assert sg is api.SecurityGroup.find_or_create.return_value
+    assert sg_name == name
+    assert list(rules) == [
+        {
+            "cidr": cidr,
+            "protocol": protocol,
+            "port_range_min": port,
+            "port_range_max": port,
+            "direction": "ingress",
+        }
+        for cidr, protocol, port in (
+            ("10.0.0.0/24", "tcp", 22),
+            ("0.0.0.0/0", "udp", 80),
+        )
+    ]
+    sg.unpin.assert_called_once_with()
+    sg.remove_if_unused.assert_called_once_with()
+    sg.remove.assert_not_called()
+
+
+def test_shared_security_group_refresh(
+    rollback_manager, cancellation_context_manager, api, deploy_app
+):
+    command = CreateSecurityGroup(
+        rollback_manager,
+        cancellation_context_manager,
+        api,
+        deploy_app,
+        "sg-shared-name",
+        shared=True,
+    )
+    removed = command.execute()
+    api.SecurityGroup.find_or_create.return_value = Mock(name="New Security Group")
 
-    with pytest.raises(Exception):
-        command.execute()
+    assert command.refresh() is False  # the group exists
 
-    api.SecurityGroup.create.assert_called_once()
-    sg = api.SecurityGroup.create()
-    sg.add_rule.assert_called_once()
-    inst.add_security_group.assert_called_once()
-    sg.remove_assert_called_once_with()
+    api.SecurityGroup.get.side_effect = SecurityGroupNotFound(id_=removed.id)
+    assert command.refresh() is True
+    removed.unpin.assert_called_once_with()
+    assert command.sg is api.SecurityGroup.find_or_create.return_value
+
+    command.release()
+    command.release()
+    command.sg.unpin.assert_called_once_with()
+
+
+def test_add_security_group(add_command, inst):
+    add_command.execute()
+    inst.add_security_group.assert_called_once_with(add_command._sg)
+
+    add_command.rollback()
+    inst.remove_security_group.assert_called_once_with(add_command._sg)
@@ -1,8 +1,10 @@
+import json
 from unittest.mock import Mock
 
 import pytest
 
 from cloudshell.cp.openstack.os_api.commands.rollback import RollbackCommand
+from cloudshell.cp.openstack.utils.tracing import TRACE_FILE_ENV, span
 
 
 def test_abs_rollback_command(rollback_manager, cancellation_context_manager):
@@ -78,3 +80,27 @@ def test_rollback_commands_manager_rollback_failed(
     actions.command2_execute.assert_called_once_with()
     actions.command1_rollback.assert_called_once_with()
     actions.command2_rollback.assert_not_called()
+
+
+def test_rollback_commands_are_traced(
+    rollback_manager, cancellation_context_manager, tmp_path, monkeypatch
+):
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(TRACE_FILE_ENV, str(trace_file))
+
+    class Command(RollbackCommand):
+        def _execute(self, *args, **kwargs):
+            pass
+
+        def rollback(self):
+            pass
+
+    with pytest.raises(ValueError):
+        with span("deploy"), rollback_manager:
+            Command(rollback_manager, cancellation_context_manager).execute()
+            raise ValueError
+
+    spans = {s["name"]: s for s in map(json.loads, trace_file.read_text().splitlines())}
+    deploy_id = spans["deploy"]["span_id"]
+    assert spans["Command"]["parent_id"] == deploy_id
+    assert spans["rollback Command"]["parent_id"] == deploy_id
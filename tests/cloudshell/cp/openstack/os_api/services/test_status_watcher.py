@@ -0,0 +1,170 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+from novaclient import exceptions as nova_exc
+
+from cloudshell.cp.openstack.exceptions import InstanceErrorState, InstanceNotFound
+from cloudshell.cp.openstack.os_api.models.instance import InstanceStatus
+from cloudshell.cp.openstack.os_api.services.status_watcher import InstanceStatusWatcher
+
+
+class FakeServer:
+    def __init__(self, id_, statuses):
+        self.id = id_
+        self.name = f"server {id_}"
+        self.fault = {"message": "fault message"}
+        self._statuses = list(statuses)
+        self.status = self._statuses[0]
+        self.get = Mock()
+
+    def tick(self):
+        if len(self._statuses) > 1:
+            self._statuses.pop(0)
+        self.status = self._statuses[0]
+        return self
+
+
+class FakeNova:
+    def __init__(self, *servers):
+        self.servers = Mock()
+        self.servers.list.side_effect = self._list
+        self._servers = list(servers)
+
+    def _list(self, detailed, search_opts):
+        assert detailed is True
+        assert search_opts["changes-since"].endswith("Z")
+        return [server.tick() for server in self._servers]
+
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(time, "sleep", delays.append)
+    return delays
+
+
+@pytest.fixture()
+def make_instance(os_api_v2):
+    def wrapped(server):
+        return os_api_v2.Instance(server)
+
+    return wrapped
+
+
+def test_one_list_per_tick_for_all_instances(logger, make_instance, sleeps):
+    servers = [
+        FakeServer("1", ["BUILD", "ACTIVE"]),
+        FakeServer("2", ["BUILD", "BUILD", "BUILD", "ACTIVE"]),
+        FakeServer("3", ["BUILD", "BUILD", "ERROR"]),
+    ]
+    nova = FakeNova(*servers)
+    watcher = InstanceStatusWatcher(nova, logger)
+    instances = list(map(make_instance, servers))
+
+    errors = watcher.wait_many(instances, InstanceStatus.ACTIVE)
+
+    assert errors[:2] == [None, None]
+    assert isinstance(errors[2], InstanceErrorState)
+    assert nova.servers.list.call_count == 3
+    assert watcher.polls == 3
+    for server in servers:
+        server.get.assert_not_called()
+
+
+def test_adaptive_backoff(logger, make_instance, sleeps):
+    server = FakeServer("1", ["BUILD"] * 10 + ["ACTIVE"])
+    watcher = InstanceStatusWatcher(FakeNova(server), logger)
+
+    watcher.wait(make_instance(server), InstanceStatus.ACTIVE)
+
+    assert sleeps[0] == watcher.MIN_DELAY
+    assert sleeps == sorted(sleeps)
+    assert sleeps[-1] == watcher.MAX_DELAY
+
+
+def test_already_in_status(logger, make_instance, sleeps):
+    server = FakeServer("1", ["SHUTOFF"])
+    nova = FakeNova(server)
+    watcher = InstanceStatusWatcher(nova, logger)
+
+    watcher.wait(make_instance(server), InstanceStatus.SHUTOFF)
+
+    nova.servers.list.assert_not_called()
+    assert sleeps == []
+
+
+def test_error_status(logger, make_instance, sleeps):
+    server = FakeServer("1", ["BUILD", "ERROR"])
+    watcher = InstanceStatusWatcher(FakeNova(server), logger)
+
+    with pytest.raises(InstanceErrorState, match="fault message"):
+        watcher.wait(make_instance(server), InstanceStatus.ACTIVE)
+
+
+def test_fallback_to_get_if_not_listed(logger, make_instance, sleeps):
+    server = FakeServer("1", ["BUILD"])
+    nova = FakeNova()  # changes-since doesn't return the server
+
+    def get():
+        server.status = "ACTIVE"
+
+    server.get.side_effect = get
+    watcher = InstanceStatusWatcher(nova, logger)
+
+    watcher.wait(make_instance(server), InstanceStatus.ACTIVE)
+
+    assert nova.servers.list.call_count == watcher.FALLBACK_AFTER
+    server.get.assert_called_once_with()
+
+
+def test_fallback_instance_not_found(logger, make_instance, sleeps):
+    server = FakeServer("1", ["BUILD"])
+    server.get.side_effect = nova_exc.NotFound(404)
+    watcher = InstanceStatusWatcher(FakeNova(), logger)
+
+    with pytest.raises(InstanceNotFound):
+        watcher.wait(make_instance(server), InstanceStatus.ACTIVE)
+
+
+def test_cancelled(logger, make_instance, sleeps):
+    server = FakeServer("1", ["BUILD"])
+    watcher = InstanceStatusWatcher(FakeNova(server), logger)
+    cancellation_manager = Mock()
+    cancellation_manager.__enter__ = Mock()
+    cancellation_manager.__exit__ = Mock(side_effect=ValueError("cancelled"))
+
+    with pytest.raises(ValueError, match="cancelled"):
+        watcher.wait(make_instance(server), InstanceStatus.ACTIVE, cancellation_manager)
+
+    assert watcher._watches == []
+
+
+def test_concurrent_waiters_share_polls(logger, make_instance, monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda _: None)
+    servers = [FakeServer(str(i), ["BUILD"] * 5 + ["ACTIVE"]) for i in range(10)]
+    nova = FakeNova(*servers)
+    watcher = InstanceStatusWatcher(nova, logger)
+    watcher.MIN_DELAY = 0.01
+
+    def wait(server):
+        watcher.wait(make_instance(server), InstanceStatus.ACTIVE)
+
+    with ThreadPoolExecutor(10) as executor:
+        list(executor.map(wait, servers))
+
+    # every server needs 5 ticks, without sharing it would be 50 list calls
+    assert nova.servers.list.call_count < 25
+
+
+def test_leader_polls_with_own_client(logger, make_instance, sleeps):
+    server = FakeServer("1", ["BUILD", "ACTIVE"])
+    shared_nova = FakeNova()
+    command_nova = FakeNova(server)
+    watcher = InstanceStatusWatcher(shared_nova, logger)
+
+    watcher.wait(make_instance(server), InstanceStatus.ACTIVE, nova=command_nova)
+
+    shared_nova.servers.list.assert_not_called()
+    assert command_nova.servers.list.call_count == 1
@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+from cloudshell.cp.openstack.os_api import api as api_module
+from cloudshell.cp.openstack.os_api.api import OsApi
+
+PROPERTIES = (
+    "_nova",
+    "_neutron",
+    "_glance",
+    "status_watcher",
+    "Port",
+    "Network",
+    "Subnet",
+    "FloatingIp",
+    "SecurityGroup",
+    "Trunk",
+    "Instance",
+    "Interface",
+    "Image",
+    "Flavor",
+)
+
+
+def _slow_client(*args, **kwargs) -> object:
+    threading.Event().wait(0.01)  # other threads come while it's built
+    return object()
+
+
+@pytest.fixture()
+def client_factories(monkeypatch):
+    factories = {
+        name: Mock(side_effect=_slow_client)
+        for name in ("NovaClient_base", "NeutronClient", "GlanceClient_base")
+    }
+    for name, factory in factories.items():
+        monkeypatch.setattr(api_module, name, factory)
+    return factories
+
+
+def test_clients_and_models_built_once_by_many_threads(
+    os_session, logger, client_factories
+):
+    api = OsApi(os_session, logger)
+    workers = 32
+    barrier = threading.Barrier(workers)
+
+    def get_all(_) -> list:
+        barrier.wait()
+        return [getattr(api, name) for name in PROPERTIES]
+
+    with ThreadPoolExecutor(workers) as executor:
+        results = list(executor.map(get_all, range(workers)))
+
+    for values in zip(*results):
+        assert len(set(map(id, values))) == 1
+    for factory in client_factories.values():
+        factory.assert_called_once()
+
+
+def test_status_watcher_is_shared_by_scope(os_session, logger):
+    other_session = Mock(auth=Mock(auth_url="http://other", project_name="admin"))
+
+    watcher = OsApi(os_session, logger).status_watcher
+
+    assert OsApi(os_session, logger).status_watcher is watcher
+    assert OsApi(other_session, logger).status_watcher is not watcher
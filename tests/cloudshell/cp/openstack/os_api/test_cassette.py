@@ -0,0 +1,129 @@
+import gzip
+import json
+import logging
+import zlib
+
+import pytest
+import requests
+
+from cloudshell.cp.openstack.os_api.api import OsApi
+from cloudshell.cp.openstack.os_api.cassette import (
+    CASSETTE_RECORD_ENV,
+    CASSETTE_REPLAY_ENV,
+    CASSETTE_SPEED_ENV,
+    SCRUBBED,
+    Cassette,
+    CassetteError,
+    Interaction,
+    ReplayAdapter,
+    normalize_url,
+    reset_cassettes,
+    scrub,
+)
+from cloudshell.cp.openstack.os_api.session_pool import POOL_MAXSIZE
+
+from tests.openstack_standin import OpenStackState, StandInServer
+from tests.standin_cloud import Cloud
+
+
+@pytest.fixture(autouse=True)
+def cassettes(monkeypatch):
+    for env in (CASSETTE_RECORD_ENV, CASSETTE_REPLAY_ENV, CASSETTE_SPEED_ENV):
+        monkeypatch.delenv(env, raising=False)
+    reset_cassettes()
+    yield
+    reset_cassettes()
+
+
+def _interaction(url: str, body: dict, method: str = "GET") -> Interaction:
+    return Interaction(method, normalize_url(url), 200, 0.5, body={"json": body})
+
+
+def test_scrub():
+    data = {
+        "auth": {"identity": {"password": {"user": {"password": "secret"}}}},
+        "server": {"adminPass": "pass", "name": "vm"},
+    }
+
+    assert scrub(data) == {
+        "auth": {"identity": {"password": {"user": {"password": SCRUBBED}}}},
+        "server": {"adminPass": SCRUBBED, "name": "vm"},
+    }
+
+
+def test_cassette_plays_in_recorded_order():
+    cassette = Cassette(
+        [
+            _interaction("http://nova/servers/1", {"status": "BUILD"}),
+            _interaction("http://nova/servers/1", {"status": "ACTIVE"}),
+            _interaction("http://neutron/ports?name=a&network_id=n", {"ports": [1]}),
+        ]
+    )
+
+    statuses = [cassette.play("GET", "http://nova/servers/1").body for _ in range(3)]
+    ports = cassette.play("GET", "http://neutron/ports?network_id=n&name=a").body
+
+    assert statuses == [{"json": {"status": s}} for s in ("BUILD", "ACTIVE", "ACTIVE")]
+    assert ports == {"json": {"ports": [1]}}
+    with pytest.raises(CassetteError):
+        cassette.play("DELETE", "http://nova/servers/1")
+
+
+def test_cassette_matches_path_when_query_changed():
+    cassette = Cassette([_interaction("http://neutron/ports?name=a1", {"ports": []})])
+
+    interaction = cassette.play("GET", "http://neutron/ports?name=b2")
+
+    assert interaction.body == {"json": {"ports": []}}
+    assert len(cassette) == 0
+
+
+def test_replay_adapter_waits_for_speed(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    cassette = Cassette([_interaction("http://nova/servers", {"servers": []})])
+    session = requests.Session()
+    session.mount("http://", ReplayAdapter(cassette, speed=10))
+
+    response = session.get("http://nova/servers")
+
+    assert response.status_code == 200
+    assert response.json() == {"servers": []}
+    assert sleeps == [0.05]
+
+
+def test_record_and_replay_flow(tmp_path, monkeypatch):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    logger = logging.getLogger("cassette")
+    monkeypatch.setenv(CASSETTE_RECORD_ENV, path)
+    with StandInServer(OpenStackState()) as server:
+        cloud = Cloud.start(server, logger)
+        vm_id = cloud.deploy()
+        adapter = cloud.api._session.session.get_adapter(server.auth_url)
+    monkeypatch.delenv(CASSETTE_RECORD_ENV)
+    reset_cassettes()  # completes the cassette
+
+    # the recorder wraps the sized pool of the session
+    assert adapter.adapter.adapter._pool_maxsize == POOL_MAXSIZE
+    # one gzip stream for all interactions
+    with open(path, "rb") as f:
+        decompressor = zlib.decompressobj(wbits=31)
+        decompressor.decompress(f.read())
+    assert decompressor.eof and not decompressor.unused_data
+    with gzip.open(path, "rt") as f:
+        content = f.read()
+    assert "password" in content
+    assert '"password":"password"' not in content
+    assert server.state.servers[vm_id]["id"] in content
+    lines = content.splitlines()
+    assert json.loads(lines[0]) == {"version": 1}
+    assert len(lines) - 1 == sum(server.calls.values())
+
+    # the server is stopped, the flow gets its responses from the cassette
+    monkeypatch.setenv(CASSETTE_REPLAY_ENV, path)
+    monkeypatch.setenv(CASSETTE_SPEED_ENV, "0")
+    cloud.api = OsApi.connect(
+        server.auth_url, "admin", "password", "admin", "default", logger, False
+    )
+
+    assert cloud.deploy() == vm_id
@@ -0,0 +1,65 @@
+from unittest.mock import Mock
+
+import pytest
+
+from cloudshell.cp.openstack.os_api.api import OsApi
+from cloudshell.cp.openstack.os_api.catalog_cache import (
+    CATALOG_CACHE,
+    invalidate_catalog,
+)
+
+
+@pytest.fixture()
+def os_flavor(nova):
+    os_flavor = Mock(id="flavor id")
+    os_flavor.name = "flavor"
+    nova.flavors.findall.return_value = [os_flavor]
+    nova.flavors.get.return_value = os_flavor
+    return os_flavor
+
+
+def test_flavor_is_cached_for_all_apis(os_api_v2, nova, logger, os_session, os_flavor):
+    other_api = OsApi(os_session, logger)
+    other_api._nova = nova
+
+    flavor1 = os_api_v2.Flavor.find_first("flavor")
+    flavor2 = other_api.Flavor.find_first("flavor")
+    os_api_v2.Flavor.get(flavor1.id)
+
+    nova.flavors.findall.assert_called_once_with(name="flavor")
+    nova.flavors.get.assert_called_once_with(flavor1.id)
+    assert isinstance(flavor2, other_api.Flavor)
+    assert flavor2.name == flavor1.name
+
+
+def test_catalog_is_scoped_by_project(os_api_v2, nova, logger, os_session, os_flavor):
+    os_session.auth.project_name = "another project"
+    other_api = OsApi(os_session, logger)
+    other_api._nova = nova
+    os_api_v2.Flavor.find_first("flavor")
+    os_session.auth.project_name = "admin"
+
+    os_api_v2.Flavor.find_first("flavor")
+    other_api.Flavor.find_first("flavor")
+
+    assert nova.flavors.findall.call_count == 2
+
+
+def test_static_network(os_api_v2, neutron_emu, local_network):
+    net = os_api_v2.Network.get_static(local_network.id)
+    neutron_emu.delete_network(local_network.id)
+
+    assert os_api_v2.Network.get_static(local_network.id) is net
+
+    invalidate_catalog(os_api_v2)
+    assert len(CATALOG_CACHE) == 0
+
+
+def test_image_remove_invalidates_cache(os_api_v2, glance):
+    glance.images.get.return_value = {"id": "image id", "name": "image"}
+    image = os_api_v2.Image.get("image id")
+
+    image.remove()
+    os_api_v2.Image.get("image id")
+
+    assert glance.images.get.call_count == 2
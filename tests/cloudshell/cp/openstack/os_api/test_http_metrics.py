@@ -0,0 +1,148 @@
+from unittest.mock import Mock
+
+import pytest
+import requests
+from keystoneauth1 import exceptions as ks_exc
+from keystoneauth1.session import Session as KeyStoneSession
+from requests.adapters import BaseAdapter
+
+from cloudshell.cp.openstack.os_api.call_ledger import record_calls
+from cloudshell.cp.openstack.os_api.http_metrics import (
+    HTTP_METRIC,
+    HTTP_RETRIES_METRIC,
+    get_url_template,
+    instrument_session,
+)
+from cloudshell.cp.openstack.utils.metrics import MetricsRegistry
+
+
+def _response(status_code: int) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp._content = b"{}"
+    resp.headers["Content-Type"] = "application/json"
+    return resp
+
+
+@pytest.fixture()
+def registry():
+    return MetricsRegistry()
+
+
+class StubAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.responses: list[requests.Response] = []
+
+    def send(self, request, **kwargs) -> requests.Response:
+        resp = self.responses.pop(0) if self.responses else _response(200)
+        resp.request, resp.url = request, request.url
+        return resp
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture()
+def adapter():
+    return StubAdapter()
+
+
+@pytest.fixture()
+def session(registry, adapter):
+    auth = Mock(auth_url="http://keystone/v3")
+    auth.get_connection_params.return_value = {}
+    session = KeyStoneSession(auth=auth)
+    session.session.mount("http://", adapter)
+    return instrument_session(session, registry)
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    (
+        ("http://neutron:9696/v2.0/ports?name=port", "/v2.0/ports"),
+        (
+            "/servers/5f1d2c9e-0b2a-4d4e-9a43-3a8c7c0bf5a1/os-interface",
+            "/servers/{id}/os-interface",
+        ),
+        (
+            "/v2.1/0123456789abcdef0123456789abcdef/flavors/42",
+            "/v2.1/{id}/flavors/{id}",
+        ),
+    ),
+)
+def test_get_url_template(url, expected):
+    assert get_url_template(url) == expected
+
+
+def test_request_is_timed(session, registry):
+    session.get(
+        "http://neutron:9696/v2.0/ports?name=port",
+        endpoint_filter={"service_type": "network"},
+        authenticated=False,
+    )
+    session.post("http://keystone/v3/auth/tokens", authenticated=False)
+
+    histogram = registry.get_histogram(
+        f"{HTTP_METRIC}_seconds", service="neutron", method="GET", url="/v2.0/ports"
+    )
+    assert histogram.count == 1
+    histogram = registry.get_histogram(
+        f"{HTTP_METRIC}_seconds",
+        service="keystone",
+        method="POST",
+        url="/v3/auth/tokens",
+    )
+    assert histogram.count == 1
+
+
+def test_errors_and_retries_are_counted(session, registry, adapter):
+    # keystoneauth sends the retries through the adapters of the session
+    adapter.responses = [_response(503), _response(404)]
+    labels = {"service": "nova", "method": "GET", "url": "/servers/{id}"}
+
+    with pytest.raises(ks_exc.NotFound):
+        session.get(
+            "http://nova/servers/42",
+            endpoint_filter={"service_type": "compute"},
+            authenticated=False,
+            status_code_retries=1,
+            retriable_status_codes=[503],
+        )
+
+    assert registry.get_counter(HTTP_RETRIES_METRIC, **labels) == 1
+    assert (
+        registry.get_counter(f"{HTTP_METRIC}_errors", error="NotFound", **labels) == 1
+    )
+    assert registry.get_histogram(f"{HTTP_METRIC}_seconds", **labels).count == 1
+
+
+def test_instrument_session_once(session, registry):
+    assert instrument_session(session, registry) is session
+
+    session.get("http://keystone/v3", authenticated=False)
+
+    assert (
+        registry.get_histogram(
+            f"{HTTP_METRIC}_seconds", service="keystone", method="GET", url="/v3"
+        ).count
+        == 1
+    )
+
+
+def test_requests_are_recorded_to_ledgers(session):
+    nova = {"endpoint_filter": {"service_type": "compute"}, "authenticated": False}
+    session.get("http://nova/servers", **nova)  # no ledger
+
+    with record_calls() as outer:
+        session.get("http://nova/servers/42", **nova)
+        with record_calls() as inner:
+            session.delete("http://nova/servers/42", **nova)
+
+    assert list(map(str, inner.calls)) == ["nova DELETE /servers/{id}"]
+    assert list(map(str, outer.calls)) == [
+        "nova GET /servers/{id}",
+        "nova DELETE /servers/{id}",
+    ]
+    assert outer.count("nova") == 2
+    assert outer.summary() == "2 API calls: nova 2"
@@ -0,0 +1,92 @@
+from unittest.mock import Mock
+
+import pytest
+
+from cloudshell.cp.openstack.exceptions import PortNotFound
+
+
+@pytest.fixture()
+def show_port(neutron_emu, monkeypatch):
+    mock = Mock(wraps=neutron_emu.show_port)
+    monkeypatch.setattr(neutron_emu, "show_port", mock)
+    return mock
+
+
+def test_disabled_by_default(os_api_v2, neutron_emu, local_network, show_port):
+    port = os_api_v2.Port.create("port", local_network)
+
+    os_api_v2.Port.get(port.id)
+    os_api_v2.Port.get(port.id)
+
+    assert os_api_v2.request_cache is None
+    assert show_port.call_count == 2
+
+
+def test_get_by_id_and_name(os_api_v2, neutron_emu, local_network, show_port):
+    port = os_api_v2.Port.create("port", local_network)
+
+    with os_api_v2.cached_requests() as cache:
+        port1 = os_api_v2.Port.get(port.id)
+        port2 = os_api_v2.Port.get(port.id)
+        port3 = os_api_v2.Port.find_first("port")
+
+    assert port1 is port2 is port3
+    show_port.assert_called_once_with(port.id)
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1}
+    assert os_api_v2.request_cache is None
+
+
+def test_nested_context_uses_the_same_cache(os_api_v2):
+    with os_api_v2.cached_requests() as cache1:
+        with os_api_v2.cached_requests() as cache2:
+            assert cache1 is cache2
+        assert os_api_v2.request_cache is cache1
+
+
+def test_different_kinds_are_not_mixed(os_api_v2, neutron_emu, local_network):
+    subnet = next(local_network.subnets)
+
+    with os_api_v2.cached_requests():
+        net = os_api_v2.Network.find_first(local_network.name)
+        assert os_api_v2.Subnet.get(subnet.id) == subnet
+
+    assert net == local_network
+
+
+def test_not_found_is_not_cached(os_api_v2, neutron_emu, local_network):
+    with os_api_v2.cached_requests():
+        with pytest.raises(PortNotFound):
+            os_api_v2.Port.find_first("port")
+        port = os_api_v2.Port.create("port", local_network)
+
+        assert os_api_v2.Port.find_first("port") == port
+
+
+def test_invalidate_on_remove(os_api_v2, neutron_emu, local_network):
+    port = os_api_v2.Port.create("port", local_network)
+
+    with os_api_v2.cached_requests():
+        os_api_v2.Port.get(port.id).remove()
+
+        with pytest.raises(PortNotFound):
+            os_api_v2.Port.get(port.id)
+
+
+def test_invalidate_on_create(os_api_v2, neutron_emu, local_network):
+    with os_api_v2.cached_requests():
+        old_net = os_api_v2.Network.find_first(local_network.name)
+        neutron_emu.delete_network(old_net.id)
+        new_net = os_api_v2.Network.create(local_network.name)
+
+        assert os_api_v2.Network.find_first(local_network.name) == new_net
+
+
+def test_invalidate_on_update_port(os_api_v2, neutron_emu, local_network):
+    port = os_api_v2.Port.create("port", local_network)
+
+    with os_api_v2.cached_requests():
+        os_api_v2.Port.find_first("port").name = "new name"
+
+        with pytest.raises(PortNotFound):
+            os_api_v2.Port.find_first("port")
+        assert os_api_v2.Port.get(port.id).name == "new name"
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+from requests.adapters import DEFAULT_POOLSIZE
+
+from cloudshell.cp.openstack.os_api.api import OsApi
+from cloudshell.cp.openstack.os_api.session_pool import (
+    MAX_WORKERS,
+    POOL_MAXSIZE,
+    SessionPool,
+    create_session,
+)
+
+from tests.openstack_standin import Latency, OpenStackState, StandInServer
+
+CREDS = ("http://openstack.example/identity", "user", "password", "admin", "default")
+
+
+@pytest.fixture()
+def pool():
+    return SessionPool(refresh_before=600)
+
+
+def test_session_reused(pool):
+    session1 = pool.get_session(*CREDS)
+    session2 = pool.get_session(*CREDS)
+
+    assert session1 is session2
+    assert pool.stats() == {"size": 1, "hits": 1, "misses": 1}
+    assert session1.auth.MIN_TOKEN_LIFE_SECONDS == 600
+
+
+@pytest.mark.parametrize(
+    "other_creds",
+    (
+        ("http://another.example/identity", "user", "password", "admin", "default"),
+        ("http://openstack.example/identity", "user2", "password", "admin", "default"),
+        ("http://openstack.example/identity", "user", "password", "demo", "default"),
+        ("http://openstack.example/identity", "user", "password", "admin", "domain"),
+    ),
+)
+def test_different_keys(pool, other_creds):
+    session1 = pool.get_session(*CREDS)
+    session2 = pool.get_session(*other_creds)
+
+    assert session1 is not session2
+    assert pool.stats() == {"size": 2, "hits": 0, "misses": 2}
+
+
+def test_changed_password_replaces_session(pool):
+    url, user, _, project, domain = CREDS
+    session1 = pool.get_session(*CREDS)
+    session2 = pool.get_session(url, user, "new password", project, domain)
+
+    assert session1 is not session2
+    assert pool.get_session(url, user, "new password", project, domain) is session2
+    assert pool.stats() == {"size": 1, "hits": 1, "misses": 2}
+
+
+def test_invalidate(pool):
+    url, user, _, project, domain = CREDS
+    session1 = pool.get_session(*CREDS)
+    session1.auth.auth_ref = Mock()
+
+    pool.invalidate(url, user, project, domain)
+
+    assert session1.auth.auth_ref is None
+    assert pool.get_session(*CREDS) is not session1
+
+
+def test_thread_safety(pool):
+    with ThreadPoolExecutor(16) as executor:
+        sessions = list(executor.map(lambda _: pool.get_session(*CREDS), range(200)))
+
+    assert len(set(map(id, sessions))) == 1
+    assert pool.stats() == {"size": 1, "hits": 199, "misses": 1}
+
+
+def test_os_api_uses_pool(resource_conf, logger, monkeypatch):
+    pool = SessionPool()
+    monkeypatch.setattr("cloudshell.cp.openstack.os_api.api.SESSION_POOL", pool)
+
+    api1 = OsApi.from_config(resource_conf, logger)
+    api2 = OsApi.from_config(resource_conf, logger)
+    api3 = OsApi.from_config(resource_conf, logger, use_pool=False)
+
+    assert api1._session is api2._session
+    assert api3._session is not api1._session
+    assert pool.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_pool_is_sized():
+    session = create_session(*CREDS)
+
+    # the adapters count attempts of the requests over the sized ones
+    adapters = [adapter.adapter for adapter in session.session.adapters.values()]
+    assert {adapter._pool_maxsize for adapter in adapters} == {POOL_MAXSIZE}
+
+
+@pytest.mark.parametrize(
+    ("pool_maxsize", "pool_is_full"), ((DEFAULT_POOLSIZE, True), (POOL_MAXSIZE, False))
+)
+def test_concurrent_requests_fit_pool(pool_maxsize, pool_is_full, caplog, monkeypatch):
+    # the stand-in sleeps to keep the connections busy, sleep is patched in tests
+    monkeypatch.setattr(time, "sleep", lambda seconds: threading.Event().wait(seconds))
+    workers = MAX_WORKERS
+    with StandInServer(OpenStackState(), {"glance": Latency(0.05)}) as server:
+        session = create_session(
+            server.auth_url, "admin", "password", "a", "b", pool_maxsize
+        )
+        session.get_token()
+        url = f"{server.url}/image/v2/schemas/image"
+
+        with caplog.at_level(logging.WARNING, "urllib3.connectionpool"):
+            with ThreadPoolExecutor(workers) as executor:
+                list(executor.map(lambda _: session.get(url), range(workers)))
+
+    warnings = [r for r in caplog.records if "Connection pool is full" in r.message]
+    assert bool(warnings) is pool_is_full
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import random
+from ipaddress import IPv4Network
+
+import pytest
+
+from cloudshell.cp.openstack.exceptions import FreeSubnetIsNotFound
+from cloudshell.cp.openstack.services import cidr_allocator
+from cloudshell.cp.openstack.services.cidr_allocator import CidrAllocator, get_allocator
+
+
+def _first_free_subnet(used: set[str], prefixlen: int = 24) -> IPv4Network:
+    used_networks = [IPv4Network(cidr, strict=False) for cidr in used]
+    pools = ("10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16")
+    for pool in pools:
+        for subnet in IPv4Network(pool).subnets(new_prefix=prefixlen):
+            if not any(map(subnet.overlaps, used_networks)):
+                return subnet
+    raise FreeSubnetIsNotFound
+
+
+def test_first_subnet():
+    assert str(CidrAllocator().find_free()) == "10.0.0.0/24"
+
+
+def test_allocate_one_after_another():
+    allocator = CidrAllocator()
+
+    cidrs = [str(allocator.allocate()) for _ in range(3)]
+
+    assert cidrs == ["10.0.0.0/24", "10.0.1.0/24", "10.0.2.0/24"]
+    assert allocator.cidrs == set(cidrs)
+
+
+@pytest.mark.parametrize(
+    ("used", "prefixlen", "expected"),
+    (
+        ({"10.0.0.0/24", "10.0.2.0/24"}, 24, "10.0.1.0/24"),
+        ({"10.0.0.0/16"}, 24, "10.1.0.0/24"),
+        ({"10.0.0.128/25"}, 24, "10.0.1.0/24"),
+        ({"10.0.0.0/24"}, 22, "10.0.4.0/22"),
+        ({"10.0.0.0/24"}, 28, "10.0.1.0/28"),
+        ({"10.0.0.0/8"}, 24, "172.16.0.0/24"),
+        ({"10.0.0.0/8", "172.16.0.0/12"}, 16, "192.168.0.0/16"),
+        ({"10.0.0.0/24", "fd00::/64"}, 24, "10.0.1.0/24"),
+    ),
+)
+def test_find_free(used, prefixlen, expected):
+    allocator = CidrAllocator()
+    allocator.sync(used)
+
+    assert str(allocator.find_free(prefixlen)) == expected
+
+
+def test_all_subnets_exhausted():
+    allocator = CidrAllocator()
+    allocator.sync({"10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"})
+
+    with pytest.raises(FreeSubnetIsNotFound):
+        allocator.find_free()
+
+
+def test_sync_is_incremental():
+    allocator = CidrAllocator()
+
+    assert allocator.sync({"10.0.0.0/24", "10.0.1.0/24"}) == (2, 0)
+    assert allocator.sync({"10.0.1.0/24", "10.0.2.0/24"}) == (1, 1)
+    assert allocator.find_free() == IPv4Network("10.0.0.0/24")
+    assert "10.0.0.0/24" not in allocator
+
+
+def test_remove_keeps_overlapping_networks():
+    allocator = CidrAllocator()
+    allocator.sync({"10.0.0.0/16", "10.0.0.0/24"})
+
+    allocator.remove("10.0.0.0/24")
+
+    assert allocator.find_free() == IPv4Network("10.1.0.0/24")
+
+
+def test_same_as_linear_search():
+    rnd = random.Random(42)
+    allocator = CidrAllocator()
+    used: set[str] = set()
+    for _ in range(200):
+        prefixlen = rnd.choice((16, 22, 24, 25, 26))
+        network = IPv4Network((rnd.randrange(10 << 24, 11 << 24), prefixlen), False)
+        if rnd.random() < 0.2 and used:
+            used.remove(rnd.choice(sorted(used)))
+        else:
+            used.add(str(network))
+        allocator.sync(used)
+
+        prefixlen = rnd.choice((24, 26))
+        assert allocator.find_free(prefixlen) == _first_free_subnet(used, prefixlen)
+
+
+def test_get_allocator_for_scope():
+    assert get_allocator(("url", "project")) is get_allocator(("url", "project"))
+    assert get_allocator(("url", "project")) is not get_allocator(("url", "other"))
+
+
+def test_allocated_cidr_is_kept_until_released():
+    allocator = CidrAllocator()
+    cidr = str(allocator.allocate())
+
+    # the subnet isn't created yet
+    allocator.sync(set())
+    assert cidr in allocator
+    assert str(allocator.find_free()) == "10.0.1.0/24"
+
+    allocator.release(cidr)
+    allocator.sync(set())
+    assert cidr not in allocator
+
+
+def test_update_adds_changed_cidrs(monkeypatch):
+    allocator = CidrAllocator()
+    assert allocator.changed_since is None
+    allocator.sync({"10.0.0.0/24"}, "2026-01-01T00:00:00Z")
+
+    assert allocator.update({"10.0.1.0/24"}, "2026-01-01T00:01:00Z") == 1
+
+    # removed subnets are dropped only by a full sync
+    assert allocator.cidrs == {"10.0.0.0/24", "10.0.1.0/24"}
+    assert allocator.changed_since == "2026-01-01T00:01:00Z"
+    monkeypatch.setattr(cidr_allocator, "FULL_SYNC_INTERVAL", -1)
+    assert allocator.changed_since is None
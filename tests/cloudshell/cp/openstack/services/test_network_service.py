@@ -0,0 +1,70 @@
+import logging
+import threading
+import uuid
+from unittest.mock import Mock
+
+from cloudshell.cp.openstack.models.connectivity_models import SubnetCidrData
+from cloudshell.cp.openstack.services.network_service import QVlanNetwork
+
+
+def test_subnets_of_two_networks_get_different_cidrs():
+    created = set()
+    b_listed, a_done = threading.Event(), threading.Event()
+
+    def get_cidrs_changed_since(_):
+        used = set(created)
+        if not b_listed.is_set():
+            # B took the listing, A creates its subnet before B allocates
+            b_listed.set()
+            a_done.wait(0.5)
+        return used, None
+
+    api = Mock(name="OS API", cache_scope=(str(uuid.uuid4()),))
+    api.Subnet.get_cidrs_changed_since.side_effect = get_cidrs_changed_since
+    api.Subnet.create.side_effect = lambda *_, cidr, **__: created.add(cidr)
+    conf = Mock(os_reserved_networks=[])
+    service = QVlanNetwork(api, conf, logging.getLogger("test"))
+    net_a = Mock(name="Network A", id="net-a", subnets=[])
+    net_b = Mock(name="Network B", id="net-b", subnets=[])
+
+    thread = threading.Thread(target=service._create_subnet, args=(net_b, None))
+    thread.start()
+    b_listed.wait(1)
+    service._create_subnet(net_a, None)
+    a_done.set()
+    thread.join()
+
+    cidrs = [call.kwargs["cidr"] for call in api.Subnet.create.call_args_list]
+    assert len(cidrs) == len(set(cidrs)) == 2
+
+
+def _get_service(listings):
+    api = Mock(name="OS API", cache_scope=(str(uuid.uuid4()),))
+    api.Subnet.get_cidrs_changed_since.side_effect = listings
+    conf = Mock(os_reserved_networks=[])
+    return QVlanNetwork(api, conf, logging.getLogger("test")), api
+
+
+def test_only_changed_subnets_are_listed():
+    service, api = _get_service(
+        [({"10.0.0.0/24"}, "2026-01-01T00:00:00Z"), (set(), "2026-01-01T00:00:00Z")]
+    )
+
+    assert service._get_unused_cidr() == "10.0.1.0/24"
+    assert service._get_unused_cidr() == "10.0.2.0/24"
+
+    calls = api.Subnet.get_cidrs_changed_since.call_args_list
+    assert [call.args for call in calls] == [(None,), ("2026-01-01T00:00:00Z",)]
+
+
+def test_user_cidr_isnt_released():
+    service, api = _get_service([(set(), None)])
+    allocated = service._get_unused_cidr()
+    network = Mock(name="Network", id="net", subnets=[])
+
+    service._create_subnet(network, SubnetCidrData.from_str(allocated))
+
+    # still pending, the subnet with the allocated CIDR isn't created yet
+    assert allocated in service._allocator
+    service._allocator.sync(set())
+    assert allocated in service._allocator
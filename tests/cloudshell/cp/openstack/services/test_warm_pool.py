@@ -0,0 +1,172 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import attr
+import pytest
+
+from cloudshell.cp.openstack.flows import DeployAppFromNovaImgFlow
+from cloudshell.cp.openstack.services.warm_pool import (
+    CLAIMS_METRIC,
+    WarmPool,
+    WarmPoolService,
+    get_pool_tag,
+)
+from cloudshell.cp.openstack.utils.metrics import METRICS
+
+from tests.openstack_standin import OpenStackState, StandInServer
+from tests.standin_cloud import Cloud
+
+
+@pytest.fixture()
+def cloud():
+    with StandInServer(OpenStackState()) as server:
+        cloud = Cloud.start(server, logging.getLogger("warm pool"))
+        cloud.conf.warm_pool_size = 2
+        yield cloud
+
+
+@pytest.fixture()
+def pool():
+    pool = WarmPool()
+    yield pool
+    pool.wait()
+
+
+@pytest.fixture()
+def service(cloud, pool):
+    return WarmPoolService(cloud.api, cloud.conf, cloud.logger, pool)
+
+
+@pytest.fixture()
+def deploy_app(cloud):
+    return cloud.get_deploy_app()
+
+
+def _free_ports(cloud, service, deploy_app) -> list[dict]:
+    tag = get_pool_tag(service.get_key(deploy_app))
+    return cloud.server.state.list_neutron("port", {"name": [tag]})
+
+
+def test_refill(cloud, service, deploy_app):
+    key = service.get_key(deploy_app)
+
+    assert service.refill(key) == 2
+    assert service.refill(key) == 0
+
+    ports = _free_ports(cloud, service, deploy_app)
+    assert len(ports) == 2
+    for port in ports:
+        server = cloud.server.state.servers[port["device_id"]]
+        assert server["name"].startswith(f"{get_pool_tag(key)}-")
+
+
+def test_deploy_claims_member(cloud, service, pool, deploy_app):
+    service.refill(service.get_key(deploy_app))
+    members = {port["device_id"] for port in _free_ports(cloud, service, deploy_app)}
+    flow = DeployAppFromNovaImgFlow(
+        cloud.conf, cloud.cancellation_manager, cloud.api, cloud.logger
+    )
+    flow._warm_pool = service
+
+    result = flow._deploy(SimpleNamespace(deploy_app=deploy_app))
+
+    assert result.success, result.errorMessage
+    assert result.vmUuid in members
+    assert result.vmName.startswith("bench app")
+    (port,) = cloud.server.state.server_ports(result.vmUuid)
+    assert port["name"] == "mgmt-port"
+    assert result.deployedAppAttributes[0].attributeValue  # floating IP
+    sg = cloud.server.state.find_security_group(f"sg-{result.vmName}")
+    assert sg["id"] in cloud.server.state.servers[result.vmUuid]["security_groups"]
+    assert pool.stats()["hits"] == 1
+    # refilled in the background
+    pool.wait()
+    assert len(_free_ports(cloud, service, deploy_app)) == 2
+
+
+def test_miss_is_counted(service, pool, deploy_app):
+    misses = METRICS.get_counter(CLAIMS_METRIC, result="miss")
+
+    assert service.claim(deploy_app) is None
+
+    assert pool.stats() == {"hits": 0, "misses": 1, "hit_rate": 0.0, "refills": 1}
+    assert METRICS.get_counter(CLAIMS_METRIC, result="miss") == misses + 1
+
+
+def test_concurrent_claims_get_different_members(cloud, service, deploy_app):
+    cloud.conf.warm_pool_size = 3
+    service.refill(service.get_key(deploy_app))
+    cloud.conf.warm_pool_size = 0  # no refills while claiming
+
+    with ThreadPoolExecutor(6) as executor:
+        members = list(executor.map(lambda _: service.claim(deploy_app), range(6)))
+
+    ids = [member.instance.id for member in members if member]
+    assert len(ids) == len(set(ids)) == 3
+
+
+def test_stale_members_are_replaced(cloud, service, deploy_app):
+    key = service.get_key(deploy_app)
+    service.refill(key)
+    (broken, _) = _free_ports(cloud, service, deploy_app)
+    cloud.server.state.servers[broken["device_id"]]["status"] = "ERROR"
+
+    assert service.refill(key) == 1
+
+    assert broken["device_id"] not in cloud.server.state.servers
+    assert len(_free_ports(cloud, service, deploy_app)) == 2
+
+
+def test_app_with_user_data_isnt_suitable(service, deploy_app):
+    assert service.is_suitable(deploy_app)
+
+    deploy_app.user_data = "echo hello"
+
+    assert not service.is_suitable(deploy_app)
+
+
+def test_release_returns_member(cloud, service, deploy_app):
+    cloud.conf.warm_pool_size = 1
+    service.refill(service.get_key(deploy_app))
+    cloud.conf.warm_pool_size = 0
+    member = service.claim(deploy_app)
+    assert not _free_ports(cloud, service, deploy_app)
+
+    service.release(member)
+
+    (port,) = _free_ports(cloud, service, deploy_app)
+    assert port["device_id"] == member.instance.id
+    assert service.claim(deploy_app).instance.id == member.instance.id
+
+
+def test_members_of_dead_refill_are_removed(cloud, service, deploy_app):
+    key = service.get_key(deploy_app)
+    tag = get_pool_tag(key)
+    image = cloud.api.Image.get(key.image_id)
+    flavor = cloud.api.Flavor.find_first(key.flavor)
+    network = cloud.api.Network.get_static(key.mgmt_net_id)
+    # the refills died before naming the ports of the members
+    booting = cloud.api.Instance.create(
+        f"{tag}-{int(time.time())}", image, flavor, network
+    )
+    abandoned = cloud.api.Instance.create(f"{tag}-1000", image, flavor, network)
+
+    assert service.refill(key) == 1
+
+    assert abandoned.id not in cloud.server.state.servers
+    assert booting.id in cloud.server.state.servers
+    assert len(_free_ports(cloud, service, deploy_app)) == 1
+
+
+def test_refill_in_background_uses_own_api(cloud, service, deploy_app):
+    # the API of the command that scheduled the refill isn't used
+    command_api = Mock(name="OS API", cache_scope=("scope",))
+    service = attr.evolve(service, api=command_api)
+
+    service.schedule_refill(service.get_key(deploy_app)).result()
+
+    assert len(_free_ports(cloud, service, deploy_app)) == 2
+    assert not command_api.mock_calls
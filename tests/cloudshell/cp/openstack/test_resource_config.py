@@ -17,3 +17,4 @@ def test_parse_resource_conf(resource_context: ResourceCommandContext, cs_api):
     assert conf.password == "password"
     assert conf.vlan_type == "VXLAN"
     assert conf.controller_url == "http://openstack.example/identity"
+    assert conf.warm_pool_size == 0
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cloudshell.cp.openstack.utils.cached_property import cached_property
+
+
+class Blocked:
+    """The value is computed when the test releases it."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.released = threading.Event()
+        self.calls = 0
+
+    @cached_property
+    def value(self) -> object:
+        self.calls += 1
+        self.started.set()
+        self.released.wait(5)
+        return object()
+
+
+def test_computed_once_by_many_threads():
+    obj = Blocked()
+    barrier = threading.Barrier(16)
+
+    def get_value():
+        barrier.wait()
+        return obj.value
+
+    with ThreadPoolExecutor(16) as executor:
+        futures = [executor.submit(get_value) for _ in range(16)]
+        obj.started.wait(5)
+        obj.released.set()
+        values = [future.result() for future in futures]
+
+    assert obj.calls == 1
+    assert all(value is values[0] for value in values)
+
+
+def test_other_instances_are_not_blocked():
+    blocked, other = Blocked(), Blocked()
+    other.released.set()
+
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(lambda: blocked.value)
+        blocked.started.wait(5)
+        assert other.value is not None
+        assert not future.done()
+        blocked.released.set()
+
+
+def test_deleting_resets_the_value():
+    obj = Blocked()
+    obj.released.set()
+    first = obj.value
+
+    del obj.value
+
+    assert obj.value is not first
+    assert obj.calls == 2
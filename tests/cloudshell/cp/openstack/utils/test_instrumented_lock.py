@@ -0,0 +1,83 @@
+from threading import Event, Thread
+from unittest.mock import Mock
+
+import pytest
+
+from cloudshell.cp.openstack.utils.instrumented_lock import (
+    LOCK_CONTENTIONS_METRIC,
+    LOCK_HOLD_METRIC,
+    LOCK_WAIT_METRIC,
+    InstrumentedLock,
+    LockStats,
+    get_lock_stats,
+    lock_stats_logged,
+)
+from cloudshell.cp.openstack.utils.metrics import MetricsRegistry
+
+
+@pytest.fixture()
+def registry():
+    return MetricsRegistry()
+
+
+def test_reentrant_lock_is_observed_once(registry):
+    lock = InstrumentedLock("lock", registry=registry)
+
+    with lock:
+        with lock:
+            assert lock.holder == "MainThread"
+
+    assert lock.holder is None
+    assert registry.get_histogram(LOCK_WAIT_METRIC, lock="lock").count == 1
+    assert registry.get_histogram(LOCK_HOLD_METRIC, lock="lock").count == 1
+    assert registry.get_counter(LOCK_CONTENTIONS_METRIC, lock="lock") == 0
+
+
+def test_contention_is_counted(registry):
+    lock = InstrumentedLock("lock", key="a", registry=registry)
+    holding = Event()
+    release = Event()
+
+    def worker():
+        with lock:
+            holding.set()
+            release.wait(1)
+
+    thread = Thread(target=worker, name="holder")
+    thread.start()
+    holding.wait(1)
+    assert lock.holder == "holder for 'a'"
+    assert not lock.acquire(blocking=False)
+    release.set()
+    with lock:
+        pass
+    thread.join()
+
+    stats = get_lock_stats(registry)["lock"]
+    assert stats.acquisitions == 2
+    assert stats.contentions == 2
+    assert stats.hold_time > 0
+
+
+def test_lock_stats_logged(registry):
+    logger = Mock()
+    lock = InstrumentedLock("used", registry=registry)
+    with InstrumentedLock("used before", registry=registry):
+        pass
+
+    with lock_stats_logged(logger, registry):
+        with lock:
+            pass
+        with lock:
+            pass
+
+    logger.debug.assert_called_once()
+    assert logger.debug.call_args.args[0].startswith(
+        "Lock 'used' stats: acquired 2 times, contended 0 times"
+    )
+
+
+def test_lock_stats_difference():
+    stats = LockStats(3, 1, 0.5, 2.0) - LockStats(1, 1, 0.25, 1.0)
+
+    assert stats == LockStats(2, 0, 0.25, 1.0)
@@ -0,0 +1,53 @@
+from threading import Event, Thread
+
+from cloudshell.cp.openstack.utils.keyed_lock import KeyedLock
+
+
+def test_different_keys_do_not_block():
+    locks = KeyedLock()
+    entered = Event()
+
+    def worker():
+        with locks("b"):
+            entered.set()
+
+    with locks("a"):
+        thread = Thread(target=worker)
+        thread.start()
+        assert entered.wait(1)
+    thread.join()
+
+
+def test_same_key_blocks():
+    locks = KeyedLock()
+    entered = Event()
+
+    def worker():
+        with locks("a"):
+            entered.set()
+
+    with locks("a"):
+        thread = Thread(target=worker)
+        thread.start()
+        assert not entered.wait(0.1)
+    assert entered.wait(1)
+    thread.join()
+
+
+def test_lock_is_reentrant_and_removed():
+    locks = KeyedLock()
+
+    with locks("a"):
+        with locks("a"):
+            assert len(locks) == 1
+
+    assert len(locks) == 0
+
+
+def test_holders():
+    locks = KeyedLock("locks")
+
+    with locks("a"):
+        assert locks.holders() == {"a": "MainThread for 'a'"}
+
+    assert locks.holders() == {}
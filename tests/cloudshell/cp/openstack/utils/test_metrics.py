@@ -0,0 +1,101 @@
+import pytest
+
+from cloudshell.cp.openstack.utils.metrics import (
+    METRICS,
+    OPERATION_METRIC,
+    MetricsRegistry,
+    timed,
+)
+
+
+@pytest.fixture()
+def registry():
+    return MetricsRegistry(buckets=(0.1, 1.0))
+
+
+def test_counters(registry):
+    registry.inc("errors", service="nova")
+    registry.inc("errors", 2, service="nova")
+    registry.inc("errors", service="neutron")
+
+    assert registry.get_counter("errors", service="nova") == 3
+    assert registry.get_counter("errors", service="neutron") == 1
+    assert registry.get_counter("errors", service="glance") == 0
+
+
+def test_histogram(registry):
+    for value in (0.05, 0.1, 0.5, 5):
+        registry.observe("latency_seconds", value, method="GET")
+
+    histogram = registry.get_histogram("latency_seconds", method="GET")
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(5.65)
+    assert histogram.cumulative() == {"0.1": 2, "1.0": 3, "+Inf": 4}
+
+
+def test_timer_counts_errors(registry):
+    with pytest.raises(ValueError):
+        with registry.timer("call", operation="x"):
+            raise ValueError
+
+    assert registry.get_histogram("call_seconds", operation="x").count == 1
+    assert registry.get_counter("call_errors", operation="x", error="ValueError") == 1
+
+
+def test_snapshot(registry):
+    registry.inc("retries", url="/ports")
+    registry.observe("latency_seconds", 0.5, url="/ports")
+
+    assert registry.snapshot() == {
+        "counters": {"retries": [{"labels": {"url": "/ports"}, "value": 1}]},
+        "histograms": {
+            "latency_seconds": [
+                {
+                    "labels": {"url": "/ports"},
+                    "count": 1,
+                    "sum": 0.5,
+                    "buckets": {"0.1": 0, "1.0": 1, "+Inf": 1},
+                }
+            ]
+        },
+    }
+
+
+def test_openmetrics(registry, tmp_path):
+    registry.inc("retries", service="neutron", url="/v2.0/ports")
+    registry.observe("latency_seconds", 0.5, method="GET")
+    path = tmp_path / "metrics.txt"
+
+    registry.write_openmetrics(str(path))
+
+    assert path.read_text() == (
+        "# TYPE retries counter\n"
+        'retries_total{service="neutron",url="/v2.0/ports"} 1\n'
+        "# TYPE latency_seconds histogram\n"
+        "# UNIT latency_seconds seconds\n"
+        'latency_seconds_bucket{method="GET",le="0.1"} 0\n'
+        'latency_seconds_bucket{method="GET",le="1.0"} 1\n'
+        'latency_seconds_bucket{method="GET",le="+Inf"} 1\n'
+        'latency_seconds_count{method="GET"} 1\n'
+        'latency_seconds_sum{method="GET"} 0.5\n'
+        "# EOF\n"
+    )
+
+
+def test_timed():
+    class Model:
+        @classmethod
+        @timed
+        def find(cls):
+            return cls
+
+    before = METRICS.get_histogram(
+        f"{OPERATION_METRIC}_seconds", operation=Model.find.__qualname__
+    )
+    assert before is None
+
+    assert Model.find() is Model
+    histogram = METRICS.get_histogram(
+        f"{OPERATION_METRIC}_seconds", operation="test_timed.<locals>.Model.find"
+    )
+    assert histogram.count == 1
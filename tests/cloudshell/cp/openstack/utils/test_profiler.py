@@ -0,0 +1,109 @@
+import cProfile
+import os
+import pstats
+import tracemalloc
+from unittest.mock import Mock
+
+from cloudshell.cp.openstack.utils.profiler import (
+    PROFILE_DIR_ENV,
+    PROFILE_MAX_MB_ENV,
+    CommandProfile,
+    profiled,
+    rotate,
+)
+
+
+@profiled("inner")
+def inner():
+    return sum(range(1000))
+
+
+@profiled("outer")
+def outer():
+    return inner()
+
+
+def test_profiling_is_disabled(tmp_path, monkeypatch):
+    monkeypatch.delenv(PROFILE_DIR_ENV, raising=False)
+
+    assert outer() == 499500
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_command_profile(tmp_path, monkeypatch):
+    profile_dir = tmp_path / "profiles"
+    monkeypatch.setenv(PROFILE_DIR_ENV, str(profile_dir))
+
+    assert outer() == 499500
+
+    # nested commands are profiled as a part of the outer one
+    (prof,) = profile_dir.glob("*-outer-*.prof")
+    assert not list(profile_dir.glob("*-inner-*"))
+    functions = {func[2] for func in pstats.Stats(str(prof)).stats}
+    assert "inner" in functions
+    summary = prof.with_suffix(".txt").read_text()
+    assert summary.startswith("command: outer\nwall time: ")
+    assert "peak memory: " in summary
+
+
+@profiled("allocate")
+def allocate(size: int) -> int:
+    return len(bytearray(size))
+
+
+def test_peak_memory(tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_DIR_ENV, str(tmp_path))
+
+    allocate(10 * 1024 * 1024)
+
+    (summary,) = tmp_path.glob("*-allocate-*.txt")
+    peak = float(summary.read_text().split("peak memory: ")[1].split()[0])
+    assert peak >= 10
+
+
+def test_tracemalloc_is_stopped_after_last_profile(tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_DIR_ENV, str(tmp_path))
+    other = CommandProfile("other", tmp_path)
+
+    with other:
+        outer()
+        # the other command is still profiled
+        assert tracemalloc.is_tracing()
+
+    assert not tracemalloc.is_tracing()
+
+
+def test_another_profiler_is_active(tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_DIR_ENV, str(tmp_path))
+    # Python 3.12+ raises for the second profiler in the process
+    monkeypatch.setattr(
+        cProfile.Profile, "enable", Mock(side_effect=ValueError("active"))
+    )
+
+    assert outer() == 499500
+
+    assert not list(tmp_path.glob("*.prof"))
+    (summary,) = tmp_path.glob("*-outer-*.txt")
+    assert "cProfile: skipped" in summary.read_text()
+
+
+def test_profiles_are_rotated(tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(PROFILE_MAX_MB_ENV, "0")
+
+    outer()
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_rotate(tmp_path):
+    for i in range(4):
+        path = tmp_path / f"{i}.prof"
+        path.write_bytes(b"x" * 10)
+        os.utime(path, (i, i))
+
+    removed = rotate(tmp_path, 25)
+
+    assert [p.name for p in removed] == ["0.prof", "1.prof"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2.prof", "3.prof"]
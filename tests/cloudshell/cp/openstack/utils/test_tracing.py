@@ -0,0 +1,82 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cloudshell.cp.openstack.utils.tracing import (
+    TRACE_FILE_ENV,
+    propagate,
+    span,
+    traced,
+)
+
+
+@pytest.fixture()
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(TRACE_FILE_ENV, str(path))
+    return path
+
+
+def _read_spans(path) -> dict:
+    spans = map(json.loads, path.read_text().splitlines())
+    return {s["name"]: s for s in spans}
+
+
+def test_tracing_is_disabled(tmp_path, monkeypatch):
+    monkeypatch.delenv(TRACE_FILE_ENV, raising=False)
+
+    with span("phase") as s:
+        assert s is None
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_child_spans(trace_file):
+    @traced("child")
+    def child():
+        pass
+
+    with span("parent", app_name="app"):
+        child()
+    with span("other"):
+        pass
+
+    spans = _read_spans(trace_file)
+    parent, child_span, other = spans["parent"], spans["child"], spans["other"]
+    assert parent["parent_id"] is None
+    assert parent["attributes"]["app_name"] == "app"
+    assert child_span["parent_id"] == parent["span_id"]
+    assert child_span["trace_id"] == parent["trace_id"]
+    assert other["trace_id"] != parent["trace_id"]
+    assert parent["start_time_unix_nano"] <= child_span["start_time_unix_nano"]
+    assert parent["end_time_unix_nano"] >= child_span["end_time_unix_nano"]
+    assert parent["status"]["code"] == "OK"
+
+
+def test_span_error(trace_file):
+    with pytest.raises(ValueError):
+        with span("phase"):
+            raise ValueError("failed")
+
+    phase = _read_spans(trace_file)["phase"]
+    assert phase["status"] == {"code": "ERROR", "message": "ValueError: failed"}
+
+
+def test_propagate_to_threads(trace_file):
+    def work(i):
+        with span(f"work {i}"):
+            pass
+
+    with span("parent"):
+        with ThreadPoolExecutor(2) as executor:
+            futures = [executor.submit(propagate(work), i) for i in range(2)]
+            for future in futures:
+                future.result()
+    with ThreadPoolExecutor(1) as executor:
+        executor.submit(work, "not propagated").result()
+
+    spans = _read_spans(trace_file)
+    parent_id = spans["parent"]["span_id"]
+    assert spans["work 0"]["parent_id"] == spans["work 1"]["parent_id"] == parent_id
+    assert spans["work not propagated"]["parent_id"] is None
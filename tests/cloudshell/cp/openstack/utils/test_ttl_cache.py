@@ -0,0 +1,72 @@
+from unittest.mock import Mock
+
+from cloudshell.cp.openstack.utils.ttl_cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_and_set():
+    cache = TTLCache()
+
+    assert cache.get("key") is None
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+    assert "key" in cache
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_entries_expire():
+    timer = FakeTimer()
+    cache = TTLCache(ttl=10, timer=timer)
+    cache.set("key", "value")
+
+    timer.now = 9
+    assert cache.get("key") == "value"
+    timer.now = 10
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_get_or_set():
+    cache = TTLCache()
+    fetch = Mock(return_value="value")
+
+    assert cache.get_or_set("key", fetch) == "value"
+    assert cache.get_or_set("key", fetch) == "value"
+    fetch.assert_called_once_with()
+
+
+def test_invalidate():
+    cache = TTLCache()
+    cache.set(("a", 1), 1)
+    cache.set(("a", 2), 2)
+    cache.set(("b", 1), 3)
+
+    cache.invalidate(("a", 1))
+    removed = cache.invalidate_if(lambda key, value: key[0] == "b")
+
+    assert removed == 1
+    assert len(cache) == 1
+    assert ("a", 2) in cache
+
+    cache.clear()
+    assert len(cache) == 0
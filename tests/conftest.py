@@ -25,12 +25,19 @@ from .neutron_emu import NeutronEmu
 from cloudshell.cp.openstack.constants import SHELL_NAME
 from cloudshell.cp.openstack.models import OSNovaImgDeployApp, OSNovaImgDeployedApp
 from cloudshell.cp.openstack.os_api.api import OsApi
+from cloudshell.cp.openstack.os_api.catalog_cache import invalidate_catalog
 from cloudshell.cp.openstack.os_api.commands.rollback import RollbackCommandsManager
 from cloudshell.cp.openstack.os_api.models import NetworkType
 from cloudshell.cp.openstack.os_api.models.instance import InstanceStatus
 from cloudshell.cp.openstack.resource_config import OSResourceConfig
 
 
+@pytest.fixture(autouse=True)
+def clear_catalog_cache():
+    yield
+    invalidate_catalog()
+
+
 @pytest.fixture()
 def logger():
     return create_autospec(Logger)
@@ -239,7 +246,11 @@ def resource_conf(resource_context, cs_api):
 
 @pytest.fixture()
 def os_session():
-    return create_autospec(KeyStoneSession)
+    session = create_autospec(KeyStoneSession)
+    session.auth = Mock(
+        auth_url="http://keystone", project_name="admin", project_domain_id="default"
+    )
+    return session
 
 
 @pytest.fixture()
@@ -298,6 +309,7 @@ def nova(instance):
     n.servers.create.return_value = instance
     n.servers.find.return_value = instance
     n.servers.get.return_value = instance
+    n.servers.list.return_value = [instance]
     return n
 
 
@@ -49,12 +49,20 @@ def get_floating_ip_data(id_: str, ip: str) -> dict:
     return {"id": id_, "floating_ip_address": ip}
 
 
-def get_port_data(id_: str, name: str, network_id: str, mac_address: str) -> dict:
+def get_port_data(
+    id_: str,
+    name: str,
+    network_id: str,
+    mac_address: str,
+    device_id: str = "",
+) -> dict:
     return {
         "id": id_,
         "name": name,
         "network_id": network_id,
         "mac_address": mac_address,
+        "device_id": device_id,
+        "revision_number": 1,
     }
 
 
@@ -74,6 +82,13 @@ def get_security_group_data(id_: str, name: str) -> dict:
     return {"id": id_, "name": name}
 
 
+def _matches(value, filter_value) -> bool:
+    # Neutron accepts a list of values for a filter
+    if isinstance(filter_value, list):
+        return value in filter_value
+    return value == filter_value
+
+
 class NeutronEmu:
     def __init__(self):
         self.emu_networks: list[dict] = []
@@ -110,7 +125,7 @@ class NeutronEmu:
             data_list = []
             for data in self.emu_networks:
                 for key, val in kwargs.items():
-                    if data[key] == val:
+                    if _matches(data[key], val):
                         data_list.append(data)
                         break
         return {"networks": data_list}
@@ -218,10 +233,15 @@ class NeutronEmu:
         self.emu_floating_ips.remove(data)
 
     def emu_add_port(
-        self, id_: str, name: str, net_id: str, mac: str | None = None
+        self,
+        id_: str,
+        name: str,
+        net_id: str,
+        mac: str | None = None,
+        device_id: str = "",
     ) -> None:
         mac = mac or str(uuid4())
-        data = get_port_data(id_, name, net_id, mac)
+        data = get_port_data(id_, name, net_id, mac, device_id)
         self.emu_ports.append(data)
 
     def show_port(self, id_: str) -> dict:
@@ -237,23 +257,29 @@ class NeutronEmu:
             data_list = []
             for data in self.emu_ports:
                 for key, val in kwargs.items():
-                    if data[key] == val:
+                    if _matches(data.get(key), val):
                         data_list.append(data)
                         break
         return {"ports": data_list}
 
     def create_port(self, data_dict: dict) -> dict:
-        data: dict = data_dict["port"]
-
-        data["id"] = f"{data['name']}-id"
-        self.emu_ports.append(data)
+        for data in data_dict.get("ports", [data_dict.get("port")]):
+            data["id"] = f"{data['name']}-id"
+            data.setdefault("revision_number", 1)
+            self.emu_ports.append(data)
 
         return data_dict
 
-    def update_port(self, id_: str, data_dict: dict) -> None:
+    def update_port(
+        self, id_: str, data_dict: dict, revision_number: int | None = None
+    ) -> dict:
         new_data = data_dict["port"]
         old_data = self.show_port(id_)["port"]
+        if revision_number and old_data["revision_number"] != revision_number:
+            raise neutron_exc.NeutronClientException(status_code=412)
         old_data.update(new_data)
+        old_data["revision_number"] += 1
+        return {"port": old_data}
 
     def delete_port(self, id_: str) -> None:
         data = self.show_port(id_)["port"]
@@ -278,7 +304,7 @@ class NeutronEmu:
             data_list = []
             for data in self.emu_trunks:
                 for key, val in kwargs.items():
-                    if data[key] == val:
+                    if _matches(data[key], val):
                         data_list.append(data)
                         break
         return {"trunks": data_list}
@@ -310,14 +336,15 @@ class NeutronEmu:
         return {"sub_ports": sub_port_dicts}
 
     def trunk_add_subports(self, trunk_id: str, data_dict: dict[str, list[dict]]):
-        data = data_dict["sub_ports"][0]
+        new_sub_ports = data_dict["sub_ports"]
 
         for existed_trunk_id, existed_sub_ports in self.emu_trunk_subports.items():
             for sub_ports_data in existed_sub_ports:
-                if sub_ports_data["port_id"] == data["port_id"]:
-                    raise neutron_exc.Conflict
+                for data in new_sub_ports:
+                    if sub_ports_data["port_id"] == data["port_id"]:
+                        raise neutron_exc.Conflict
 
-        self.emu_trunk_subports.setdefault(trunk_id, []).append(data)
+        self.emu_trunk_subports.setdefault(trunk_id, []).extend(new_sub_ports)
 
     def trunk_remove_subports(self, trunk_id: str, data_dict: dict[str, list[dict]]):
         port_id = data_dict["sub_ports"][0]["port_id"]
@@ -365,6 +392,8 @@ class NeutronEmu:
         data = self.show_security_group(id_)["security_group"]
         self.emu_security_groups.remove(data)
 
-    def create_security_group_rule(self, data_dict: dict[str, dict]) -> None:
-        data = data_dict["security_group_rule"]
-        self.emu_security_group_rules.append(data)
+    def create_security_group_rule(self, data_dict: dict) -> None:
+        if "security_group_rules" in data_dict:
+            self.emu_security_group_rules.extend(data_dict["security_group_rules"])
+        else:
+            self.emu_security_group_rules.append(data_dict["security_group_rule"])
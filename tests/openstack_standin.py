@@ -0,0 +1,900 @@
+"""Local HTTP stand-in for Keystone, Nova, Neutron and Glance.
+
+It implements only the requests the shell makes, keeps everything in memory
+and injects latency, jitter and errors per service or per endpoint, e.g.
+`{"nova": Latency(0.05, 0.01), "neutron POST /v2.0/ports": Latency(0.2)}`.
+"""
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ipaddress import IPv4Network
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlsplit
+
+import attr
+
+from cloudshell.cp.openstack.os_api.http_metrics import get_url_template
+
+PROJECT_ID = "project-id"
+SERVICE_PREFIXES = {
+    "keystone": "/identity",
+    "nova": "/compute/v2.1",
+    "neutron": "/network",
+    "glance": "/image",
+}
+SERVICE_TYPES = {
+    "keystone": "identity",
+    "nova": "compute",
+    "neutron": "network",
+    "glance": "image",
+}
+NEUTRON_RESOURCES = {
+    "networks": "network",
+    "subnets": "subnet",
+    "ports": "port",
+    "trunks": "trunk",
+    "floatingips": "floatingip",
+    "security-groups": "security_group",
+    "security-group-rules": "security_group_rule",
+}
+NOT_FOUND_TYPES = {
+    "network": "NetworkNotFound",
+    "subnet": "SubnetNotFound",
+    "port": "PortNotFound",
+    "trunk": "TrunkNotFound",
+    "floatingip": "FloatingIPNotFound",
+    "security_group": "SecurityGroupNotFound",
+    "security_group_rule": "SecurityGroupRuleNotFound",
+}
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class Latency:
+    """Delay of a response in seconds, jitter is the standard deviation."""
+
+    mean: float = 0.0
+    jitter: float = 0.0
+
+    def get_delay(self, rnd: random.Random) -> float:
+        if not self.jitter:
+            return self.mean
+        return max(0.0, rnd.gauss(self.mean, self.jitter))
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class ErrorRate:
+    """Share of the requests that fail with the status code."""
+
+    rate: float
+    status: int = 503
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, body: dict):
+        super().__init__(status)
+        self.status = status
+        self.body = body
+
+
+def _neutron_error(status: int, type_: str, message: str) -> HttpError:
+    # neutronclient maps the type to an exception only if all keys are present
+    error = {"type": type_, "message": message, "detail": ""}
+    return HttpError(status, {"NeutronError": error})
+
+
+def _not_found(kind: str, id_: str) -> HttpError:
+    type_ = NOT_FOUND_TYPES.get(kind, "NotFound")
+    return _neutron_error(404, type_, f"{kind} {id_} could not be found.")
+
+
+def _conflict(message: str, type_: str = "Conflict") -> HttpError:
+    return _neutron_error(409, type_, message)
+
+
+def _nova_not_found(message: str) -> HttpError:
+    return HttpError(404, {"itemNotFound": {"code": 404, "message": message}})
+
+
+def _nova_bad_request(message: str) -> HttpError:
+    return HttpError(400, {"badRequest": {"code": 400, "message": message}})
+
+
+def _matches(value: Any, filter_values: list[str]) -> bool:
+    return str(value) in filter_values or (
+        isinstance(value, bool) and str(value).lower() in filter_values
+    )
+
+
+class OpenStackState:
+    """Objects of all services, every change happens under one lock."""
+
+    def __init__(self, boot_time: float = 0.0):
+        self.boot_time = boot_time
+        self.lock = threading.RLock()
+        self.neutron: dict[str, dict[str, dict]] = {
+            kind: {} for kind in NEUTRON_RESOURCES.values()
+        }
+        self.servers: dict[str, dict] = {}
+        self.flavors: dict[str, dict] = {}
+        self.images: dict[str, dict] = {}
+        self._mac_counter = 0
+        self._ip_counters: Counter = Counter()
+
+    # --- helpers to fill the cloud ---
+    def add_image(self, name: str = "image") -> dict:
+        id_ = str(uuid.uuid4())
+        self.images[id_] = {
+            "id": id_,
+            "name": name,
+            "status": "active",
+            "visibility": "public",
+            "disk_format": "qcow2",
+            "container_format": "bare",
+            "size": 1024,
+            "tags": [],
+        }
+        return self.images[id_]
+
+    def add_flavor(self, name: str = "m1.small") -> dict:
+        id_ = str(len(self.flavors) + 1)
+        self.flavors[id_] = {
+            "id": id_,
+            "name": name,
+            "vcpus": 1,
+            "ram": 2048,
+            "disk": 20,
+            "links": [],
+        }
+        return self.flavors[id_]
+
+    def add_network(self, name: str, cidr: str, external: bool = False) -> dict:
+        net = self.create_neutron(
+            "network", {"name": name, "router:external": external}
+        )
+        self.create_neutron(
+            "subnet", {"name": f"{name} subnet", "network_id": net["id"], "cidr": cidr}
+        )
+        return net
+
+    # --- neutron ---
+    def list_neutron(self, kind: str, filters: dict[str, list[str]]) -> list[dict]:
+        filters = {k: v for k, v in filters.items() if k != "fields"}
+        # Neutron lists objects updated at or after the time
+        changed_since = filters.pop("changed_since", [""])[0]
+        with self.lock:
+            return [
+                obj
+                for obj in self.neutron[kind].values()
+                if all(_matches(obj.get(k), v) for k, v in filters.items())
+                and obj.get("updated_at", "") >= changed_since
+            ]
+
+    def show_neutron(self, kind: str, id_: str) -> dict:
+        try:
+            return self.neutron[kind][id_]
+        except KeyError:
+            raise _not_found(kind, id_) from None
+
+    def create_neutron(self, kind: str, data: dict) -> dict:
+        with self.lock:
+            obj = getattr(self, f"_new_{kind}", self._new_object)(dict(data))
+            obj.setdefault("id", str(uuid.uuid4()))
+            obj.setdefault("name", "")
+            obj.setdefault("project_id", PROJECT_ID)
+            obj.setdefault("created_at", time.strftime("%Y-%m-%dT%H:%M:%SZ"))
+            obj["updated_at"] = obj["created_at"]
+            obj["revision_number"] = 1
+            self.neutron[kind][obj["id"]] = obj
+            return obj
+
+    def update_neutron(
+        self, kind: str, id_: str, data: dict, revision_number: int | None = None
+    ) -> dict:
+        """Update the object, with the revision number only if it's unchanged."""
+        with self.lock:
+            obj = self.show_neutron(kind, id_)
+            if (
+                revision_number is not None
+                and obj["revision_number"] != revision_number
+            ):
+                raise _neutron_error(
+                    412,
+                    "RevisionNumberConstraintFailed",
+                    f"Constrained to {revision_number}, "
+                    f"but current revision is {obj['revision_number']}",
+                )
+            obj.update(data)
+            obj["revision_number"] += 1
+            obj["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+            return obj
+
+    def delete_neutron(self, kind: str, id_: str) -> None:
+        with self.lock:
+            obj = self.show_neutron(kind, id_)
+            getattr(self, f"_delete_{kind}", lambda _: None)(obj)
+            del self.neutron[kind][id_]
+
+    @staticmethod
+    def _new_object(data: dict) -> dict:
+        return data
+
+    def _new_network(self, data: dict) -> dict:
+        vlan_id = data.get("provider:segmentation_id")
+        if vlan_id is not None:
+            for net in self.neutron["network"].values():
+                if net.get("provider:segmentation_id") == vlan_id:
+                    raise _conflict(f"VLAN {vlan_id} is in use", "VlanIdInUse")
+        data.setdefault("provider:network_type", "vxlan")
+        data.setdefault("provider:segmentation_id", None)
+        data.setdefault("router:external", False)
+        data.setdefault("admin_state_up", True)
+        return data
+
+    def _delete_network(self, net: dict) -> None:
+        for port in self.neutron["port"].values():
+            if port["network_id"] == net["id"]:
+                raise _conflict(f"Network {net['id']} is in use", "NetworkInUse")
+        for subnet in list(self.neutron["subnet"].values()):
+            if subnet["network_id"] == net["id"]:
+                del self.neutron["subnet"][subnet["id"]]
+
+    def _new_subnet(self, data: dict) -> dict:
+        self.show_neutron("network", data["network_id"])
+        hosts = list(IPv4Network(data["cidr"]).hosts())
+        data.setdefault("ip_version", 4)
+        data.setdefault("gateway_ip", str(hosts[0]))
+        data.setdefault(
+            "allocation_pools", [{"start": str(hosts[1]), "end": str(hosts[-1])}]
+        )
+        return data
+
+    def _allocate_ip(self, network_id: str) -> tuple[str, str] | None:
+        for subnet in self.neutron["subnet"].values():
+            if subnet["network_id"] == network_id:
+                self._ip_counters[subnet["id"]] += 1
+                network = IPv4Network(subnet["cidr"])
+                ip = network[self._ip_counters[subnet["id"]] + 1]
+                return subnet["id"], str(ip)
+        return None
+
+    def _new_port(self, data: dict) -> dict:
+        self.show_neutron("network", data["network_id"])
+        if not data.get("mac_address"):
+            self._mac_counter += 1
+            counter = self._mac_counter
+            data["mac_address"] = f"fa:16:3e:{counter >> 16 & 255:02x}:" + (
+                f"{counter >> 8 & 255:02x}:{counter & 255:02x}"
+            )
+        if not data.get("fixed_ips"):
+            allocated = self._allocate_ip(data["network_id"])
+            data["fixed_ips"] = (
+                [{"subnet_id": allocated[0], "ip_address": allocated[1]}]
+                if allocated
+                else []
+            )
+        data.setdefault("device_id", "")
+        data.setdefault("device_owner", "")
+        for sg_id in data.setdefault("security_groups", []):
+            self.show_neutron("security_group", sg_id)
+        return data
+
+    def _delete_port(self, port: dict) -> None:
+        for fip in self.neutron["floatingip"].values():
+            if fip.get("port_id") == port["id"]:
+                fip["port_id"] = None
+
+    def _new_trunk(self, data: dict) -> dict:
+        port = self.show_neutron("port", data["port_id"])
+        if port.get("trunk_details"):
+            raise _conflict(f"Port {port['id']} is in use by a trunk")
+        data["id"] = str(uuid.uuid4())
+        data["sub_ports"] = []
+        port["trunk_details"] = {"trunk_id": data["id"], "sub_ports": []}
+        return data
+
+    def _delete_trunk(self, trunk: dict) -> None:
+        if trunk["port_id"] in self.neutron["port"]:
+            self.neutron["port"][trunk["port_id"]].pop("trunk_details", None)
+
+    def _delete_security_group(self, sg: dict) -> None:
+        users = [*self.servers.values(), *self.neutron["port"].values()]
+        for user in users:
+            if sg["id"] in user["security_groups"]:
+                message = f"Security Group {sg['id']} in use."
+                raise _conflict(message, "SecurityGroupInUse")
+        for rule in list(self.neutron["security_group_rule"].values()):
+            if rule.get("security_group_id") == sg["id"]:
+                del self.neutron["security_group_rule"][rule["id"]]
+
+    def _new_floatingip(self, data: dict) -> dict:
+        subnet = self.show_neutron("subnet", data["subnet_id"])
+        self._ip_counters[subnet["id"]] += 1
+        ip = IPv4Network(subnet["cidr"])[self._ip_counters[subnet["id"]] + 1]
+        data["floating_ip_address"] = str(ip)
+        return data
+
+    def add_sub_ports(self, trunk_id: str, sub_ports: list[dict]) -> dict:
+        with self.lock:
+            trunk = self.show_neutron("trunk", trunk_id)
+            used = {
+                sub_port["port_id"]
+                for other in self.neutron["trunk"].values()
+                for sub_port in other["sub_ports"]
+            }
+            for sub_port in sub_ports:
+                self.show_neutron("port", sub_port["port_id"])
+                if sub_port["port_id"] in used:
+                    raise _conflict(f"Port {sub_port['port_id']} is in use")
+            trunk["sub_ports"].extend(sub_ports)
+            trunk["revision_number"] += 1
+            return trunk
+
+    def remove_sub_ports(self, trunk_id: str, sub_ports: list[dict]) -> dict:
+        with self.lock:
+            trunk = self.show_neutron("trunk", trunk_id)
+            existed = {sub_port["port_id"] for sub_port in trunk["sub_ports"]}
+            for sub_port in sub_ports:
+                if sub_port["port_id"] not in existed:
+                    raise _not_found("port", sub_port["port_id"])
+            removed = {sub_port["port_id"] for sub_port in sub_ports}
+            trunk["sub_ports"] = [
+                s for s in trunk["sub_ports"] if s["port_id"] not in removed
+            ]
+            trunk["revision_number"] += 1
+            return trunk
+
+    # --- nova ---
+    def get_server(self, id_: str) -> dict:
+        try:
+            server = self.servers[id_]
+        except KeyError:
+            raise _nova_not_found(f"Instance {id_} could not be found.") from None
+        if server["status"] == "BUILD" and time.time() >= server["__active_at"]:
+            server["status"] = "ACTIVE"
+        return server
+
+    def show_server(self, id_: str) -> dict:
+        with self.lock:
+            return self.render_server(self.get_server(id_))
+
+    def update_server(self, id_: str, data: dict) -> dict:
+        with self.lock:
+            server = self.get_server(id_)
+            server.update({k: v for k, v in data.items() if k == "name"})
+            return self.render_server(server)
+
+    def list_servers(self, filters: dict[str, list[str]] | None = None) -> list[dict]:
+        """The newest servers first, the name filter is a regex."""
+        filters = filters or {}
+        name = filters.get("name", [""])[0]
+        limit = int(filters["limit"][0]) if "limit" in filters else None
+        with self.lock:
+            return [
+                self.show_server(id_)
+                for id_, server in reversed(list(self.servers.items()))
+                if re.search(name, server["name"])
+            ][:limit]
+
+    def render_server(self, server: dict) -> dict:
+        addresses: dict[str, list[dict]] = {}
+        for port in self.server_ports(server["id"]):
+            net = self.neutron["network"][port["network_id"]]
+            items = addresses.setdefault(net["name"], [])
+            for fixed_ip in port["fixed_ips"]:
+                items.append(
+                    {
+                        "version": 4,
+                        "addr": fixed_ip["ip_address"],
+                        "OS-EXT-IPS:type": "fixed",
+                        "OS-EXT-IPS-MAC:mac_addr": port["mac_address"],
+                    }
+                )
+            for fip in self.neutron["floatingip"].values():
+                if fip.get("port_id") == port["id"]:
+                    items.append(
+                        {
+                            "version": 4,
+                            "addr": fip["floating_ip_address"],
+                            "OS-EXT-IPS:type": "floating",
+                            "OS-EXT-IPS-MAC:mac_addr": port["mac_address"],
+                        }
+                    )
+        data = {k: v for k, v in server.items() if not k.startswith("__")}
+        data["addresses"] = addresses
+        return data
+
+    def server_ports(self, server_id: str) -> list[dict]:
+        return [
+            port
+            for port in self.neutron["port"].values()
+            if port["device_id"] == server_id
+        ]
+
+    def create_server(self, data: dict) -> dict:
+        with self.lock:
+            id_ = str(uuid.uuid4())
+            now = time.time()
+            server = {
+                "id": id_,
+                "name": data["name"],
+                "status": "BUILD" if self.boot_time else "ACTIVE",
+                "image": {"id": data["imageRef"]},
+                "flavor": {"id": data["flavorRef"]},
+                "OS-EXT-AZ:availability_zone": data.get("availability_zone") or "nova",
+                "updated": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)),
+                "security_groups": [
+                    self._get_boot_security_group(sg["name"])
+                    for sg in data.get("security_groups") or ()
+                ],
+                "__active_at": now + self.boot_time,
+            }
+            self.servers[id_] = server
+            for nic in data.get("networks", []):
+                if "port" in nic:
+                    self.bind_port(id_, nic["port"])
+                else:
+                    self.create_nova_port(id_, nic["uuid"])
+            return server
+
+    def _get_boot_security_group(self, name_or_id: str) -> str:
+        sgs = [
+            sg
+            for sg in self.neutron["security_group"].values()
+            if name_or_id in (sg["id"], sg["name"])
+        ]
+        if not sgs:
+            raise _nova_bad_request(f"Security group {name_or_id} not found.")
+        if len(sgs) > 1:
+            message = f"Multiple security groups found matching '{name_or_id}'."
+            raise _nova_bad_request(message)
+        return sgs[0]["id"]
+
+    def create_nova_port(self, server_id: str, network_id: str) -> dict:
+        return self.create_neutron(
+            "port",
+            {
+                "network_id": network_id,
+                "device_id": server_id,
+                "device_owner": "compute:nova",
+                "__created_by_nova": True,
+            },
+        )
+
+    def bind_port(self, server_id: str, port_id: str) -> dict:
+        port = self.show_neutron("port", port_id)
+        if port["device_id"] and port["device_id"] != server_id:
+            raise HttpError(409, {"conflictingRequest": {"message": "Port in use"}})
+        port["device_id"] = server_id
+        port["device_owner"] = "compute:nova"
+        # Nova shows the groups of the ports
+        groups = self.servers[server_id]["security_groups"]
+        groups.extend(id_ for id_ in port["security_groups"] if id_ not in groups)
+        return port
+
+    def unbind_port(self, port: dict) -> None:
+        if port.get("__created_by_nova"):
+            self.delete_neutron("port", port["id"])
+        else:
+            port["device_id"] = port["device_owner"] = ""
+
+    def delete_server(self, id_: str) -> None:
+        with self.lock:
+            self.get_server(id_)
+            for port in self.server_ports(id_):
+                self.unbind_port(port)
+            del self.servers[id_]
+
+    def server_action(self, id_: str, action: str, params: Any) -> dict | None:
+        """Run the action, createImage returns the image."""
+        with self.lock:
+            server = self.get_server(id_)
+            if action == "os-stop":
+                server["status"] = "SHUTOFF"
+            elif action == "os-start":
+                server["status"] = "ACTIVE"
+            elif action == "createImage":
+                return self.add_image(params["name"])
+            elif action in ("addSecurityGroup", "removeSecurityGroup"):
+                groups = server["security_groups"]
+                sg = self.find_security_group(params["name"])
+                if action == "addSecurityGroup" and sg["id"] not in groups:
+                    groups.append(sg["id"])
+                elif action == "removeSecurityGroup":
+                    if sg["id"] not in groups:
+                        raise _nova_not_found("Security group is not attached")
+                    groups.remove(sg["id"])
+                    for port in self.server_ports(id_):
+                        if sg["id"] in port["security_groups"]:
+                            port["security_groups"].remove(sg["id"])
+        return None
+
+    def find_security_group(self, name_or_id: str) -> dict:
+        for sg in self.neutron["security_group"].values():
+            if name_or_id in (sg["id"], sg["name"]):
+                return sg
+        raise _nova_not_found(f"Security group {name_or_id} not found.")
+
+    def server_security_groups(self, id_: str) -> list[dict]:
+        with self.lock:
+            server = self.get_server(id_)
+            return [
+                self.neutron["security_group"][sg_id]
+                for sg_id in server["security_groups"]
+                if sg_id in self.neutron["security_group"]
+            ]
+
+    def list_interfaces(self, id_: str) -> list[dict]:
+        with self.lock:
+            self.get_server(id_)
+            return list(map(self.render_interface, self.server_ports(id_)))
+
+    def attach_interface(
+        self, id_: str, port_id: str | None, net_id: str | None
+    ) -> dict:
+        with self.lock:
+            self.get_server(id_)
+            if port_id:
+                port = self.bind_port(id_, port_id)
+            else:
+                port = self.create_nova_port(id_, net_id)
+            return self.render_interface(port)
+
+    def detach_interface(self, id_: str, port_id: str) -> None:
+        with self.lock:
+            self.get_server(id_)
+            port = self.neutron["port"].get(port_id)
+            if not port or port["device_id"] != id_:
+                raise _nova_not_found(f"Port {port_id} is not attached")
+            self.unbind_port(port)
+
+    def get_flavor(self, id_: str) -> dict:
+        try:
+            return self.flavors[id_]
+        except KeyError:
+            raise _nova_not_found(f"Flavor {id_} could not be found.") from None
+
+    # --- glance ---
+    def get_image(self, id_: str) -> dict:
+        try:
+            return self.images[id_]
+        except KeyError:
+            raise HttpError(404, {"message": f"No image found with ID {id_}"}) from None
+
+    def delete_image(self, id_: str) -> None:
+        with self.lock:
+            if self.images.pop(id_, None) is None:
+                raise HttpError(404, {"message": "Image not found"})
+
+    @staticmethod
+    def render_interface(port: dict) -> dict:
+        return {
+            "port_id": port["id"],
+            "net_id": port["network_id"],
+            "mac_addr": port["mac_address"],
+            "port_state": "ACTIVE",
+            "fixed_ips": port["fixed_ips"],
+        }
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        state: OpenStackState,
+        latency: dict[str, Latency] | None = None,
+        errors: dict[str, ErrorRate] | None = None,
+        seed: int = 0,
+    ):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.state = state
+        self.latency = latency or {}
+        self.errors = errors or {}
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def auth_url(self) -> str:
+        return f"{self.url}{SERVICE_PREFIXES['keystone']}/v3"
+
+    def start(self) -> StandInServer:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> StandInServer:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def count_call(self, key: str) -> None:
+        with self._lock:
+            self.calls[key] += 1
+
+    def get_delay_and_error(self, service: str, key: str) -> tuple[float, int | None]:
+        latency = self.latency.get(key) or self.latency.get(service) or Latency()
+        error = self.errors.get(key) or self.errors.get(service)
+        with self._lock:
+            delay = latency.get_delay(self._random)
+            failed = error is not None and self._random.random() < error.rate
+        return delay, error.status if failed and error else None
+
+    def get_catalog(self) -> list[dict]:
+        return [
+            {
+                "type": SERVICE_TYPES[service],
+                "name": service,
+                "id": service,
+                "endpoints": [
+                    {
+                        "id": f"{service}-{interface}",
+                        "interface": interface,
+                        "region": "RegionOne",
+                        "region_id": "RegionOne",
+                        "url": f"{self.url}{prefix}"
+                        + ("/v3" if service == "keystone" else ""),
+                    }
+                    for interface in ("public", "internal", "admin")
+                ],
+            }
+            for service, prefix in SERVICE_PREFIXES.items()
+        ]
+
+
+Route = Callable[["StandInHandler", re.Match, dict], Any]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are written separately
+    server: StandInServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self):  # noqa: N802
+        self._handle("GET")
+
+    def do_POST(self):  # noqa: N802
+        self._handle("POST")
+
+    def do_PUT(self):  # noqa: N802
+        self._handle("PUT")
+
+    def do_DELETE(self):  # noqa: N802
+        self._handle("DELETE")
+
+    @property
+    def state(self) -> OpenStackState:
+        return self.server.state
+
+    def _handle(self, method: str) -> None:
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"null") if length else None
+        service, path = self._split_service(url.path)
+        key = f"{service} {method} {get_url_template(path)}"
+        self.server.count_call(key)
+
+        delay, error_status = self.server.get_delay_and_error(service, key)
+        if delay:
+            time.sleep(delay)
+        if error_status:
+            return self._send(error_status, {"error": {"message": "Injected error"}})
+
+        self.query = parse_qs(url.query)
+        for pattern, route_method, handler in ROUTES.get(service, []):
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                try:
+                    result = handler(self, match, body)
+                except HttpError as e:
+                    return self._send(e.status, e.body)
+                status, data, headers = (
+                    result if isinstance(result, tuple) else (200, result, {})
+                )
+                return self._send(status, data, headers)
+        self._send(404, {"error": {"message": f"No route for {method} {url.path}"}})
+
+    @staticmethod
+    def _split_service(path: str) -> tuple[str, str]:
+        for service, prefix in SERVICE_PREFIXES.items():
+            if path.startswith(prefix):
+                return service, path[len(prefix) :] or "/"
+        return "other", path
+
+    def _send(self, status: int, data: Any, headers: dict | None = None) -> None:
+        payload = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    # --- keystone ---
+    def issue_token(self, match, body):
+        expires = time.strftime("%Y-%m-%dT%H:%M:%S.000000Z", time.gmtime(1e10))
+        domain = {"id": "default", "name": "Default"}
+        token = {
+            "methods": ["password"],
+            "expires_at": expires,
+            "issued_at": time.strftime("%Y-%m-%dT%H:%M:%S.000000Z"),
+            "user": {"id": "user-id", "name": "admin", "domain": domain},
+            "project": {"id": PROJECT_ID, "name": "admin", "domain": domain},
+            "roles": [{"id": "admin", "name": "admin"}],
+            "catalog": self.server.get_catalog(),
+        }
+        return 201, {"token": token}, {"X-Subject-Token": uuid.uuid4().hex}
+
+    # --- neutron ---
+    def neutron_list(self, match, body):
+        collection = match["collection"]
+        kind = NEUTRON_RESOURCES[collection]
+        objects = self.state.list_neutron(kind, self.query)
+        return {collection.replace("-", "_"): list(map(_public, objects))}
+
+    def neutron_show(self, match, body):
+        kind = NEUTRON_RESOURCES[match["collection"]]
+        return {kind: _public(self.state.show_neutron(kind, match["id"]))}
+
+    def neutron_create(self, match, body):
+        collection = match["collection"]
+        kind = NEUTRON_RESOURCES[collection]
+        if collection.replace("-", "_") in body:
+            with self.state.lock:
+                objects = [
+                    self.state.create_neutron(kind, data)
+                    for data in body[collection.replace("-", "_")]
+                ]
+            return 201, {collection.replace("-", "_"): list(map(_public, objects))}, {}
+        return 201, {kind: _public(self.state.create_neutron(kind, body[kind]))}, {}
+
+    def neutron_update(self, match, body):
+        kind = NEUTRON_RESOURCES[match["collection"]]
+        revision = re.fullmatch(
+            r"revision_number=(\d+)", self.headers["If-Match"] or ""
+        )
+        obj = self.state.update_neutron(
+            kind, match["id"], body[kind], int(revision[1]) if revision else None
+        )
+        return {kind: _public(obj)}
+
+    def neutron_delete(self, match, body):
+        kind = NEUTRON_RESOURCES[match["collection"]]
+        self.state.delete_neutron(kind, match["id"])
+        return 204, None, {}
+
+    def trunk_sub_ports(self, match, body):
+        trunk = self.state.show_neutron("trunk", match["id"])
+        return {"sub_ports": trunk["sub_ports"]}
+
+    def trunk_add_sub_ports(self, match, body):
+        return _public(self.state.add_sub_ports(match["id"], body["sub_ports"]))
+
+    def trunk_remove_sub_ports(self, match, body):
+        return _public(self.state.remove_sub_ports(match["id"], body["sub_ports"]))
+
+    # --- nova ---
+    def server_show(self, match, body):
+        return {"server": self.state.show_server(match["id"])}
+
+    def server_list(self, match, body):
+        return {"servers": self.state.list_servers(self.query)}
+
+    def server_update(self, match, body):
+        return {"server": self.state.update_server(match["id"], body["server"])}
+
+    def server_create(self, match, body):
+        server = self.state.create_server(body["server"])
+        return 202, {"server": {"id": server["id"], "links": []}}, {}
+
+    def server_delete(self, match, body):
+        self.state.delete_server(match["id"])
+        return 204, None, {}
+
+    def server_action(self, match, body):
+        (action, params), *_ = body.items()
+        image = self.state.server_action(match["id"], action, params)
+        if image:
+            location = f"{self.server.url}/image/v2/images/{image['id']}"
+            return 202, None, {"Location": location}
+        return 202, None, {}
+
+    def server_security_groups(self, match, body):
+        groups = self.state.server_security_groups(match["id"])
+        return {"security_groups": list(map(_public, groups))}
+
+    def interface_list(self, match, body):
+        return {"interfaceAttachments": self.state.list_interfaces(match["id"])}
+
+    def interface_attach(self, match, body):
+        data = body["interfaceAttachment"]
+        iface = self.state.attach_interface(
+            match["id"], data.get("port_id"), data.get("net_id")
+        )
+        return {"interfaceAttachment": iface}
+
+    def interface_detach(self, match, body):
+        self.state.detach_interface(match["id"], match["port_id"])
+        return 202, None, {}
+
+    def flavor_show(self, match, body):
+        return {"flavor": self.state.get_flavor(match["id"])}
+
+    def flavor_list(self, match, body):
+        return {"flavors": list(self.state.flavors.values())}
+
+    # --- glance ---
+    def image_show(self, match, body):
+        return self.state.get_image(match["id"])
+
+    def image_delete(self, match, body):
+        self.state.delete_image(match["id"])
+        return 204, None, {}
+
+    def image_schema(self, match, body):
+        return {"name": "image", "properties": {}, "additionalProperties": True}
+
+
+def _public(obj: dict) -> dict:
+    return {k: v for k, v in obj.items() if not k.startswith("__")}
+
+
+_NEUTRON = r"/v2\.0/(?P<collection>[a-z-]+?)(?:\.json)?"
+_NEUTRON_ID = r"/v2\.0/(?P<collection>[a-z-]+)/(?P<id>[^/]+?)(?:\.json)?"
+_TRUNK = r"/v2\.0/trunks/(?P<id>[^/]+)/"
+_SERVER = r"/servers/(?P<id>[^/]+)"
+H = StandInHandler
+ROUTES: dict[str, list[tuple[str, str, Route]]] = {
+    "keystone": [(r"/v3/auth/tokens", "POST", H.issue_token)],
+    "neutron": [
+        (_TRUNK + r"get_subports(?:\.json)?", "GET", H.trunk_sub_ports),
+        (_TRUNK + r"add_subports(?:\.json)?", "PUT", H.trunk_add_sub_ports),
+        (_TRUNK + r"remove_subports(?:\.json)?", "PUT", H.trunk_remove_sub_ports),
+        (_NEUTRON, "GET", H.neutron_list),
+        (_NEUTRON, "POST", H.neutron_create),
+        (_NEUTRON_ID, "GET", H.neutron_show),
+        (_NEUTRON_ID, "PUT", H.neutron_update),
+        (_NEUTRON_ID, "DELETE", H.neutron_delete),
+    ],
+    "nova": [
+        (r"/servers/detail", "GET", H.server_list),
+        (r"/servers", "POST", H.server_create),
+        (_SERVER, "GET", H.server_show),
+        (_SERVER, "PUT", H.server_update),
+        (_SERVER, "DELETE", H.server_delete),
+        (_SERVER + r"/action", "POST", H.server_action),
+        (_SERVER + r"/os-security-groups", "GET", H.server_security_groups),
+        (_SERVER + r"/os-interface", "GET", H.interface_list),
+        (_SERVER + r"/os-interface", "POST", H.interface_attach),
+        (_SERVER + r"/os-interface/(?P<port_id>[^/]+)", "DELETE", H.interface_detach),
+        (r"/flavors(?:/detail)?", "GET", H.flavor_list),
+        (r"/flavors/(?P<id>[^/]+)", "GET", H.flavor_show),
+    ],
+    "glance": [
+        (r"/v2/schemas/image", "GET", H.image_schema),
+        (r"/v2/images/(?P<id>[^/]+)", "GET", H.image_show),
+        (r"/v2/images/(?P<id>[^/]+)", "DELETE", H.image_delete),
+    ],
+}
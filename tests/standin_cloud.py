@@ -0,0 +1,160 @@
+"""Cloud of the OpenStack stand-in with the objects the resource and apps use.
+
+The API call budget tests and the benchmarks run the shell flows with it.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from types import SimpleNamespace
+from typing import Any
+
+import attr
+
+from cloudshell.cp.core.cancellation_manager import CancellationContextManager
+from cloudshell.shell.flows.connectivity.models.connectivity_model import (
+    ActionTargetModel,
+    ConnectionModeEnum,
+    ConnectivityTypeEnum,
+)
+
+from cloudshell.cp.openstack.flows import DeployAppFromNovaImgFlow
+from cloudshell.cp.openstack.models.connectivity_models import OsConnectivityActionModel
+from cloudshell.cp.openstack.models.deploy_app import SecurityGroupRule
+from cloudshell.cp.openstack.os_api.api import OsApi
+
+from tests.openstack_standin import OpenStackState, StandInServer
+
+
+def fill_state(state: OpenStackState) -> tuple[SimpleNamespace, str, str]:
+    """Add the networks, the default group, the image and the flavor to use.
+
+    :return: the resource config, the image ID and the flavor name
+    """
+    image = state.add_image("ubuntu")
+    flavor = state.add_flavor("m1.small")
+    mgmt_net = state.add_network("mgmt", "192.168.100.0/22")
+    trunk_net = state.add_network("trunk", "192.168.200.0/22")
+    floating_net = state.add_network("public", "172.24.0.0/16", external=True)
+    state.create_neutron("security_group", {"name": "default"})
+    floating_subnet = state.list_neutron(
+        "subnet", {"network_id": [floating_net["id"]]}
+    )[0]
+    conf = SimpleNamespace(
+        os_mgmt_net_id=mgmt_net["id"],
+        os_trunk_net_id=trunk_net["id"],
+        floating_ip_subnet_id=floating_subnet["id"],
+        vlan_type="VLAN",
+        os_physical_int_name="physnet1",
+        os_reserved_networks=[],
+        behavior_during_save="Power Off",
+        warm_pool_size=0,
+    )
+    return conf, image["id"], flavor["name"]
+
+
+@attr.s(auto_attribs=True)
+class Cloud:
+    """Stand-in or fake clients with the objects the resource and apps use."""
+
+    server: StandInServer | Any  # FakeCloud of the load test
+    api: OsApi
+    conf: SimpleNamespace
+    image_id: str
+    flavor_name: str
+    logger: logging.Logger
+    cancellation_manager: CancellationContextManager = attr.ib(
+        factory=lambda: CancellationContextManager(SimpleNamespace(is_cancelled=False))
+    )
+
+    @classmethod
+    def start(cls, server: StandInServer, logger: logging.Logger) -> Cloud:
+        conf, image_id, flavor_name = fill_state(server.state)
+        conf.controller_url = server.auth_url
+        conf.user = conf.os_project_name = "admin"
+        conf.password = "password"
+        conf.os_domain_name = "default"
+        api = OsApi.from_config(conf, logger, use_pool=False)
+        return cls(server, api, conf, image_id, flavor_name, logger)
+
+    def get_deploy_app(
+        self, pre_create_mgmt_port: bool = False, shared_security_group: bool = False
+    ) -> SimpleNamespace:
+        return SimpleNamespace(
+            app_name="bench app",
+            image_id=self.image_id,
+            instance_flavor=self.flavor_name,
+            private_ip="",
+            availability_zone="",
+            affinity_group_id="",
+            user_data="",
+            auto_udev=True,
+            add_floating_ip=True,
+            floating_ip_subnet_id="",
+            inbound_ports=[SecurityGroupRule.from_str("22")],
+            pre_create_mgmt_port=pre_create_mgmt_port,
+            shared_security_group=shared_security_group,
+            actionId=str(uuid.uuid4()),
+        )
+
+    def deploy(
+        self, pre_create_mgmt_port: bool = False, shared_security_group: bool = False
+    ) -> str:
+        flow = DeployAppFromNovaImgFlow(
+            self.conf, self.cancellation_manager, self.api, self.logger
+        )
+        deploy_app = self.get_deploy_app(pre_create_mgmt_port, shared_security_group)
+        result = flow._deploy(SimpleNamespace(deploy_app=deploy_app))
+        if not result.success:
+            raise RuntimeError(result.errorMessage)
+        return result.vmUuid
+
+
+def get_deployed_app(vm_id: str, pre_create_mgmt_port: bool = False) -> SimpleNamespace:
+    return SimpleNamespace(
+        name="bench app",
+        private_ip="",
+        pre_create_mgmt_port=pre_create_mgmt_port,
+        vmdetails=SimpleNamespace(uid=vm_id),
+    )
+
+
+def get_vlan_action(
+    vm_id: str,
+    vlan_id: int,
+    mode: ConnectionModeEnum,
+    action_type: ConnectivityTypeEnum = ConnectivityTypeEnum.SET_VLAN,
+    action_id: str | None = None,
+    interface: str = "",
+) -> OsConnectivityActionModel:
+    """Action of the request, remove one should have an ID of the set one."""
+    # IDs look like CloudShell sends them, trunk names are made of them
+    action_id = action_id or f"{uuid.uuid4()}_{uuid.uuid4()}"
+    return OsConnectivityActionModel(
+        connectionId=str(uuid.uuid4()),
+        connectionParams={
+            "vlanId": str(vlan_id),
+            "mode": mode,
+            "type": action_type.value,
+            "vlanServiceAttributes": [
+                {"attributeName": "VLAN ID", "attributeValue": str(vlan_id)},
+                {"attributeName": "QnQ", "attributeValue": "False"},
+                {"attributeName": "CTag", "attributeValue": ""},
+            ],
+        },
+        connectorAttributes=[
+            {"attributeName": "Interface", "attributeValue": interface}
+        ],
+        actionTarget=ActionTargetModel(fullName="", fullAddress="full address"),
+        customActionAttributes=[{"attributeName": "VM_UUID", "attributeValue": vm_id}],
+        actionId=action_id,
+        type=action_type,
+    )
+
+
+class ParsedRequestService:
+    """The request is already a list of actions."""
+
+    @staticmethod
+    def get_actions(request):
+        return request